@@ -1,9 +1,26 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Header, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import Any, Dict, Optional, Union
+from email.utils import parsedate_to_datetime
 import os
 import json
+import hashlib
+import asyncio
+from src.tools.local_tools.approval_backends import http_approval_backend
+from src.utils.event_bus import event_bus
+from src.utils.run_registry import run_registry
+from src.utils.document_cache import DocumentCache
+from src.utils.job_queue import JobQueue
+from src.utils.tool_metrics import tool_metrics
+from src.utils.cost_ledger import cost_ledger
+from src.agents.spec_loader import agent_spec_loader
 
 app = FastAPI()
+document_cache = DocumentCache()
+job_queue = JobQueue()
 
+# Fallbacks for roles that have no run in the registry yet
 json_paths = {
     "product owner": "product owner_agent_steps.json"
 }
@@ -12,32 +29,167 @@ status_paths = {
     "product owner": "agent_started.txt"
 }
 
+def _not_modified(request: Request, etag: str, last_modified: Optional[str] = None) -> bool:
+    """True if the client's conditional GET headers show its cached copy is still current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _conditional_response(request: Request, body: Dict[str, Any], etag: str,
+                          last_modified: Optional[str] = None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+
+# The read endpoints are plain functions: FastAPI runs them in its threadpool, so their
+# registry and file reads do not block the event loop (and the runs and streams on it)
 @app.get("/status")
-def get_status(agent_name: str):
-    try:
-        path = status_paths[agent_name]
-        if os.path.exists(path):
-            return {"status": "running"}
-        else:
-            return {"status": "stopped"}
-    except:
-        return {"status": "stopped"}
+def get_status(request: Request, agent_name: Optional[str] = None, run_id: Optional[str] = None):
+    """Status of a run (run_id) or of the latest run of a role (agent_name, e.g. 'scrum lead')"""
+    run = run_registry.get(run_id) if run_id else run_registry.latest(agent_name)
+    if run:
+        body = {"status": run.get("status"), "run_id": run.get("run_id"), "role": run.get("role")}
+    else:
+        # Runs started before the registry existed only leave a marker file behind
+        path = status_paths.get(agent_name or "")
+        body = {"status": "running" if path and os.path.exists(path) else "stopped"}
+    etag = 'W/"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:16] + '"'
+    return _conditional_response(request, body, etag)
 
-# To run: uvicorn main:app --reload
-# Test: http://localhost:8000/search?path=/your/file/path
+# To run: uvicorn add_ons_api:app --reload
+# Test: http://localhost:8000/status?agent_name=product owner
 
 
 @app.get("/json")
-def steps(agent_name: str):
+def steps(request: Request, agent_name: Optional[str] = None, run_id: Optional[str] = None):
+    """Output JSON of a run (run_id) or of the latest completed run of a role (agent_name)"""
+    run = run_registry.get(run_id) if run_id else run_registry.latest(agent_name, status="completed")
+    path = run.get("output_path") if run else json_paths.get(agent_name or "")
+    try:
+        document = document_cache.get(path) if path else None
+    except (OSError, ValueError):
+        document = None
+    if document is None:
+        return {"data": {}}
+    data, etag, last_modified = document
+    return _conditional_response(request, {"data": data}, etag, last_modified)
+
+class ApprovalResponse(BaseModel):
+    # A plain reply, or per-item decisions for a plan: {"1": "approve", "2": {"input": ...}}
+    response: Union[str, Dict[str, Any]]
+
+
+@app.get("/approvals")
+def list_approvals():
+    """Pending human_input requests of agents running in this process (REA_APPROVAL_BACKEND=http)"""
+    return {"pending": http_approval_backend.list_pending()}
+
+
+@app.post("/approvals/{request_id}")
+def respond_to_approval(request_id: str, body: ApprovalResponse):
+    if not http_approval_backend.respond(request_id, body.response):
+        raise HTTPException(status_code=404, detail=f"No pending approval request '{request_id}'")
+    return {"status": "delivered", "id": request_id}
+
+
+
+@app.get("/stream")
+async def stream(run_id: Optional[str] = None, last_event_id: int = 0,
+                 last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")):
+    """
+    Server-Sent Events of agent runs in this process (all runs, or one run_id).
+    Reconnecting clients resume via the Last-Event-ID header or the last_event_id parameter.
+    """
+    if last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = max(last_event_id, int(last_event_id_header))
+
+    async def event_source():
+        async for event in event_bus.subscribe(run_id, last_event_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+
+class RunRequest(BaseModel):
+    prompt: str
+    # e.g. "product owner", "scrum lead", "peer review"; selected by the LLM when omitted
+    role: Optional[str] = None
+    # Azure DevOps project, used for the per-project concurrency limit
+    project: Optional[str] = None
+    # Agent spec to run instead of the role's, e.g. "scrum_lead.yaml" or "agent_spec.yaml#scrum-lead-agent"
+    spec: Optional[str] = None
+
+
+@app.post("/runs", status_code=202)
+async def submit_run(body: RunRequest):
+    """Queue an agent run on the worker pool; poll /runs/{run_id} or follow /stream?run_id=..."""
+    if body.spec:
+        try:
+            config = agent_spec_loader.get(body.spec)
+            if config.tool_manifest is not None:
+                # Deferred: building the tools imports langchain and the Azure DevOps SDK
+                from src.toolkits.toolkit import check_tool_manifest
+
+                await asyncio.to_thread(check_tool_manifest, config.tool_manifest, body.project)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid agent spec '{body.spec}': {str(e)}")
+    return job_queue.submit(body.prompt, role=body.role, project=body.project, spec=body.spec)
+
+
+@app.get("/runs")
+def list_runs(role: Optional[str] = None, status: Optional[str] = None):
+    return {"runs": run_registry.list(role, status), "active": job_queue.active_runs()}
+
+
+@app.get("/runs/{run_id}")
+def get_run(run_id: str):
+    run = run_registry.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Unknown run '{run_id}'")
+    return run
+
+
+@app.get("/metrics")
+def metrics():
+    """Per-tool call counts, latency histogram, HTTP requests/bytes, cache hits and errors (Prometheus text format)"""
+    return PlainTextResponse(tool_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/costs")
+def costs(group_by: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+          run_id: Optional[str] = None, role: Optional[str] = None, project: Optional[str] = None,
+          model: Optional[str] = None):
+    """LLM calls, tokens, cost and latency from the cost ledger, e.g. /costs?group_by=role,day&since=2025-06-01"""
+    columns = [column.strip() for column in group_by.split(",") if column.strip()] if group_by else []
     try:
-        path = json_paths[agent_name]
-        print(path)
-        if os.path.exists(path):
-            print("File exists!")
-            with open(path, 'r', encoding="utf-8") as f:
-                data = json.load(f)
-            return {"data": data}
-        else:
-            {"data": {}}
-    except:
-        {"data": {}}
\ No newline at end of file
+        rows = cost_ledger.aggregate(columns, since=since, until=until, run_id=run_id, role=role,
+                                     project=project, model=model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"group_by": columns, "rows": rows}
+
+
+@app.on_event("shutdown")
+def shutdown_job_queue():
+    job_queue.shutdown()
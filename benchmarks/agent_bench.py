@@ -0,0 +1,409 @@
+"""
+End-to-end benchmark of the main.py agent scenarios.
+
+Each scenario runs the real agent (tools, connectors, rate limiter, approvals) against
+the offline Azure DevOps server in benchmarks/fake_azdo, with the LLM replayed from a
+cassette in benchmarks/cassettes/<scenario>.json. Reports wall time, time spent in the
+LLM, in tools and in sleeps, tool call counts and Azure DevOps requests, appends them to
+benchmarks/results.jsonl and compares against the last result from a different commit.
+
+    python -m benchmarks.agent_bench --record scrum_lead     # once, needs OPENAI_API_KEY
+    python -m benchmarks.agent_bench --record --scripted      # re-record the committed cassettes, no key needed
+    python -m benchmarks.agent_bench                          # replay every recorded scenario
+    python -m benchmarks.agent_bench scrum_lead --repeat 3 --latency-ms 150 --fail-on-regression
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import importlib
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from benchmarks.cassette import Cassette, CassetteChatModel, ScriptedChatModel
+from benchmarks.fake_azdo.server import FakeAzureDevOpsServer, FaultConfig
+
+load_dotenv()
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CASSETTE_DIR = os.path.join(BENCH_DIR, "cassettes")
+# Scenario -> scripted model responses used by --scripted
+SCRIPT_PATH = os.path.join(BENCH_DIR, "fixtures", "scripted_sessions.json")
+
+# Configuration
+results_path = os.getenv('REA_BENCH_RESULTS', os.path.join(BENCH_DIR, "results.jsonl"))
+# The fake organization's "today", pinned so sprint dates and prompts match the cassettes
+bench_today = os.getenv('REA_BENCH_TODAY', '2025-06-18')
+regression_threshold = float(os.getenv('REA_BENCH_REGRESSION_THRESHOLD', '0.10'))
+
+# Scenario -> request constant in main.py, agent role and Azure DevOps project
+SCENARIOS = {
+    "product_owner": {"request": "PRODUCT_OWNER_REQUEST", "role": "product owner", "project": "aimetlab2"},
+    "scrum_lead": {"request": "SCRUM_LEAD_REQUEST", "role": "scrum lead", "project": "aimetlab2"},
+    "peer_review": {"request": "PEER_REVIEW_REQUEST", "role": "peer review", "project": "aimetlab"},
+}
+
+# Metrics compared against the previous commit, with the smallest change worth reporting
+REGRESSION_METRICS = {
+    "wall_seconds": 0.05,
+    "tool_seconds": 0.05,
+    "sleep_seconds": 0.05,
+    "tool_calls": 0,
+    "azdo_requests": 0,
+    "llm_calls": 0,
+}
+
+
+class BenchmarkCollector(BaseCallbackHandler):
+    """Times every LLM and tool run of an agent execution (callbacks arrive from several threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[Any, tuple] = {}
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        self.tool_calls: Counter = Counter()
+        self.tool_errors: Counter = Counter()
+        self.tool_seconds: Dict[str, float] = defaultdict(float)
+
+    def _start(self, run_id, kind: str, name: Optional[str] = None):
+        with self._lock:
+            self._started[run_id] = (kind, name, time.perf_counter())
+
+    def _finish(self, run_id, error: bool = False):
+        with self._lock:
+            kind, name, started = self._started.pop(run_id, (None, None, None))
+            if started is None:
+                return
+            elapsed = time.perf_counter() - started
+            if kind == "llm":
+                self.llm_calls += 1
+                self.llm_seconds += elapsed
+            else:
+                self.tool_calls[name] += 1
+                self.tool_seconds[name] += elapsed
+                if error:
+                    self.tool_errors[name] += 1
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, "tool", (serialized or {}).get("name") or kwargs.get("name") or "unknown")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+
+# Like get_openai_callback(): the collector is attached to every run started while it is set
+_collector_var: ContextVar[Optional[BenchmarkCollector]] = ContextVar("rea_benchmark_collector", default=None)
+register_configure_hook(_collector_var, True)
+
+
+class SleepMeter:
+    """Adds up time.sleep() calls made while active, except those from ignored threads"""
+
+    def __init__(self, ignore_threads: tuple = ("fake-azdo",)):
+        self.ignore_threads = ignore_threads
+        self.seconds = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._original = None
+
+    def __enter__(self):
+        self._original = original = time.sleep
+
+        def sleep(seconds):
+            if threading.current_thread().name not in self.ignore_threads:
+                with self._lock:
+                    self.seconds += seconds
+                    self.calls += 1
+            original(seconds)
+
+        time.sleep = sleep
+        return self
+
+    def __exit__(self, *exc):
+        time.sleep = self._original
+
+
+class PinnedToday:
+    """Makes date.today() in the given modules return the fake organization's "today" while active"""
+
+    modules = ("src.tools.azure_devops.capacitytools", "src.utils.iteration_cache")
+
+    def __init__(self, today: date):
+        self.today = today
+        self._originals = {}
+
+    def __enter__(self):
+        pinned = self.today
+
+        class _PinnedDate(date):
+            @classmethod
+            def today(cls):
+                return pinned
+
+        for name in self.modules:
+            module = importlib.import_module(name)
+            self._originals[name] = module.date
+            module.date = _PinnedDate
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            sys.modules[name].date = original
+
+
+def current_commit() -> str:
+    """Short HEAD commit, suffixed with -dirty when tracked files have uncommitted changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BENCH_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _fake_control(server: FakeAzureDevOpsServer, action: str, method: str = "GET") -> Dict[str, Any]:
+    url = f"http://{server.host}:{server.port}/_fake/{action}"
+    request = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+async def run_scenario(name: str, server: FakeAzureDevOpsServer, record: bool = False,
+                       strict: bool = True, workdir: str = ".", scripted: bool = False) -> Dict[str, Any]:
+    """Run one scenario against the fake server and return its measurements (scripted: record from SCRIPT_PATH, not the LLM)"""
+    # Imported late: the agent modules read AZURE_ORG_URL etc. at import time
+    import main
+    from src.agents import agent
+    from src.utils.run_registry import run_registry
+
+    scenario = SCENARIOS[name]
+    run_id = f"bench_{name}_{os.urandom(4).hex()}"
+    cassette = Cassette(os.path.join(CASSETTE_DIR, f"{name}.json"), strict=strict, substitutions={
+        server.url: "<org_url>", run_id: "<run_id>", os.path.abspath(workdir): "<workdir>",
+    })
+    if record:
+        cassette.interactions = []
+    elif not cassette.interactions:
+        raise FileNotFoundError(f"No cassette for '{name}' at {cassette.path}; record it first with --record {name}")
+
+    _fake_control(server, "reset", "POST")
+    original_get_llm = agent.get_llm
+    if scripted:
+        with open(SCRIPT_PATH, "r", encoding="utf-8") as f:
+            original_llm = ScriptedChatModel(steps=json.load(f)[name])
+    else:
+        original_llm = original_get_llm()
+    cassette_llm = CassetteChatModel(cassette=cassette, mode="record" if record else "replay", inner=original_llm)
+    agent.get_llm = lambda *args, **kwargs: cassette_llm
+    collector = BenchmarkCollector()
+    token = _collector_var.set(collector)
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    started = time.perf_counter()
+    try:
+        # The agent's clock matches the fake server's pinned "today", so tool outputs (and prompts) do not change by date
+        with SleepMeter() as sleeps, PinnedToday(date.fromisoformat(bench_today)):
+            await agent.rea_agent(getattr(main, scenario["request"]), role=scenario["role"],
+                                  run_id=run_id, project=scenario["project"])
+        wall = time.perf_counter() - started
+        run = run_registry.get(run_id) or {}
+    finally:
+        os.chdir(previous_dir)
+        _collector_var.reset(token)
+        agent.get_llm = original_get_llm
+
+    if record:
+        cassette.save(scenario=name, model="scripted" if scripted else getattr(original_llm, "model_name", None),
+                      source=os.path.relpath(SCRIPT_PATH, BENCH_DIR) if scripted else "llm", today=bench_today)
+    stats = _fake_control(server, "stats")
+    recorded_llm = cassette.recorded_latency if not record else collector.llm_seconds
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": current_commit(),
+        "scenario": name,
+        "mode": "record" if record else "replay",
+        # A lenient replay that missed answered with other prompts' responses: never a baseline
+        "status": "cassette_miss" if cassette.misses else run.get("status", "failed"),
+        "error": run.get("error"),
+        "wall_seconds": round(wall, 3),
+        "llm_seconds": round(collector.llm_seconds, 3),
+        "recorded_llm_seconds": round(recorded_llm, 3),
+        # What the run would take with the recorded LLM latency instead of the replay
+        "projected_wall_seconds": round(wall - collector.llm_seconds + recorded_llm, 3),
+        "tool_seconds": round(sum(collector.tool_seconds.values()), 3),
+        "sleep_seconds": round(sleeps.seconds, 3),
+        "sleep_calls": sleeps.calls,
+        "llm_calls": collector.llm_calls,
+        "tool_calls": sum(collector.tool_calls.values()),
+        "tool_errors": sum(collector.tool_errors.values()),
+        "tool_calls_by_name": dict(collector.tool_calls),
+        "tool_seconds_by_name": {tool: round(seconds, 3) for tool, seconds in collector.tool_seconds.items()},
+        "azdo_requests": stats["requests"],
+        "azdo_throttled": stats["throttled"],
+        "azdo_requests_by_route": stats["by_route"],
+        "cassette_hits": cassette.hits,
+        "cassette_misses": cassette.misses,
+        "total_tokens": run.get("total_tokens") or 0,
+        "fake_latency_ms": server.app.state.faults.latency_ms,
+    }
+
+
+def load_results(path: str = results_path) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_results(results: List[Dict[str, Any]], path: str = results_path):
+    with open(path, "a", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, sort_keys=True) + "\n")
+
+
+def find_baseline(history: List[Dict[str, Any]], result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Latest completed result for the same scenario, mode and fake latency from another commit"""
+    commit = result["commit"].replace("-dirty", "")
+    for previous in reversed(history):
+        if (previous["scenario"] == result["scenario"] and previous["mode"] == result["mode"]
+                and previous.get("fake_latency_ms") == result.get("fake_latency_ms")
+                and previous.get("status") == "completed"
+                and previous["commit"].replace("-dirty", "") != commit):
+            return previous
+    return None
+
+
+def compare(result: Dict[str, Any], baseline: Optional[Dict[str, Any]],
+            threshold: float = regression_threshold) -> List[str]:
+    """Metrics that grew by more than threshold (relative) and the metric's noise floor (absolute)"""
+    if baseline is None:
+        return []
+    regressions = []
+    for metric, floor in REGRESSION_METRICS.items():
+        before, after = baseline.get(metric), result.get(metric)
+        if before is None or after is None:
+            continue
+        if after - before > floor and after > before * (1 + threshold):
+            regressions.append(f"{metric} {before} -> {after}")
+    return regressions
+
+
+def print_report(results: List[Dict[str, Any]], history: List[Dict[str, Any]], threshold: float) -> bool:
+    """Print one row per run plus regressions; returns True if any run regressed"""
+    header = f"{'scenario':<15}{'status':<15}{'wall':>8}{'llm':>8}{'tools':>8}{'sleep':>8}{'#llm':>6}{'#tools':>8}{'#azdo':>7}{'miss':>6}"
+    print(header)
+    print("-" * len(header))
+    regressed = False
+    for result in results:
+        print(f"{result['scenario']:<15}{result['status']:<15}{result['wall_seconds']:>8.2f}{result['llm_seconds']:>8.2f}"
+              f"{result['tool_seconds']:>8.2f}{result['sleep_seconds']:>8.2f}{result['llm_calls']:>6}"
+              f"{result['tool_calls']:>8}{result['azdo_requests']:>7}{result['cassette_misses']:>6}")
+        baseline = find_baseline(history, result)
+        regressions = compare(result, baseline, threshold)
+        if regressions:
+            regressed = True
+            print(f"  REGRESSION vs {baseline['commit']}: " + ", ".join(regressions))
+        elif baseline is not None:
+            print(f"  no regression vs {baseline['commit']} (wall {baseline['wall_seconds']}s)")
+    for result in results:
+        slowest = sorted(result["tool_seconds_by_name"].items(), key=lambda item: -item[1])[:5]
+        if slowest:
+            print(f"\n{result['scenario']} slowest tools: " + ", ".join(
+                f"{tool} {seconds:.2f}s/{result['tool_calls_by_name'][tool]}x" for tool, seconds in slowest))
+        if result["error"]:
+            print(f"{result['scenario']} error: {result['error']}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the main.py agent scenarios against the fake Azure DevOps server")
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run (default: all with a cassette): {', '.join(SCENARIOS)}")
+    parser.add_argument("--record", action="store_true", help="call the real LLM and (re)write the cassettes")
+    parser.add_argument("--scripted", action="store_true",
+                        help="with --record: record the scripted responses in benchmarks/fixtures/scripted_sessions.json instead of calling the LLM")
+    parser.add_argument("--lenient", action="store_true",
+                        help="serve the next unused recording for prompts that are not in the cassette instead of failing the run")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency injected into every Azure DevOps request")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fake server requests/second before answering 429")
+    parser.add_argument("--results", default=results_path)
+    parser.add_argument("--no-save", action="store_true", help="do not append to the results file")
+    parser.add_argument("--threshold", type=float, default=regression_threshold)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--workdir", help="where agent logs and reports are written (default: a temp dir)")
+    args = parser.parse_args()
+
+    names = args.scenarios or [name for name in SCENARIOS if args.record or os.path.exists(os.path.join(CASSETTE_DIR, f"{name}.json"))]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown or not names:
+        parser.error(f"unknown scenarios {unknown}" if unknown else "no cassettes recorded yet; run with --record first")
+    if args.scripted and not args.record:
+        parser.error("--scripted only applies to --record")
+
+    server = FakeAzureDevOpsServer(today=datetime.fromisoformat(bench_today),
+                                   faults=FaultConfig(latency_ms=args.latency_ms, jitter_ms=0, rate_limit=args.rate_limit))
+    server.start()
+    os.environ["AZURE_ORG_URL"] = server.url
+    os.environ["AZURE_DEVOPS_PERSONAL_ACCESS_TOKEN"] = "fake-pat"
+    os.environ["AZURE_DEVOPS_CACHE_DIR"] = tempfile.mkdtemp(prefix="rea_bench_azdo_cache_")
+    os.environ["REA_APPROVAL_BACKEND"] = "auto"
+    if not args.record or args.scripted:
+        os.environ.setdefault("OPENAI_API_KEY", "replay-only")
+    workdir = args.workdir or tempfile.mkdtemp(prefix="rea_bench_")
+    os.makedirs(workdir, exist_ok=True)
+
+    results = []
+    try:
+        for _ in range(args.repeat):
+            for name in names:
+                print(f"Running {name} ({'record' if args.record else 'replay'})...")
+                results.append(asyncio.run(run_scenario(name, server, record=args.record, strict=not args.lenient,
+                                                        workdir=workdir, scripted=args.scripted)))
+    finally:
+        server.stop()
+
+    print(f"\nAgent logs and reports: {workdir}\n")
+    regressed = print_report(results, load_results(args.results), args.threshold)
+    if not args.no_save:
+        append_results(results, args.results)
+        print(f"\nResults appended to {args.results}")
+    # A run that failed or answered from mismatched recordings measures nothing comparable
+    unusable = [result["scenario"] for result in results if result["status"] in ("failed", "cassette_miss")]
+    if unusable:
+        print(f"\nRuns failed or missed the cassette: {', '.join(unusable)} (re-record them with --record)")
+    if unusable or (regressed and args.fail_on_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Record/replay of chat model calls for deterministic agent benchmarks.
+
+A cassette is a JSON file of recorded interactions, each keyed by a hash of the
+normalized prompt (messages + offered function names). In "record" mode every call
+goes to the real model and is appended to the cassette; in "replay" mode the
+response is served from the cassette, so a run costs no tokens and takes no LLM time
+while the rest of the agent (tools, Azure DevOps calls, sleeps) runs for real.
+
+ScriptedChatModel stands in for the real model when recording without an OpenAI key:
+it answers with a fixed sequence of tool calls and final answers, so the committed
+cassettes replay the agent loop deterministically (their responses are scripted, not
+model output).
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import ConfigDict
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+CASSETTE_VERSION = 1
+
+# Values that differ on every run and must not change the prompt hash
+_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?")
+_RANDOM_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}", re.IGNORECASE)
+_RANDOM_HEX = re.compile(r"\b(?:run-)?[0-9a-f]{32}\b", re.IGNORECASE)
+
+
+class CassetteMissError(RuntimeError):
+    """Raised in replay mode when the cassette has no response left for a prompt"""
+
+
+class Cassette:
+    """
+    Recorded interactions for one scenario.
+
+    Replay serves, for each prompt, the first unused interaction with the same key;
+    if there is none (the prompt drifted, e.g. a tool output changed) it raises
+    CassetteMissError. With strict=False it instead falls back to the next unused
+    interaction in recording order and counts a miss; such a run answers with
+    responses recorded for other prompts and is not comparable to earlier runs.
+    """
+
+    def __init__(self, path: str, substitutions: Optional[Dict[str, str]] = None, strict: bool = True):
+        self.path = path
+        self.strict = strict
+        # Run-specific strings (fake server URL, run id, working directory) -> stable placeholders
+        self.substitutions = substitutions or {}
+        self.interactions: List[Dict[str, Any]] = []
+        self.meta: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self._used = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.interactions = data.get("interactions", [])
+            self.meta = {key: value for key, value in data.items() if key != "interactions"}
+
+    def normalize(self, text: str) -> str:
+        for value, placeholder in self.substitutions.items():
+            if value:
+                text = text.replace(value, placeholder)
+        text = _TIMESTAMP.sub("<timestamp>", text)
+        text = _RANDOM_UUID.sub("<uuid>", text)
+        return _RANDOM_HEX.sub("<hex>", text)
+
+    def key(self, messages: List[BaseMessage], functions: Optional[List[Dict[str, Any]]] = None) -> str:
+        prompt = [{
+            "role": message.type,
+            "content": self.normalize(message.content if isinstance(message.content, str) else json.dumps(message.content)),
+            "function_call": self.normalize(json.dumps(message.additional_kwargs.get("function_call"), sort_keys=True)),
+            "name": getattr(message, "name", None),
+        } for message in messages]
+        tools = sorted(function.get("name", "") for function in functions or [])
+        payload = json.dumps({"messages": prompt, "functions": tools}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def next_response(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            for index, interaction in enumerate(self.interactions):
+                if index not in self._used and interaction["key"] == key:
+                    self._used.add(index)
+                    self.hits += 1
+                    return interaction
+            if not self.strict:
+                for index, interaction in enumerate(self.interactions):
+                    if index not in self._used:
+                        self._used.add(index)
+                        self.misses += 1
+                        return interaction
+        raise CassetteMissError(
+            f"No recorded response for prompt {key[:12]} in {self.path} "
+            f"({len(self._used)}/{len(self.interactions)} interactions used). Re-record the scenario with --record."
+        )
+
+    def append(self, key: str, messages: List[BaseMessage], result: ChatResult, latency: float):
+        generation = result.generations[0]
+        last = messages[-1].content if messages else ""
+        with self._lock:
+            self.interactions.append({
+                "key": key,
+                "prompt_preview": self.normalize(str(last))[:200],
+                "message": message_to_dict(generation.message),
+                "generation_info": generation.generation_info,
+                "llm_output": result.llm_output,
+                "latency_seconds": round(latency, 3),
+            })
+
+    @property
+    def recorded_latency(self) -> float:
+        """Total recorded LLM latency of the interactions replayed so far"""
+        return sum(self.interactions[index].get("latency_seconds", 0) for index in self._used)
+
+    def save(self, **meta):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = {"version": CASSETTE_VERSION, "recorded_at": datetime.now().isoformat(), **meta,
+                "interactions": self.interactions}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str)
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Chat model that records calls to `inner` into a cassette ("record") or
+    answers from the cassette without calling any model ("replay").
+
+    Drop-in for the agent's ChatOpenAI: functions bound by the OpenAI functions
+    agent arrive as the `functions` kwarg and are part of the prompt key.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    cassette: Any
+    mode: str = "replay"
+    inner: Optional[BaseChatModel] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def _replay(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        interaction = self.cassette.next_response(self.cassette.key(messages, kwargs.get("functions")))
+        message = messages_from_dict([interaction["message"]])[0]
+        return ChatResult(
+            generations=[ChatGeneration(message=message, generation_info=interaction.get("generation_info"))],
+            llm_output=interaction.get("llm_output"),
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.mode == "replay":
+            return self._replay(messages, **kwargs)
+        started = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        self.cassette.append(self.cassette.key(messages, kwargs.get("functions")), messages, result,
+                             time.perf_counter() - started)
+        return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.mode == "replay":
+            return self._replay(messages, **kwargs)
+        started = time.perf_counter()
+        result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+        self.cassette.append(self.cassette.key(messages, kwargs.get("functions")), messages, result,
+                             time.perf_counter() - started)
+        return result
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that answers with the next step of a script, whatever the prompt.
+
+    Steps: {"tool": name, "input": str or dict} calls a tool (a string is the input of a
+    single-input tool), {"answer": text} is a final answer and {"json": object} answers
+    with the object in a ```json block (the run summary).
+    """
+
+    steps: List[Dict[str, Any]]
+    position: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _next_message(self) -> AIMessage:
+        if self.position >= len(self.steps):
+            raise RuntimeError(f"The script has no step left after {len(self.steps)} steps")
+        step = self.steps[self.position]
+        self.position += 1
+        if "tool" in step:
+            arguments = step["input"] if isinstance(step["input"], dict) else {"__arg1": step["input"]}
+            return AIMessage(content="", additional_kwargs={
+                "function_call": {"name": step["tool"], "arguments": json.dumps(arguments)}})
+        if "json" in step:
+            return AIMessage(content=f"```json\n{json.dumps(step['json'], indent=2)}\n```")
+        return AIMessage(content=step["answer"])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._next_message())])
@@ -0,0 +1,1059 @@
+"""
+Offline stand-in for the Azure DevOps REST API used by the connectors in src/tools/azure_devops.
+
+Serves the WIT, Work, Core, Git and Build endpoints the connectors call, backed by an
+in-memory organization seeded from a fixture, with optional latency and rate-limit
+injection. Point the connectors at it with AZURE_ORG_URL:
+
+    python -m benchmarks.fake_azdo.server --port 8765 --latency-ms 120
+    AZURE_ORG_URL=http://127.0.0.1:8765/fakeorg python main.py scrum_lead_agent
+
+The SDK discovers every route through OPTIONS /<org>/_apis, so each endpoint below is
+declared with the location id the SDK asks for and the route template it should use.
+"""
+import os
+import json
+import re
+import time
+import random
+import asyncio
+import argparse
+import threading
+from datetime import date
+from collections import Counter
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import unquote, parse_qsl
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from benchmarks.fake_azdo.store import FakeAzdoStore, FakeAzdoError, BACKLOG_LEVELS
+from benchmarks.fake_azdo.wiql import WiqlError
+
+load_dotenv()
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "azdo_seed.json")
+
+# Configuration
+fixture_path = os.getenv('REA_FAKE_AZDO_FIXTURE', DEFAULT_FIXTURE)
+fake_latency_ms = float(os.getenv('REA_FAKE_AZDO_LATENCY_MS', '0'))
+fake_jitter_ms = float(os.getenv('REA_FAKE_AZDO_JITTER_MS', '0'))
+fake_rate_limit = float(os.getenv('REA_FAKE_AZDO_RATE_LIMIT', '0'))
+fake_rate_limit_mode = os.getenv('REA_FAKE_AZDO_RATE_LIMIT_MODE', 'reject')
+fake_seed = int(os.getenv('REA_FAKE_AZDO_SEED', '0'))
+
+
+@dataclass
+class FaultConfig:
+    """
+    Latency and throttling injected into every API request.
+
+    latency_ms (+ up to jitter_ms, from a seeded RNG) is added to each request;
+    route_latency_ms overrides it per "<area>.<resource>" (e.g. "wit.wiql").
+    rate_limit caps requests per second (0 = unlimited, burst = rate_limit_burst):
+    mode "reject" answers 429 with Retry-After like Azure DevOps' throttling,
+    mode "delay" holds the request until the bucket has room.
+    """
+    latency_ms: float = fake_latency_ms
+    jitter_ms: float = fake_jitter_ms
+    route_latency_ms: Dict[str, float] = field(default_factory=dict)
+    rate_limit: float = fake_rate_limit
+    rate_limit_burst: int = 5
+    rate_limit_mode: str = fake_rate_limit_mode
+    seed: int = fake_seed
+
+
+@dataclass
+class ApiLocation:
+    id: str
+    area: str
+    resource: str
+    template: str
+    pattern: Any = None
+    handlers: Dict[str, Callable] = field(default_factory=dict)
+
+
+def _compile_template(template: str):
+    """Route template -> regex over the raw (still percent-encoded) path below the organization"""
+    regex = ""
+    for segment in template.split("/"):
+        match = re.fullmatch(r"(\$?)\{\*?(\w+)\}", segment)
+        if match and match.group(1):
+            regex += r"/\$(?P<%s>[^/]+)" % match.group(2)
+        elif match:
+            regex += r"(?:/(?P<%s>[^/]+))?" % match.group(2)
+        else:
+            regex += "/" + re.escape(segment)
+    return re.compile(f"^{regex}/?$", re.IGNORECASE)
+
+
+# Order matters: the first template that matches the path (and has a handler for the verb) wins
+LOCATIONS: List[ApiLocation] = [
+    # Location
+    ApiLocation("e81700f7-3be2-46de-8624-2eb35882fcaa", "Location", "ResourceAreas", "_apis/resourceAreas/{areaId}"),
+    ApiLocation("00d9565f-ed9c-4a06-9a50-00e7896ccab4", "Location", "ConnectionData", "_apis/connectionData"),
+    ApiLocation("28010c54-d0c0-4c89-a5b0-1c9e188b9fb7", "IMS", "Identities", "_apis/identities/{identityId}"),
+    # Core
+    ApiLocation("294c494c-2600-4d7e-b76c-3dd50c3c95be", "core", "members", "_apis/projects/{projectId}/teams/{teamId}/members"),
+    ApiLocation("d30a3dd1-f8ba-442a-b86a-bd0c0c383e59", "core", "teams", "_apis/projects/{projectId}/teams/{teamId}"),
+    ApiLocation("603fe2ac-9723-48b9-88ad-09305aa6c6e1", "core", "projects", "_apis/projects/{projectId}"),
+    # Work item tracking
+    ApiLocation("62d3d110-0047-428c-ad3c-4fe872c91c74", "wit", "workItems", "{project}/_apis/wit/workItems/${type}"),
+    ApiLocation("608aac0a-32e1-4493-a863-b9cf4566d257", "wit", "comments", "{project}/_apis/wit/workItems/{workItemId}/comments/{commentId}"),
+    ApiLocation("72c7ddf8-2cdc-4f60-90cd-ab71c14a399b", "wit", "workItems", "{project}/_apis/wit/workItems/{id}"),
+    ApiLocation("1a9c53f7-f243-4447-b110-35ef023636e4", "wit", "wiql", "{project}/{team}/_apis/wit/wiql/{id}"),
+    # The work item $batch endpoint has no resource location; the id is only used for routing here
+    ApiLocation("00000000-0000-0000-0000-0000000b47c4", "wit", "$batch", "_apis/wit/$batch"),
+    ApiLocation("a67d190c-c41f-424b-814d-0e906f659301", "wit", "queries", "{project}/_apis/wit/queries/{*query}"),
+    ApiLocation("7c8d7a76-4a09-43e8-b5df-bd792f4ac6aa", "wit", "workItemTypes", "{project}/_apis/wit/workItemTypes/{type}"),
+    # Work
+    ApiLocation("74412d15-8c1a-4352-a48d-ef1ed5587d57", "work", "capacities", "{project}/{team}/_apis/work/teamsettings/iterations/{iterationId}/capacities"),
+    ApiLocation("2d4faa2e-9150-4cbf-a47a-932b1b4a0773", "work", "teamdaysoff", "{project}/{team}/_apis/work/teamsettings/iterations/{iterationId}/teamdaysoff"),
+    ApiLocation("c3c1012b-bea7-49d7-b45e-1664e566f84c", "work", "teamsettings", "{project}/{team}/_apis/work/teamsettings"),
+    ApiLocation("c9175577-28a1-4b06-9197-8636af9f64ad", "work", "iterations", "{project}/{team}/_apis/work/teamsettings/iterations/{id}"),
+    ApiLocation("7c468d96-ab1d-4294-a360-92f07e9ccd98", "work", "workItems", "{project}/{team}/_apis/work/backlogs/{backlogId}/workItems"),
+    ApiLocation("a93726f9-7867-4e38-b4f2-0bfafc2f6a94", "work", "backlogs", "{project}/{team}/_apis/work/backlogs/{id}"),
+    # Git
+    ApiLocation("965a3ec7-5ed8-455a-bdcb-835a5ea7fe7b", "git", "pullRequestThreadComments", "{project}/_apis/git/repositories/{repositoryId}/pullRequests/{pullRequestId}/threads/{threadId}/comments/{commentId}"),
+    ApiLocation("ab6e2e5d-a0b7-4153-b64a-a4efe0d49449", "git", "pullRequestThreads", "{project}/_apis/git/repositories/{repositoryId}/pullRequests/{pullRequestId}/threads/{threadId}"),
+    ApiLocation("4b6702c7-aa35-4b89-9c96-b9abf6d3e540", "git", "pullRequestReviewers", "{project}/_apis/git/repositories/{repositoryId}/pullRequests/{pullRequestId}/reviewers/{reviewerId}"),
+    ApiLocation("9946fd70-0d40-406e-b686-b4744cbbcc37", "git", "pullRequests", "{project}/_apis/git/repositories/{repositoryId}/pullRequests/{pullRequestId}"),
+    ApiLocation("a5d28130-9cd2-40fa-9f08-902e7daa9efb", "git", "pullRequestsByProject", "{project}/_apis/git/pullRequests"),
+    ApiLocation("01a46dea-7d46-4d40-bc84-319e7c260d99", "git", "pullRequestsById", "{project}/_apis/git/pullRequests/{pullRequestId}"),
+    ApiLocation("d5b216de-d8d5-4d32-ae76-51df755b16d3", "git", "stats", "{project}/_apis/git/repositories/{repositoryId}/stats/branches"),
+    ApiLocation("c2570c3b-5b3f-41b8-98bf-5407bfde8d58", "git", "commits", "{project}/_apis/git/repositories/{repositoryId}/commits/{commitId}"),
+    ApiLocation("2d874a60-a811-4f62-9c9f-963a6ea0a55b", "git", "refs", "{project}/_apis/git/repositories/{repositoryId}/refs/{*filter}"),
+    ApiLocation("225f7195-f9c7-4d14-ab28-a83f7ff77e1f", "git", "repositories", "{project}/_apis/git/repositories/{repositoryId}"),
+    # Build
+    ApiLocation("54572c7b-bbd3-45d4-80dc-28be08941620", "build", "changes", "{project}/_apis/build/builds/{buildId}/changes"),
+    ApiLocation("35a80daf-7f30-45fc-86e8-6b813d9c90df", "build", "logs", "{project}/_apis/build/builds/{buildId}/logs/{logId}"),
+    ApiLocation("8baac422-4c6e-4de5-8532-db96d92acffa", "build", "Timeline", "{project}/_apis/build/builds/{buildId}/timeline/{timelineId}"),
+    ApiLocation("0cd358e1-9217-4d94-8269-1c1ee6f93dcf", "build", "builds", "{project}/_apis/build/builds/{buildId}"),
+    ApiLocation("7c116775-52e5-453e-8c5d-914d9762d8c4", "build", "revisions", "{project}/_apis/build/definitions/{definitionId}/revisions"),
+    ApiLocation("dbeaf647-6167-421a-bda9-c9327b25e2e6", "build", "definitions", "{project}/_apis/build/definitions/{definitionId}"),
+]
+_LOCATIONS_BY_ID = {location.id: location for location in LOCATIONS}
+for _location in LOCATIONS:
+    _location.pattern = _compile_template(_location.template)
+
+# Resource areas advertised to Connection so every client resolves to this server
+# (clients whose area is missing would fall back to the public SPS service)
+RESOURCE_AREAS = {
+    "5264459e-e5e0-4bd8-b118-0985e68a4ec5": "wit",
+    "1d4f49f9-02b9-4e26-b826-2cdb6195f2a9": "work",
+    "79134c72-4a58-4b42-976c-04e7115f32bf": "core",
+    "4e080c62-fa21-4fbc-8fef-2a10a2b38049": "git",
+    "965220d5-5bb9-42cf-8d67-9b146df2a5a4": "build",
+    "c2aa639c-3ccc-4740-b3b6-ce2a1e1d984e": "Test",
+    "bf7d82a0-8aa5-4613-94ef-6172a5ea01f3": "wiki",
+    "ea48a0a1-269c-42d8-b8ad-ddc8fcdcf578": "search",
+    "8a3d49b8-91f0-46ef-b33d-dda338c25db3": "IMS",
+}
+
+
+def handles(location_id: str, *methods: str):
+    """Register the decorated function as the handler for a location and HTTP methods"""
+    def decorator(func):
+        for method in methods:
+            _LOCATIONS_BY_ID[location_id].handlers[method] = func
+        return func
+    return decorator
+
+
+@dataclass
+class ApiCall:
+    """One routed request as seen by a handler"""
+    store: FakeAzdoStore
+    base_url: str
+    route: Dict[str, Optional[str]]
+    query: Dict[str, str]
+    body: Any
+
+    def project(self, key: str = "project", required: bool = True):
+        return self.store.get_project(self.route.get(key), required=required)
+
+    def team(self, project_key: str = "project", team_key: str = "team"):
+        return self.store.get_team(self.project(project_key), self.route.get(team_key))
+
+    def int_query(self, name: str, default: Optional[int] = None) -> Optional[int]:
+        value = self.query.get(name)
+        return int(value) if value not in (None, "") else default
+
+
+def collection(values: List[Any]) -> Dict[str, Any]:
+    return {"count": len(values), "value": values}
+
+
+# ---- Location ----
+
+@handles("e81700f7-3be2-46de-8624-2eb35882fcaa", "GET")
+def get_resource_areas(call: ApiCall):
+    return collection([{"id": area_id, "name": name, "locationUrl": call.base_url}
+                       for area_id, name in RESOURCE_AREAS.items()])
+
+
+@handles("00d9565f-ed9c-4a06-9a50-00e7896ccab4", "GET")
+def get_connection_data(call: ApiCall):
+    me = call.store.me or {}
+    user = {"id": me.get("id"), "providerDisplayName": me.get("displayName"), "isActive": True,
+            "properties": {"Account": {"$type": "System.String", "$value": me.get("uniqueName")}}}
+    return {"authenticatedUser": user, "authorizedUser": user, "instanceId": call.store.organization}
+
+
+def _identity_json(identity):
+    return {"id": identity["id"], "descriptor": f"Microsoft.IdentityModel.Claims.ClaimsIdentity;{identity['uniqueName']}",
+            "providerDisplayName": identity["displayName"], "isActive": True, "isContainer": False,
+            "properties": {"Account": {"$type": "System.String", "$value": identity["uniqueName"]},
+                           "Mail": {"$type": "System.String", "$value": identity["uniqueName"]}}}
+
+
+@handles("28010c54-d0c0-4c89-a5b0-1c9e188b9fb7", "GET")
+def read_identities(call: ApiCall):
+    if call.route.get("identityId"):
+        identity = call.store.identities.get(call.route["identityId"])
+        if identity is None:
+            raise FakeAzdoError(404, f"Identity {call.route['identityId']} not found.", "IdentityNotFoundException")
+        return _identity_json(identity)
+    if call.query.get("identityIds"):
+        ids = [value.strip() for value in call.query["identityIds"].split(",") if value.strip()]
+        return collection([_identity_json(call.store.identities[value]) if value in call.store.identities else None
+                           for value in ids])
+    if not call.query.get("searchFilter") or not call.query.get("filterValue"):
+        raise FakeAzdoError(400, "A filter (identityIds, descriptors or searchFilter with filterValue) is required.")
+    identity = call.store.find_identity(call.query["filterValue"])
+    return collection([_identity_json(identity)] if identity else [])
+
+
+# ---- Core ----
+
+@handles("603fe2ac-9723-48b9-88ad-09305aa6c6e1", "GET")
+def get_projects(call: ApiCall):
+    if call.route.get("projectId"):
+        return call.store.project_json(call.project("projectId"), call.base_url)
+    projects = [call.store.project_json(project, call.base_url) for project in call.store.projects.values()]
+    top = call.int_query("$top")
+    return collection(projects[:top] if top else projects)
+
+
+@handles("d30a3dd1-f8ba-442a-b86a-bd0c0c383e59", "GET")
+def get_teams(call: ApiCall):
+    project = call.project("projectId")
+    if call.route.get("teamId"):
+        return call.store.team_json(project, call.store.get_team(project, call.route["teamId"]), call.base_url)
+    return collection([call.store.team_json(project, team, call.base_url) for team in project.get("teams", [])])
+
+
+@handles("294c494c-2600-4d7e-b76c-3dd50c3c95be", "GET")
+def get_team_members(call: ApiCall):
+    team = call.team("projectId", "teamId")
+    members = [{"identity": call.store.identity_ref(member["id"], call.base_url), "isTeamAdmin": member.get("isTeamAdmin", False)}
+               for member in team.get("members", [])]
+    skip, top = call.int_query("$skip", 0), call.int_query("$top")
+    members = members[skip:]
+    return collection(members[:top] if top else members)
+
+
+# ---- Work item tracking ----
+
+@handles("72c7ddf8-2cdc-4f60-90cd-ab71c14a399b", "GET")
+def get_work_items(call: ApiCall):
+    expand = call.query.get("$expand")
+    fields = call.query["fields"].split(",") if call.query.get("fields") else None
+    if call.route.get("id"):
+        return call.store.work_item_json(call.store.get_work_item(int(call.route["id"])), call.base_url, expand, fields)
+    ids = [int(value) for value in call.query.get("ids", "").split(",") if value.strip()]
+    if not ids:
+        raise FakeAzdoError(400, "The ids parameter is required.")
+    if len(ids) > 200:
+        raise FakeAzdoError(400, "VS402337: The number of work items requested exceeds the limit of 200.")
+    items = []
+    for work_item_id in ids:
+        if call.query.get("errorPolicy", "").lower() == "omit" and work_item_id not in call.store.work_items:
+            items.append(None)
+            continue
+        items.append(call.store.work_item_json(call.store.get_work_item(work_item_id), call.base_url, expand, fields))
+    return collection(items)
+
+
+@handles("72c7ddf8-2cdc-4f60-90cd-ab71c14a399b", "PATCH")
+def update_work_item(call: ApiCall):
+    item = call.store.update_work_item(int(call.route["id"]), call.body or [])
+    return call.store.work_item_json(item, call.base_url, "relations")
+
+
+@handles("62d3d110-0047-428c-ad3c-4fe872c91c74", "POST")
+def create_work_item(call: ApiCall):
+    item = call.store.create_work_item(call.route["project"], call.route["type"], call.body or [])
+    return call.store.work_item_json(item, call.base_url, "relations")
+
+
+_BATCH_URI = re.compile(r"^/_apis/wit/workitems/(\d+)(?:\?.*)?$", re.IGNORECASE)
+_BATCH_CREATE_URI = re.compile(r"^/([^/?]+)/_apis/wit/workitems/\$([^/?]+)(?:\?.*)?$", re.IGNORECASE)
+
+
+@handles("00000000-0000-0000-0000-0000000b47c4", "POST")
+def update_work_items_batch(call: ApiCall):
+    """Updates and creates; each request is applied on its own (not transactional), bodies are JSON strings like the service returns"""
+    requests = call.body or []
+    if len(requests) > 200:
+        raise FakeAzdoError(400, "VS402337: The number of requests in a batch exceeds the limit of 200.")
+    results = []
+    for request in requests:
+        match = _BATCH_URI.match(request.get("uri") or "")
+        create = _BATCH_CREATE_URI.match(request.get("uri") or "")
+        if (request.get("method") or "").upper() != "PATCH" or not (match or create):
+            results.append({"code": 400, "headers": {"Content-Type": "application/json; charset=utf-8"},
+                            "body": json.dumps({"count": 1, "value": {"Message": f"Unsupported batch request {request.get('method')} {request.get('uri')}"}})})
+            continue
+        try:
+            if create:
+                item = call.store.create_work_item(unquote(create.group(1)), unquote(create.group(2)), request.get("body") or [])
+            else:
+                item = call.store.update_work_item(int(match.group(1)), request.get("body") or [])
+            results.append({"code": 200, "headers": {"Content-Type": "application/json; charset=utf-8"},
+                            "body": json.dumps(call.store.work_item_json(item, call.base_url))})
+        except FakeAzdoError as e:
+            results.append({"code": e.status_code, "headers": {"Content-Type": "application/json; charset=utf-8"},
+                            "body": json.dumps({"count": 1, "value": {"Message": e.message}})})
+    return collection(results)
+
+
+@handles("1a9c53f7-f243-4447-b110-35ef023636e4", "POST")
+def query_by_wiql(call: ApiCall):
+    project = call.project(required=False)
+    team = call.store.get_team(project, call.route.get("team")) if project else None
+    query = (call.body or {}).get("query", "")
+    try:
+        columns, items = call.store.query_work_items(query, project, team, call.int_query("$top"))
+    except WiqlError as e:
+        raise FakeAzdoError(400, f"TF51005: The query references a field or syntax that is not supported: {e}",
+                            "QueryException")
+    return {
+        "queryType": "flat",
+        "queryResultType": "workItem",
+        "asOf": call.store.clock.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "columns": [{"referenceName": name, "name": name.split(".")[-1]} for name in columns],
+        "workItems": [{"id": item["id"], "url": f"{call.base_url}/_apis/wit/workItems/{item['id']}"} for item in items],
+    }
+
+
+@handles("608aac0a-32e1-4493-a863-b9cf4566d257", "GET")
+def get_comments(call: ApiCall):
+    work_item_id = int(call.route["workItemId"])
+    call.store.get_work_item(work_item_id)
+    comments = call.store.comments.get(work_item_id, [])
+    if call.query.get("order", "").lower() != "asc":
+        comments = list(reversed(comments))
+    top = call.int_query("$top")
+    page = comments[:top] if top else comments
+    return {"totalCount": len(comments), "count": len(page),
+            "comments": [call.store.comment_json(comment, call.base_url) for comment in page]}
+
+
+@handles("608aac0a-32e1-4493-a863-b9cf4566d257", "POST")
+def add_comment(call: ApiCall):
+    comment = call.store.add_comment(int(call.route["workItemId"]), (call.body or {}).get("text", ""))
+    return call.store.comment_json(comment, call.base_url)
+
+
+@handles("a67d190c-c41f-424b-814d-0e906f659301", "GET")
+def get_query(call: ApiCall):
+    project = call.project()
+    wanted = (call.route.get("query") or "").lower()
+    for query in call.store.queries:
+        if query["project"].lower() == project["name"].lower() and wanted in (query["id"], query["path"].lower()):
+            return {"id": query["id"], "name": query["name"], "path": query["path"], "queryType": "flat",
+                    "wiql": query["wiql"], "isFolder": False, "isPublic": True,
+                    "url": f"{call.base_url}/{project['id']}/_apis/wit/queries/{query['id']}"}
+    raise FakeAzdoError(404, f"TF401243: The query {call.route.get('query')} does not exist, or you do not have permission to read it.",
+                        "QueryItemNotFoundException")
+
+
+@handles("7c8d7a76-4a09-43e8-b5df-bd792f4ac6aa", "GET")
+def get_work_item_types(call: ApiCall):
+    call.project()
+
+    def render(wit):
+        return {
+            "name": wit["name"],
+            "referenceName": "Microsoft.VSTS.WorkItemTypes." + wit["name"].replace(" ", ""),
+            "description": wit.get("description", ""),
+            "color": wit.get("color"),
+            "icon": {"id": "icon_" + wit["name"].lower().replace(" ", "_"), "url": f"{call.base_url}/_apis/wit/workItemIcons"},
+            "isDisabled": False,
+            "states": [{"name": state, "color": "b2b2b2", "category": "InProgress"} for state in wit["states"]],
+            "fields": [{"name": name.split(".")[-1], "referenceName": name, "helpText": None, "alwaysRequired": name == "System.Title"}
+                       for name in ("System.Title", "System.State", "System.AssignedTo", "System.Description",
+                                    "System.Tags", "Microsoft.VSTS.Common.Priority")],
+        }
+
+    if call.route.get("type"):
+        wit = call.store.work_item_types.get(call.route["type"].lower())
+        if wit is None:
+            raise FakeAzdoError(404, f"TF401326: Invalid work item type '{call.route['type']}'.", "WorkItemTypeNotFoundException")
+        return render(wit)
+    return collection([render(wit) for wit in call.store.work_item_types.values()])
+
+
+# ---- Work ----
+
+def _iteration_json(call: ApiCall, project, iteration):
+    return {
+        "id": iteration["id"],
+        "name": iteration["name"],
+        "path": iteration["path"],
+        "attributes": {"startDate": iteration["startDate"], "finishDate": iteration["finishDate"],
+                       "timeFrame": call.store.iteration_timeframe(iteration)},
+        "url": f"{call.base_url}/{project['id']}/_apis/work/teamsettings/iterations/{iteration['id']}",
+    }
+
+
+@handles("c9175577-28a1-4b06-9197-8636af9f64ad", "GET")
+def get_team_iterations(call: ApiCall):
+    project, team = call.project(), call.team()
+    iterations = call.store.team_iterations(project, team)
+    if call.route.get("id"):
+        for iteration in iterations:
+            if iteration["id"] == call.route["id"]:
+                return _iteration_json(call, project, iteration)
+        raise FakeAzdoError(404, f"The iteration {call.route['id']} is not part of the team's iterations.", "IterationNotFoundException")
+    timeframe = (call.query.get("$timeframe") or "").lower()
+    if timeframe:
+        iterations = [it for it in iterations if call.store.iteration_timeframe(it) == timeframe]
+    return collection([_iteration_json(call, project, iteration) for iteration in iterations])
+
+
+@handles("c9175577-28a1-4b06-9197-8636af9f64ad", "POST")
+def post_team_iteration(call: ApiCall):
+    project, team = call.project(), call.team()
+    iteration = call.store.find_iteration(project, str((call.body or {}).get("id") or ""))
+    if iteration is None:
+        raise FakeAzdoError(404, f"VS403289: The iteration {(call.body or {}).get('id')} does not exist.", "IterationNotFoundException")
+    if iteration["id"] not in team.setdefault("iterations", []):
+        team["iterations"].append(iteration["id"])
+    return _iteration_json(call, project, iteration)
+
+
+@handles("74412d15-8c1a-4352-a48d-ef1ed5587d57", "GET")
+def get_capacities(call: ApiCall):
+    project, team = call.project(), call.team()
+    iteration_id = call.route.get("iterationId")
+    if iteration_id not in project["iterationsById"]:
+        raise FakeAzdoError(404, f"VS403289: The iteration {iteration_id} does not exist.", "IterationNotFoundException")
+    rows = team.get("capacities", {}).get(iteration_id, [])
+    members, total_per_day, total_days_off = [], 0.0, 0
+    for row in rows:
+        days_off = row.get("daysOff", [])
+        for span in days_off:
+            start, end = date.fromisoformat(span["start"][:10]), date.fromisoformat(span["end"][:10])
+            total_days_off += (end - start).days + 1
+        total_per_day += sum(activity.get("capacityPerDay", 0) for activity in row.get("activities", []))
+        members.append({"teamMember": call.store.identity_ref(row["teamMemberId"], call.base_url),
+                        "activities": row.get("activities", []), "daysOff": days_off})
+    return {"teamMembers": members, "totalCapacityPerDay": total_per_day, "totalDaysOff": total_days_off}
+
+
+@handles("2d4faa2e-9150-4cbf-a47a-932b1b4a0773", "GET")
+def get_team_days_off(call: ApiCall):
+    project, team = call.project(), call.team()
+    iteration_id = call.route.get("iterationId")
+    if iteration_id not in project["iterationsById"]:
+        raise FakeAzdoError(404, f"VS403289: The iteration {iteration_id} does not exist.", "IterationNotFoundException")
+    return {"daysOff": team.get("daysOff", {}).get(iteration_id, [])}
+
+
+@handles("c3c1012b-bea7-49d7-b45e-1664e566f84c", "GET")
+def get_team_settings(call: ApiCall):
+    call.project()
+    team = call.team()
+    return {"workingDays": team.get("workingDays", ["monday", "tuesday", "wednesday", "thursday", "friday"]),
+            "bugsBehavior": "asTasks", "backlogIteration": None, "defaultIteration": None}
+
+
+@handles("a93726f9-7867-4e38-b4f2-0bfafc2f6a94", "GET")
+def get_backlogs(call: ApiCall):
+    call.team()
+    levels = [{"id": level["id"], "name": level["name"], "rank": level["rank"], "type": level["type"],
+               "workItemTypes": [{"name": name} for name in level["workItemTypes"]]} for level in BACKLOG_LEVELS]
+    if call.route.get("id"):
+        for level in levels:
+            if level["id"].lower() == call.route["id"].lower():
+                return level
+        raise FakeAzdoError(404, f"Backlog level {call.route['id']} does not exist.", "BacklogLevelNotFoundException")
+    return collection(levels)
+
+
+@handles("7c468d96-ab1d-4294-a360-92f07e9ccd98", "GET")
+def get_backlog_level_work_items(call: ApiCall):
+    project, _ = call.project(), call.team()
+    level = next((level for level in BACKLOG_LEVELS if level["id"].lower() == (call.route.get("backlogId") or "").lower()), None)
+    if level is None:
+        raise FakeAzdoError(404, f"Backlog level {call.route.get('backlogId')} does not exist.", "BacklogLevelNotFoundException")
+    items = [item for item in sorted(call.store.work_items.values(), key=lambda item: item["id"])
+             if item["project"] == project["name"]
+             and item["fields"]["System.WorkItemType"] in level["workItemTypes"]
+             and item["fields"]["System.State"] not in ("Closed", "Removed")]
+    return {"workItems": [{"source": None, "target": {"id": item["id"], "url": f"{call.base_url}/_apis/wit/workItems/{item['id']}"}}
+                          for item in items]}
+
+
+# ---- Git ----
+
+def _repository(call: ApiCall):
+    return call.store.get_repository(call.project(required=False), call.route["repositoryId"])
+
+
+@handles("225f7195-f9c7-4d14-ab28-a83f7ff77e1f", "GET")
+def get_repositories(call: ApiCall):
+    if call.route.get("repositoryId"):
+        return call.store.repository_json(_repository(call), call.base_url)
+    project = call.project(required=False)
+    return collection([call.store.repository_json(repository, call.base_url) for repository in call.store.repositories
+                       if project is None or repository["project"].lower() == project["name"].lower()])
+
+
+@handles("2d874a60-a811-4f62-9c9f-963a6ea0a55b", "GET")
+def get_refs(call: ApiCall):
+    repository = _repository(call)
+    prefix = "refs/" + (call.query.get("filter") or call.route.get("filter") or "")
+    refs = [call.store.ref_json(repository, ref, call.base_url) for ref in repository["refs"] if ref["name"].startswith(prefix)]
+    if call.query.get("filterContains"):
+        refs = [ref for ref in refs if call.query["filterContains"].lower() in ref["name"].lower()]
+    return collection(refs)
+
+
+@handles("2d874a60-a811-4f62-9c9f-963a6ea0a55b", "POST")
+def update_refs(call: ApiCall):
+    repository = _repository(call)
+    results = []
+    for update in call.body or []:
+        existing = next((ref for ref in repository["refs"] if ref["name"] == update["name"]), None)
+        old_id, new_id = update.get("oldObjectId"), update.get("newObjectId")
+        status = "succeeded"
+        if existing is None and set(old_id or "0") == {"0"}:
+            if not any(commit["commitId"] == new_id for commit in repository["commits"]) \
+                    and not any(ref["objectId"] == new_id for ref in repository["refs"]):
+                status = "invalidObjectId"
+            else:
+                repository["refs"].append({"name": update["name"], "objectId": new_id,
+                                           "creator": call.store.me["id"] if call.store.me else None})
+        elif existing is not None and set(new_id or "0") == {"0"}:
+            repository["refs"].remove(existing)
+        elif existing is not None and existing["objectId"] == old_id:
+            existing["objectId"] = new_id
+        else:
+            status = "staleOldObjectId" if existing else "invalidRefName"
+        results.append({"name": update["name"], "oldObjectId": old_id, "newObjectId": new_id,
+                        "repositoryId": repository["id"], "success": status == "succeeded", "updateStatus": status})
+    return collection(results)
+
+
+@handles("d5b216de-d8d5-4d32-ae76-51df755b16d3", "GET")
+def get_branch(call: ApiCall):
+    repository = _repository(call)
+    name = call.query.get("name") or ""
+    ref = next((ref for ref in repository["refs"] if ref["name"] in (name, f"refs/heads/{name}")), None)
+    if ref is None:
+        raise FakeAzdoError(404, f"TF401175: The version descriptor <Branch: {name} > could not be resolved to a version in the repository {repository['name']}",
+                            "GitUnresolvableToCommitException")
+    commit = next((commit for commit in repository["commits"] if commit["commitId"] == ref["objectId"]), None)
+    return {"name": ref["name"].replace("refs/heads/", ""), "aheadCount": 0, "behindCount": 0, "isBaseVersion": ref["name"] == repository.get("defaultBranch"),
+            "commit": call.store.commit_json(repository, commit, call.base_url) if commit else {"commitId": ref["objectId"]}}
+
+
+@handles("c2570c3b-5b3f-41b8-98bf-5407bfde8d58", "GET")
+def get_commits(call: ApiCall):
+    repository = _repository(call)
+    commits = sorted(repository["commits"], key=lambda commit: commit["date"], reverse=True)
+    if call.route.get("commitId"):
+        commit_id = call.route["commitId"].lower()
+        for commit in commits:
+            if commit["commitId"].startswith(commit_id):
+                return call.store.commit_json(repository, commit, call.base_url)
+        raise FakeAzdoError(404, f"TF401175: The commit {call.route['commitId']} could not be found.", "GitCommitDoesNotExistException")
+
+    author = (call.query.get("searchCriteria.author") or call.query.get("searchCriteria.user") or "").lower()
+    from_date = call.query.get("searchCriteria.fromDate")
+    to_date = call.query.get("searchCriteria.toDate")
+    ids = call.query.get("searchCriteria.ids")
+    result = []
+    for commit in commits:
+        rendered = call.store.commit_json(repository, commit, call.base_url)
+        if author and author not in rendered["author"]["name"].lower() and author not in rendered["author"]["email"].lower():
+            continue
+        if from_date and commit["date"][:len(from_date)] < from_date[:19]:
+            continue
+        if to_date and commit["date"][:len(to_date)] > to_date[:19]:
+            continue
+        if ids and commit["commitId"] not in ids.split(","):
+            continue
+        result.append(rendered)
+    skip = call.int_query("searchCriteria.$skip", call.int_query("$skip", 0))
+    top = call.int_query("searchCriteria.$top", call.int_query("$top", 100))
+    return collection(result[skip:skip + top])
+
+
+def _filter_pull_requests(call: ApiCall, pull_requests):
+    status = (call.query.get("searchCriteria.status") or "active").lower()
+    creator = call.query.get("searchCriteria.creatorId")
+    reviewer = call.query.get("searchCriteria.reviewerId")
+    target = call.query.get("searchCriteria.targetRefName")
+    source = call.query.get("searchCriteria.sourceRefName")
+    result = []
+    for pull_request in pull_requests:
+        if status != "all" and pull_request["status"].lower() != status:
+            continue
+        if creator and pull_request["createdBy"] != creator:
+            continue
+        if reviewer and reviewer not in [r["id"] for r in pull_request.get("reviewers", [])]:
+            continue
+        if target and pull_request["targetRefName"] != target:
+            continue
+        if source and pull_request["sourceRefName"] != source:
+            continue
+        result.append(call.store.pull_request_json(pull_request, call.base_url))
+    skip, top = call.int_query("$skip", 0), call.int_query("$top", 101)
+    return collection(result[skip:skip + top])
+
+
+@handles("9946fd70-0d40-406e-b686-b4744cbbcc37", "GET")
+def get_pull_requests(call: ApiCall):
+    repository = _repository(call)
+    if call.route.get("pullRequestId"):
+        pull_request = call.store.get_pull_request(int(call.route["pullRequestId"]), repository=repository)
+        return call.store.pull_request_json(pull_request, call.base_url)
+    return _filter_pull_requests(call, [pr for pr in call.store.pull_requests if pr["repository"] == repository["name"]])
+
+
+@handles("a5d28130-9cd2-40fa-9f08-902e7daa9efb", "GET")
+def get_pull_requests_by_project(call: ApiCall):
+    project = call.project()
+    return _filter_pull_requests(call, [pr for pr in call.store.pull_requests if pr["project"].lower() == project["name"].lower()])
+
+
+@handles("01a46dea-7d46-4d40-bc84-319e7c260d99", "GET")
+def get_pull_request_by_id(call: ApiCall):
+    if not (call.route.get("pullRequestId") or "").isdigit():
+        raise FakeAzdoError(400, f"The pull request id '{call.route.get('pullRequestId')}' is not valid.")
+    pull_request = call.store.get_pull_request(int(call.route["pullRequestId"]), project=call.project())
+    return call.store.pull_request_json(pull_request, call.base_url)
+
+
+@handles("9946fd70-0d40-406e-b686-b4744cbbcc37", "POST")
+def create_pull_request(call: ApiCall):
+    repository = _repository(call)
+    body = call.body or {}
+    ref_names = {ref["name"] for ref in repository["refs"]}
+    for key in ("sourceRefName", "targetRefName"):
+        if body.get(key) not in ref_names:
+            raise FakeAzdoError(400, f"TF401398: The pull request cannot be activated because the source and/or the target branch "
+                                     f"no longer exists, or the requested refs are not branches: {body.get(key)}",
+                                "GitPullRequestCannotBeActivated")
+    pull_request = {
+        "pullRequestId": max((pr["pullRequestId"] for pr in call.store.pull_requests), default=0) + 1,
+        "repository": repository["name"],
+        "project": repository["project"],
+        "title": body.get("title") or "",
+        "description": body.get("description") or "",
+        "status": "active",
+        "createdBy": call.store.me["id"] if call.store.me else None,
+        "creationDate": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sourceRefName": body["sourceRefName"],
+        "targetRefName": body["targetRefName"],
+        "isDraft": bool(body.get("isDraft")),
+        "reviewers": [{"id": (call.store.find_identity(r.get("id")) or {}).get("id", r.get("id")), "vote": 0}
+                      for r in body.get("reviewers") or []],
+        "threads": [],
+    }
+    call.store.pull_requests.append(pull_request)
+    return call.store.pull_request_json(pull_request, call.base_url)
+
+
+@handles("9946fd70-0d40-406e-b686-b4744cbbcc37", "PATCH")
+def update_pull_request(call: ApiCall):
+    pull_request = call.store.get_pull_request(int(call.route["pullRequestId"]), repository=_repository(call))
+    for key in ("title", "description", "isDraft", "targetRefName", "status"):
+        if (call.body or {}).get(key) is not None:
+            pull_request[key] = call.body[key]
+    return call.store.pull_request_json(pull_request, call.base_url)
+
+
+@handles("4b6702c7-aa35-4b89-9c96-b9abf6d3e540", "PUT")
+def create_pull_request_reviewer(call: ApiCall):
+    pull_request = call.store.get_pull_request(int(call.route["pullRequestId"]), repository=_repository(call))
+    identity = call.store.find_identity(call.route["reviewerId"])
+    if identity is None:
+        raise FakeAzdoError(400, f"The identity {call.route['reviewerId']} could not be found.", "IdentityNotFoundException")
+    reviewer = next((r for r in pull_request["reviewers"] if r["id"] == identity["id"]), None)
+    if reviewer is None:
+        reviewer = {"id": identity["id"], "vote": 0}
+        pull_request["reviewers"].append(reviewer)
+    reviewer["vote"] = (call.body or {}).get("vote") or reviewer["vote"]
+    return {**call.store.identity_ref(identity["id"], call.base_url), "vote": reviewer["vote"]}
+
+
+@handles("4b6702c7-aa35-4b89-9c96-b9abf6d3e540", "DELETE")
+def delete_pull_request_reviewer(call: ApiCall):
+    pull_request = call.store.get_pull_request(int(call.route["pullRequestId"]), repository=_repository(call))
+    identity = call.store.find_identity(call.route["reviewerId"]) or {"id": call.route["reviewerId"]}
+    pull_request["reviewers"] = [r for r in pull_request["reviewers"] if r["id"] != identity["id"]]
+    return None
+
+
+def _thread(call: ApiCall):
+    pull_request = call.store.get_pull_request(int(call.route["pullRequestId"]), repository=_repository(call))
+    if not call.route.get("threadId"):
+        return pull_request, None
+    for thread in pull_request.get("threads", []):
+        if thread["id"] == int(call.route["threadId"]):
+            return pull_request, thread
+    raise FakeAzdoError(404, f"The thread {call.route['threadId']} does not exist.", "CommentThreadNotFoundException")
+
+
+@handles("ab6e2e5d-a0b7-4153-b64a-a4efe0d49449", "GET")
+def get_threads(call: ApiCall):
+    pull_request, thread = _thread(call)
+    if thread is not None:
+        return call.store.thread_json(thread, call.base_url)
+    return collection([call.store.thread_json(thread, call.base_url) for thread in pull_request.get("threads", [])])
+
+
+@handles("ab6e2e5d-a0b7-4153-b64a-a4efe0d49449", "POST")
+def create_thread(call: ApiCall):
+    pull_request, _ = _thread(call)
+    body = call.body or {}
+    threads = pull_request.setdefault("threads", [])
+    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    me = call.store.me["id"] if call.store.me else None
+    thread = {
+        "id": max((t["id"] for t in threads), default=0) + 1,
+        "status": call.store.thread_status(body.get("status")),
+        "publishedDate": now,
+        "threadContext": body.get("threadContext"),
+        "comments": [{"id": index, "content": comment.get("content", ""), "author": me, "publishedDate": now}
+                     for index, comment in enumerate(body.get("comments") or [], 1)],
+    }
+    threads.append(thread)
+    return call.store.thread_json(thread, call.base_url)
+
+
+@handles("ab6e2e5d-a0b7-4153-b64a-a4efe0d49449", "PATCH")
+def update_thread(call: ApiCall):
+    _, thread = _thread(call)
+    if (call.body or {}).get("status") is not None:
+        thread["status"] = call.store.thread_status(call.body["status"])
+    return call.store.thread_json(thread, call.base_url)
+
+
+@handles("965a3ec7-5ed8-455a-bdcb-835a5ea7fe7b", "GET")
+def get_thread_comments(call: ApiCall):
+    _, thread = _thread(call)
+    return collection([call.store.thread_comment_json(comment, call.base_url) for comment in thread.get("comments", [])])
+
+
+@handles("965a3ec7-5ed8-455a-bdcb-835a5ea7fe7b", "POST")
+def create_thread_comment(call: ApiCall):
+    _, thread = _thread(call)
+    body = call.body or {}
+    comment = {"id": max((c["id"] for c in thread["comments"]), default=0) + 1, "content": body.get("content", ""),
+               "parentCommentId": body.get("parentCommentId", 0), "author": call.store.me["id"] if call.store.me else None,
+               "publishedDate": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    thread["comments"].append(comment)
+    return call.store.thread_comment_json(comment, call.base_url)
+
+
+# ---- Build ----
+
+@handles("dbeaf647-6167-421a-bda9-c9327b25e2e6", "GET")
+def get_definitions(call: ApiCall):
+    project = call.project()
+    if call.route.get("definitionId"):
+        return call.store.definition_json(call.store.get_definition(project, int(call.route["definitionId"])), call.base_url)
+    name = call.query.get("name")
+    pattern = re.compile("^" + re.escape(name).replace(r"\*", ".*") + "$", re.IGNORECASE) if name else None
+    definitions = [call.store.definition_json(definition, call.base_url) for definition in call.store.definitions
+                   if definition["project"].lower() == project["name"].lower() and (pattern is None or pattern.match(definition["name"]))]
+    top = call.int_query("$top")
+    return collection(definitions[:top] if top else definitions)
+
+
+@handles("7c116775-52e5-453e-8c5d-914d9762d8c4", "GET")
+def get_definition_revisions(call: ApiCall):
+    definition = call.store.get_definition(call.project(), int(call.route["definitionId"]))
+    return collection([{**revision, "changedBy": call.store.identity_ref(revision.get("changedBy"), call.base_url),
+                        "definitionUrl": call.store.definition_json(definition, call.base_url)["url"]}
+                       for revision in definition.get("revisions", [])])
+
+
+@handles("0cd358e1-9217-4d94-8269-1c1ee6f93dcf", "GET")
+def get_builds(call: ApiCall):
+    project = call.project()
+    if call.route.get("buildId"):
+        return call.store.build_json(call.store.get_build(project, int(call.route["buildId"])), call.base_url)
+    definitions = {int(value) for value in (call.query.get("definitions") or "").split(",") if value}
+    status = (call.query.get("statusFilter") or "").lower()
+    result = (call.query.get("resultFilter") or "").lower()
+    branch = call.query.get("branchName")
+    builds = [build for build in call.store.builds if build["project"].lower() == project["name"].lower()
+              and (not definitions or build["definitionId"] in definitions)
+              and (not status or status == "all" or build["status"].lower() == status)
+              and (not result or (build.get("result") or "").lower() == result)
+              and (not branch or build.get("sourceBranch") == branch)]
+    builds.sort(key=lambda build: build.get("queueTime") or "", reverse=(call.query.get("queryOrder") or "").lower() != "queuetimeascending")
+    top = call.int_query("$top")
+    return collection([call.store.build_json(build, call.base_url) for build in (builds[:top] if top else builds)])
+
+
+@handles("35a80daf-7f30-45fc-86e8-6b813d9c90df", "GET")
+def get_build_logs(call: ApiCall):
+    build = call.store.get_build(call.project(), int(call.route["buildId"]))
+    logs = build.get("logs", [])
+    if call.route.get("logId"):
+        log_id = int(call.route["logId"])
+        if not 1 <= log_id <= len(logs):
+            raise FakeAzdoError(404, f"The log {log_id} of build {build['id']} could not be found.", "BuildLogNotFoundException")
+        lines = logs[log_id - 1]
+        start, end = call.int_query("startLine", 1), call.int_query("endLine", len(lines))
+        return collection(lines[max(start, 1) - 1:end])
+    return collection([{"id": index, "type": "Container", "lineCount": len(lines), "createdOn": build.get("startTime"),
+                        "url": f"{call.base_url}/_apis/build/builds/{build['id']}/logs/{index}"}
+                       for index, lines in enumerate(logs, 1)])
+
+
+@handles("54572c7b-bbd3-45d4-80dc-28be08941620", "GET")
+def get_build_changes(call: ApiCall):
+    build = call.store.get_build(call.project(), int(call.route["buildId"]))
+    changes = [{"id": f"{build['sourceVersion'][:30]}{index:010d}", "message": change["message"], "type": "TfsGit",
+                "author": call.store.identity_ref(change.get("author"), call.base_url), "timestamp": build.get("queueTime"),
+                "location": f"{call.base_url}/_apis/git/commits/{build['sourceVersion']}"}
+               for index, change in enumerate(build.get("changes", []))]
+    top = call.int_query("$top")
+    return collection(changes[:top] if top else changes)
+
+
+@handles("8baac422-4c6e-4de5-8532-db96d92acffa", "GET")
+def get_build_timeline(call: ApiCall):
+    return call.store.timeline_json(call.store.get_build(call.project(), int(call.route["buildId"])))
+
+
+# ---- App ----
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token; returns 0 if one was available, else the seconds until one will be"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def _error_response(status_code: int, message: str, type_key: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(status_code=status_code, headers=headers, content={
+        "$id": "1", "innerException": None, "message": message,
+        "typeName": f"Microsoft.VisualStudio.Services.WebApi.{type_key}, Microsoft.VisualStudio.Services.WebApi",
+        "typeKey": type_key, "errorCode": 0, "eventId": 3000,
+    })
+
+
+def create_app(store: Optional[FakeAzdoStore] = None, faults: Optional[FaultConfig] = None) -> FastAPI:
+    """
+    Build the fake server app. Besides the API under /<organization>/, it serves:
+      GET  /_fake/stats   request counts per route, throttled requests and injected delay
+      POST /_fake/config  update FaultConfig fields, e.g. {"latency_ms": 200, "rate_limit": 5}
+      POST /_fake/reset   reload the fixture and clear the stats
+    """
+    app = FastAPI(title="Fake Azure DevOps")
+    app.state.store = store or FakeAzdoStore(fixture_path)
+    app.state.faults = faults or FaultConfig()
+    state = {"rng": random.Random(app.state.faults.seed), "bucket": None, "stats": Counter(), "delay": 0.0}
+
+    def reset_faults():
+        faults = app.state.faults
+        state["rng"] = random.Random(faults.seed)
+        state["bucket"] = _TokenBucket(faults.rate_limit, faults.rate_limit_burst) if faults.rate_limit > 0 else None
+
+    reset_faults()
+
+    @app.get("/_fake/stats")
+    def fake_stats():
+        stats = state["stats"]
+        return {"requests": sum(count for key, count in stats.items() if not key.startswith("!")),
+                "throttled": stats["!throttled"], "injected_delay_seconds": round(state["delay"], 3),
+                "by_route": {key: count for key, count in sorted(stats.items()) if not key.startswith("!")}}
+
+    @app.post("/_fake/config")
+    async def fake_config(request: Request):
+        updates = await request.json()
+        for key, value in updates.items():
+            if not hasattr(app.state.faults, key):
+                return JSONResponse(status_code=400, content={"message": f"Unknown fault setting '{key}'"})
+            setattr(app.state.faults, key, value)
+        reset_faults()
+        return asdict(app.state.faults)
+
+    @app.post("/_fake/reset")
+    def fake_reset():
+        app.state.store.reset()
+        state["stats"].clear()
+        state["delay"] = 0.0
+        reset_faults()
+        return {"status": "reset"}
+
+    @app.api_route("/{organization}/{path:path}", methods=["GET", "POST", "PATCH", "PUT", "DELETE", "OPTIONS"])
+    async def api(organization: str, path: str, request: Request):
+        store: FakeAzdoStore = app.state.store
+        faults: FaultConfig = app.state.faults
+        if organization.lower() != store.organization.lower():
+            return _error_response(404, f"VS800075: The organization '{organization}' does not exist.", "AccountNotFoundException")
+
+        base_url = f"{request.url.scheme}://{request.url.netloc}/{organization}"
+        raw_path = request.scope.get("raw_path", b"").decode("latin-1").split("?", 1)[0]
+        relative = "/" + raw_path.split("/", 2)[2] if raw_path.count("/") >= 2 else "/"
+
+        if request.method == "OPTIONS" and relative.rstrip("/").lower() == "/_apis":
+            state["stats"]["OPTIONS _apis"] += 1
+            return JSONResponse(collection([
+                {"id": location.id, "area": location.area, "resourceName": location.resource, "routeTemplate": location.template,
+                 "resourceVersion": 3, "minVersion": 1.0, "maxVersion": 7.1, "releasedVersion": "7.0"}
+                for location in LOCATIONS]))
+
+        for location in LOCATIONS:
+            match = location.pattern.match(relative)
+            if match and request.method in location.handlers:
+                break
+        else:
+            return _error_response(404, f"The fake server does not implement {request.method} {relative}", "ApiResourceNotFoundException")
+
+        route_key = f"{location.area}.{location.resource}"
+        state["stats"][f"{request.method} {route_key}"] += 1
+
+        bucket = state["bucket"]
+        if bucket is not None:
+            wait = bucket.take()
+            if wait and faults.rate_limit_mode == "reject":
+                state["stats"]["!throttled"] += 1
+                retry_after = max(1, int(wait + 0.999))
+                return _error_response(429, "TF400733: The request has been canceled: Request was blocked due to exceeding usage of resource "
+                                            "'Concurrency' in namespace 'User'.", "RequestBlockedException",
+                                       headers={"Retry-After": str(retry_after), "X-RateLimit-Resource": "Core",
+                                                "X-RateLimit-Delay": f"{wait:.3f}"})
+            if wait:
+                state["stats"]["!throttled"] += 1
+                bucket.tokens -= 1
+                state["delay"] += wait
+                await asyncio.sleep(wait)
+
+        latency = faults.route_latency_ms.get(route_key, faults.latency_ms)
+        if faults.jitter_ms:
+            latency += state["rng"].uniform(0, faults.jitter_ms)
+        if latency > 0:
+            state["delay"] += latency / 1000
+            await asyncio.sleep(latency / 1000)
+
+        body = None
+        if request.method in ("POST", "PATCH", "PUT"):
+            raw_body = await request.body()
+            if raw_body:
+                try:
+                    body = await request.json()
+                except ValueError:
+                    return _error_response(400, "The request body is not valid JSON.", "InvalidRequestContentException")
+
+        route = {key: unquote(value) if value is not None else None for key, value in match.groupdict().items()}
+        query = dict(parse_qsl(request.url.query, keep_blank_values=True))
+        try:
+            result = location.handlers[request.method](ApiCall(store, base_url, route, query, body))
+        except FakeAzdoError as e:
+            return _error_response(e.status_code, e.message, e.type_key)
+        if result is None:
+            return Response(status_code=204)
+        return JSONResponse(result)
+
+    return app
+
+
+class FakeAzureDevOpsServer:
+    """
+    Runs the fake server on a background thread, e.g. for benchmarks:
+
+        with FakeAzureDevOpsServer(faults=FaultConfig(latency_ms=100)) as server:
+            os.environ["AZURE_ORG_URL"] = server.url
+    """
+
+    def __init__(self, fixture: str = fixture_path, host: str = "127.0.0.1", port: int = 0,
+                 faults: Optional[FaultConfig] = None, today=None):
+        import uvicorn
+
+        self.store = FakeAzdoStore(fixture, today=today)
+        self.app = create_app(self.store, faults)
+        self.host = host
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning", lifespan="off"))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.servers[0].sockets[0].getsockname()[1]
+
+    @property
+    def url(self) -> str:
+        """Organization URL to use as AZURE_ORG_URL"""
+        return f"http://{self.host}:{self.port}/{self.store.organization}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.run, name="fake-azdo", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Fake Azure DevOps server failed to start")
+            time.sleep(0.01)
+        return self.url
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline Azure DevOps stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixture", default=fixture_path)
+    parser.add_argument("--latency-ms", type=float, default=fake_latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=fake_jitter_ms)
+    parser.add_argument("--rate-limit", type=float, default=fake_rate_limit, help="requests per second, 0 for unlimited")
+    parser.add_argument("--rate-limit-mode", choices=["reject", "delay"], default=fake_rate_limit_mode)
+    parser.add_argument("--seed", type=int, default=fake_seed)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    faults = FaultConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit=args.rate_limit,
+                         rate_limit_mode=args.rate_limit_mode, seed=args.seed)
+    app = create_app(FakeAzdoStore(args.fixture), faults)
+    print(f"Fake Azure DevOps organization: http://{args.host}:{args.port}/{app.state.store.organization}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
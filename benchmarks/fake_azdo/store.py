@@ -0,0 +1,602 @@
+import re
+import copy
+import json
+import uuid
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_azdo.wiql import WiqlContext, WiqlEvaluator
+
+# Fixture strings like "@today", "@today-7" or "@today+3T09:30:00Z" are resolved
+# against the server clock when the fixture is loaded
+_RELATIVE_DATE = re.compile(r"^@today(?P<offset>[+-]\d+)?(?P<time>T\d{2}:\d{2}:\d{2}Z)?$")
+_WORK_ITEM_URL = re.compile(r"/workItems/(\d+)$", re.IGNORECASE)
+
+HIERARCHY_FORWARD = "System.LinkTypes.Hierarchy-Forward"
+HIERARCHY_REVERSE = "System.LinkTypes.Hierarchy-Reverse"
+
+BACKLOG_LEVELS = [
+    {"id": "Microsoft.EpicCategory", "name": "Epics", "rank": 4, "type": "portfolio", "workItemTypes": ["Epic"]},
+    {"id": "Microsoft.FeatureCategory", "name": "Features", "rank": 3, "type": "portfolio", "workItemTypes": ["Feature"]},
+    {"id": "Microsoft.RequirementCategory", "name": "Stories", "rank": 2, "type": "requirement", "workItemTypes": ["User Story", "Bug"]},
+    {"id": "Microsoft.TaskCategory", "name": "Tasks", "rank": 1, "type": "task", "workItemTypes": ["Task"]},
+]
+
+IDENTITY_FIELDS = ("System.AssignedTo", "System.CreatedBy", "System.ChangedBy")
+THREAD_STATUSES = ["unknown", "active", "fixed", "wontFix", "closed", "byDesign", "pending"]
+
+
+class FakeAzdoError(Exception):
+    """Raised by store operations; rendered as an Azure DevOps error response"""
+
+    def __init__(self, status_code: int, message: str, type_key: str = "InvalidArgumentValueException"):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.type_key = type_key
+
+
+def _resolve_relative_dates(value: Any, today: datetime) -> Any:
+    if isinstance(value, dict):
+        return {key: _resolve_relative_dates(item, today) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve_relative_dates(item, today) for item in value]
+    if isinstance(value, str) and value.startswith("@today"):
+        match = _RELATIVE_DATE.match(value)
+        if match:
+            day = today + timedelta(days=int(match.group("offset") or 0))
+            return day.strftime("%Y-%m-%d") + (match.group("time") or "T00:00:00Z")
+    return value
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class FakeAzdoStore:
+    """
+    In-memory Azure DevOps organization seeded from a fixture file.
+
+    Holds projects, teams, iterations, capacities, work items, comments, repositories,
+    pull requests and builds, and renders them in the REST API's JSON shapes.
+    Mutations (work item updates, new PRs, branches, comments) live until reset().
+    """
+
+    def __init__(self, fixture_path: str, today: Optional[datetime] = None):
+        self.fixture_path = fixture_path
+        self.today = today
+        self.reset()
+
+    def reset(self):
+        with open(self.fixture_path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        today = self.today or datetime.now(timezone.utc)
+        if today.tzinfo is None:
+            today = today.replace(tzinfo=timezone.utc)
+        self.clock = today.replace(hour=12, minute=0, second=0, microsecond=0)
+        fixture = _resolve_relative_dates(raw, self.clock)
+
+        self.organization = fixture.get("organization", "fakeorg")
+        self.identities = {identity["id"]: identity for identity in fixture.get("identities", [])}
+        self.me = self.identities.get(fixture.get("authenticatedUser")) or next(iter(self.identities.values()), None)
+
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        for project in fixture.get("projects", []):
+            self.projects[project["name"].lower()] = project
+            project["iterationsById"] = {it["id"]: it for it in project.get("iterations", [])}
+
+        self.work_item_types = {wit["name"].lower(): wit for wit in fixture.get("workItemTypes", [])}
+        self.queries = fixture.get("queries", [])
+
+        self.work_items: Dict[int, Dict[str, Any]] = {}
+        for seed in fixture.get("workItems", []):
+            self._seed_work_item(seed)
+        for item in list(self.work_items.values()):
+            parent_id = item.pop("_parent", None)
+            if parent_id:
+                self._add_hierarchy(parent_id, item["id"])
+        self.next_work_item_id = max(self.work_items, default=0) + 1
+
+        self.comments: Dict[int, List[Dict[str, Any]]] = {}
+        for comment in fixture.get("comments", []):
+            entries = self.comments.setdefault(comment["workItemId"], [])
+            entries.append({**comment, "id": len(entries) + 1})
+        self.next_comment_id = sum(len(entries) for entries in self.comments.values()) + 1
+
+        self.repositories = fixture.get("repositories", [])
+        self.pull_requests = fixture.get("pullRequests", [])
+        self.definitions = fixture.get("buildDefinitions", [])
+        self.builds = fixture.get("builds", [])
+
+    # ---- Identities ----
+
+    def find_identity(self, value: Any) -> Optional[Dict[str, Any]]:
+        """Look up an identity by id, unique name, display name or 'Display Name <email>'"""
+        if isinstance(value, dict):
+            value = value.get("id") or value.get("uniqueName") or value.get("displayName")
+        if not value:
+            return None
+        text = str(value).strip()
+        match = re.match(r"^(.*)<([^>]+)>$", text)
+        if match:
+            text = match.group(2).strip()
+        if text in self.identities:
+            return self.identities[text]
+        lowered = text.lower()
+        for identity in self.identities.values():
+            if lowered in (identity["uniqueName"].lower(), identity["displayName"].lower()):
+                return identity
+        return None
+
+    def identity_ref(self, value: Any, base_url: str = "") -> Optional[Dict[str, Any]]:
+        if value is None:
+            return None
+        identity = self.find_identity(value)
+        if identity is None:
+            name = value.get("displayName") if isinstance(value, dict) else str(value)
+            return {"displayName": name, "uniqueName": name, "id": str(uuid.uuid5(uuid.NAMESPACE_URL, name))}
+        return {
+            "id": identity["id"],
+            "displayName": identity["displayName"],
+            "uniqueName": identity["uniqueName"],
+            "url": f"{base_url}/_apis/Identities/{identity['id']}",
+            "imageUrl": f"{base_url}/_apis/GraphProfile/MemberAvatars/{identity['id']}",
+            "descriptor": f"aad.{identity['id']}",
+        }
+
+    # ---- Projects, teams and iterations ----
+
+    def get_project(self, name_or_id: Optional[str], required: bool = True) -> Optional[Dict[str, Any]]:
+        if name_or_id:
+            project = self.projects.get(name_or_id.lower())
+            if project is None:
+                project = next((p for p in self.projects.values() if p["id"] == name_or_id), None)
+            if project is not None:
+                return project
+        if required:
+            raise FakeAzdoError(404, f"TF200016: The following project does not exist: {name_or_id}.",
+                                "ProjectDoesNotExistWithNameException")
+        return None
+
+    def get_team(self, project: Dict[str, Any], name_or_id: Optional[str]) -> Dict[str, Any]:
+        teams = project.get("teams", [])
+        if not name_or_id:
+            return teams[0]
+        for team in teams:
+            if name_or_id.lower() in (team["name"].lower(), team["id"]):
+                return team
+        raise FakeAzdoError(404, f"The team with id {name_or_id} does not exist.", "TeamNotFoundException")
+
+    def iteration_timeframe(self, iteration: Dict[str, Any]) -> str:
+        start = datetime.fromisoformat(iteration["startDate"].replace("Z", "+00:00"))
+        finish = datetime.fromisoformat(iteration["finishDate"].replace("Z", "+00:00")) + timedelta(days=1)
+        if self.clock < start:
+            return "future"
+        if self.clock >= finish:
+            return "past"
+        return "current"
+
+    def team_iterations(self, project: Dict[str, Any], team: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [project["iterationsById"][iteration_id] for iteration_id in team.get("iterations", [])
+                if iteration_id in project["iterationsById"]]
+
+    def current_iteration_path(self, project: Optional[Dict[str, Any]], team: Optional[Dict[str, Any]]) -> Optional[str]:
+        if project is None:
+            return None
+        team = team or (project.get("teams") or [None])[0]
+        iterations = self.team_iterations(project, team) if team else project.get("iterations", [])
+        for iteration in iterations:
+            if self.iteration_timeframe(iteration) == "current":
+                return iteration["path"]
+        return None
+
+    def find_iteration(self, project: Dict[str, Any], value: str) -> Optional[Dict[str, Any]]:
+        lowered = value.lower().strip("\\")
+        for iteration in project.get("iterations", []):
+            if lowered in (iteration["id"], iteration["name"].lower(), iteration["path"].lower()):
+                return iteration
+        return None
+
+    # ---- Work items ----
+
+    def _seed_work_item(self, seed: Dict[str, Any]):
+        project = self.get_project(seed["project"])
+        fields = {
+            "System.TeamProject": project["name"],
+            "System.AreaPath": project["name"],
+            "System.IterationPath": project["name"],
+            "System.WorkItemType": seed["type"],
+            "System.State": "New",
+            "System.Reason": "New",
+            "System.CreatedDate": (self.clock - timedelta(days=40)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "System.ChangedDate": (self.clock - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "System.CreatedBy": self.me["id"] if self.me else None,
+            **seed.get("fields", {}),
+        }
+        for name in IDENTITY_FIELDS:
+            if fields.get(name):
+                fields[name] = self.identity_ref(fields[name])
+        self.work_items[seed["id"]] = {
+            "id": seed["id"],
+            "rev": 1,
+            "project": project["name"],
+            "fields": fields,
+            "relations": [],
+            "_parent": seed.get("parent"),
+        }
+
+    def _add_relation(self, item: Dict[str, Any], rel: str, target_id: int, attributes: Optional[Dict[str, Any]] = None):
+        item["relations"].append({"rel": rel, "url": f"workItems/{target_id}", "attributes": attributes or {}})
+
+    def _add_hierarchy(self, parent_id: int, child_id: int):
+        parent = self.work_items.get(parent_id)
+        child = self.work_items[child_id]
+        if parent is None:
+            raise FakeAzdoError(400, f"TF201036: You cannot add a Parent link to work item {parent_id} because it does not exist.")
+        self._add_relation(child, HIERARCHY_REVERSE, parent_id)
+        self._add_relation(parent, HIERARCHY_FORWARD, child_id)
+        child["fields"]["System.Parent"] = parent_id
+
+    def get_work_item(self, work_item_id: int) -> Dict[str, Any]:
+        item = self.work_items.get(int(work_item_id))
+        if item is None:
+            raise FakeAzdoError(404, f"TF401232: Work item {work_item_id} does not exist, or you do not have permissions to read it.",
+                                "WorkItemUnauthorizedAccessException")
+        return item
+
+    def work_item_json(self, item: Dict[str, Any], base_url: str, expand: Optional[str] = None,
+                       fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        project = self.get_project(item["project"])
+        item_fields = {"System.Id": item["id"], "System.Rev": item["rev"], **item["fields"]}
+        for name in IDENTITY_FIELDS:
+            if item_fields.get(name):
+                item_fields[name] = self.identity_ref(item_fields[name], base_url)
+        if fields:
+            wanted = {name.lower() for name in fields}
+            item_fields = {key: value for key, value in item_fields.items() if key.lower() in wanted}
+        result = {
+            "id": item["id"],
+            "rev": item["rev"],
+            "fields": copy.deepcopy(item_fields),
+            "url": f"{base_url}/{project['id']}/_apis/wit/workItems/{item['id']}",
+        }
+        if expand and expand.lower() in ("relations", "all"):
+            result["relations"] = [self._relation_json(relation, base_url) for relation in item["relations"]]
+        return result
+
+    def _relation_json(self, relation: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        url = relation["url"]
+        if url.startswith("workItems/"):
+            url = f"{base_url}/_apis/wit/{url}"
+        return {"rel": relation["rel"], "url": url, "attributes": relation.get("attributes") or {}}
+
+    def _apply_patch(self, item: Dict[str, Any], document: List[Dict[str, Any]]):
+        for operation in document:
+            op = (operation.get("op") or "add").lower()
+            path = operation.get("path") or ""
+            value = operation.get("value")
+            if op == "test":
+                continue
+            if path.startswith("/fields/"):
+                name = path[len("/fields/"):]
+                if op == "remove":
+                    item["fields"].pop(name, None)
+                elif name in IDENTITY_FIELDS:
+                    item["fields"][name] = self.identity_ref(value) if value else None
+                elif name == "System.IterationPath" and value:
+                    project = self.get_project(item["project"])
+                    iteration = self.find_iteration(project, str(value).split("\\")[-1]) or self.find_iteration(project, str(value))
+                    if iteration is None and str(value).lower() != project["name"].lower():
+                        raise FakeAzdoError(400, f"TF401347: Invalid tree name given for work item {item['id']}, field 'System.IterationPath'.")
+                    item["fields"][name] = iteration["path"] if iteration else project["name"]
+                elif name == "System.State" and value:
+                    wit = self.work_item_types.get(item["fields"]["System.WorkItemType"].lower())
+                    if wit and value not in wit["states"]:
+                        raise FakeAzdoError(400, f"TF401320: Rule Error for field State. Error code: Required, InvalidListValue. "
+                                                 f"'{value}' is not a valid state for {wit['name']}.")
+                    item["fields"][name] = value
+                else:
+                    item["fields"][name] = value
+            elif path == "/relations/-" and op == "add":
+                relation = value or {}
+                match = _WORK_ITEM_URL.search(relation.get("url", ""))
+                if relation.get("rel") == HIERARCHY_REVERSE and match:
+                    self._add_hierarchy(int(match.group(1)), item["id"])
+                elif relation.get("rel") == HIERARCHY_FORWARD and match:
+                    self._add_hierarchy(item["id"], int(match.group(1)))
+                elif match:
+                    target_id = int(match.group(1))
+                    self.get_work_item(target_id)
+                    self._add_relation(item, relation["rel"], target_id, relation.get("attributes"))
+                else:
+                    item["relations"].append({"rel": relation.get("rel"), "url": relation.get("url"),
+                                              "attributes": relation.get("attributes") or {}})
+            elif path.startswith("/relations/") and op == "remove":
+                index = int(path.rsplit("/", 1)[1])
+                if index >= len(item["relations"]):
+                    raise FakeAzdoError(400, f"Relation index {index} is out of range for work item {item['id']}.")
+                relation = item["relations"].pop(index)
+                match = _WORK_ITEM_URL.search("/" + relation["url"])
+                if relation["rel"] == HIERARCHY_REVERSE and match:
+                    item["fields"].pop("System.Parent", None)
+                    parent = self.work_items.get(int(match.group(1)))
+                    if parent:
+                        parent["relations"] = [r for r in parent["relations"]
+                                               if not (r["rel"] == HIERARCHY_FORWARD and r["url"] == f"workItems/{item['id']}")]
+            else:
+                raise FakeAzdoError(400, f"Unsupported patch operation '{op}' on path '{path}'.")
+
+    def create_work_item(self, project_name: str, work_item_type: str, document: List[Dict[str, Any]]) -> Dict[str, Any]:
+        project = self.get_project(project_name)
+        wit = self.work_item_types.get(work_item_type.lower())
+        if wit is None:
+            raise FakeAzdoError(404, f"TF401326: Invalid work item type '{work_item_type}'.", "WorkItemTypeNotFoundException")
+        now = _now_iso()
+        item = {
+            "id": self.next_work_item_id,
+            "rev": 1,
+            "project": project["name"],
+            "fields": {
+                "System.TeamProject": project["name"],
+                "System.AreaPath": project["name"],
+                "System.IterationPath": project["name"],
+                "System.WorkItemType": wit["name"],
+                "System.State": wit["states"][0],
+                "System.Reason": "New",
+                "System.CreatedDate": now,
+                "System.ChangedDate": now,
+                "System.CreatedBy": self.identity_ref(self.me["id"]) if self.me else None,
+            },
+            "relations": [],
+        }
+        self.work_items[item["id"]] = item
+        try:
+            self._apply_patch(item, document)
+        except FakeAzdoError:
+            del self.work_items[item["id"]]
+            raise
+        if not item["fields"].get("System.Title"):
+            del self.work_items[item["id"]]
+            raise FakeAzdoError(400, "TF401320: Rule Error for field Title. Error code: Required, HasValues, LimitedToValues.")
+        self.next_work_item_id += 1
+        return item
+
+    def update_work_item(self, work_item_id: int, document: List[Dict[str, Any]]) -> Dict[str, Any]:
+        item = self.get_work_item(work_item_id)
+        backup = copy.deepcopy(item)
+        try:
+            self._apply_patch(item, document)
+        except FakeAzdoError:
+            self.work_items[item["id"]] = backup
+            raise
+        item["rev"] += 1
+        item["fields"]["System.ChangedDate"] = _now_iso()
+        return item
+
+    def query_work_items(self, query: str, project: Optional[Dict[str, Any]], team: Optional[Dict[str, Any]],
+                         top: Optional[int] = None):
+        context = WiqlContext(
+            me=self.identity_ref(self.me["id"]) if self.me else None,
+            project=project["name"] if project else None,
+            current_iteration=self.current_iteration_path(project, team),
+            today=self.clock,
+            resolve_identity=self.find_identity,
+        )
+        items = sorted(self.work_items.values(), key=lambda item: item["id"])
+        columns, matched = WiqlEvaluator(context).run(query, items)
+        return columns, matched[:top] if top else matched
+
+    def add_comment(self, work_item_id: int, text: str) -> Dict[str, Any]:
+        self.get_work_item(work_item_id)
+        comment = {"id": self.next_comment_id, "workItemId": int(work_item_id), "text": text,
+                   "createdBy": self.me["id"] if self.me else None, "createdDate": _now_iso()}
+        self.next_comment_id += 1
+        self.comments.setdefault(int(work_item_id), []).append(comment)
+        return comment
+
+    def comment_json(self, comment: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        author = self.identity_ref(comment.get("createdBy"), base_url)
+        return {
+            "id": comment["id"],
+            "workItemId": comment["workItemId"],
+            "version": 1,
+            "text": comment["text"],
+            "createdBy": author,
+            "createdDate": comment["createdDate"],
+            "modifiedBy": author,
+            "modifiedDate": comment["createdDate"],
+            "url": f"{base_url}/_apis/wit/workItems/{comment['workItemId']}/comments/{comment['id']}",
+        }
+
+    # ---- Git ----
+
+    def get_repository(self, project: Optional[Dict[str, Any]], name_or_id: str) -> Dict[str, Any]:
+        for repository in self.repositories:
+            if project and repository["project"].lower() != project["name"].lower():
+                continue
+            if name_or_id.lower() in (repository["id"], repository["name"].lower()):
+                return repository
+        raise FakeAzdoError(404, f"TF401019: The Git repository with name or identifier {name_or_id} does not exist "
+                                 f"or you do not have permissions for the operation you are attempting.",
+                            "GitRepositoryNotFoundException")
+
+    def repository_json(self, repository: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        project = self.get_project(repository["project"])
+        return {
+            "id": repository["id"],
+            "name": repository["name"],
+            "url": f"{base_url}/{project['id']}/_apis/git/repositories/{repository['id']}",
+            "project": self.project_json(project, base_url),
+            "defaultBranch": repository.get("defaultBranch"),
+            "size": repository.get("size", 0),
+            "remoteUrl": f"{base_url}/{project['name']}/_git/{repository['name']}",
+            "webUrl": f"{base_url}/{project['name']}/_git/{repository['name']}",
+        }
+
+    def ref_json(self, repository: Dict[str, Any], ref: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        return {
+            "name": ref["name"],
+            "objectId": ref["objectId"],
+            "creator": self.identity_ref(ref.get("creator"), base_url),
+            "url": f"{base_url}/_apis/git/repositories/{repository['id']}/refs?filter={ref['name'][5:]}",
+        }
+
+    def commit_json(self, repository: Dict[str, Any], commit: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        identity = self.find_identity(commit["author"]) or {"displayName": commit["author"], "uniqueName": commit["author"]}
+        signature = {"name": identity["displayName"], "email": identity["uniqueName"], "date": commit["date"]}
+        return {
+            "commitId": commit["commitId"],
+            "author": signature,
+            "committer": signature,
+            "comment": commit["comment"],
+            "changeCounts": {"Add": 1, "Edit": 2, "Delete": 0},
+            "url": f"{base_url}/_apis/git/repositories/{repository['id']}/commits/{commit['commitId']}",
+        }
+
+    def get_pull_request(self, pull_request_id: int, project: Optional[Dict[str, Any]] = None,
+                         repository: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        for pull_request in self.pull_requests:
+            if pull_request["pullRequestId"] != int(pull_request_id):
+                continue
+            if project and pull_request["project"].lower() != project["name"].lower():
+                continue
+            if repository and pull_request["repository"] != repository["name"]:
+                continue
+            return pull_request
+        raise FakeAzdoError(404, f"TF401180: The requested pull request was not found.", "GitPullRequestNotFoundException")
+
+    def pull_request_json(self, pull_request: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        repository = self.get_repository(self.get_project(pull_request["project"]), pull_request["repository"])
+        reviewers = []
+        for reviewer in pull_request.get("reviewers", []):
+            ref = self.identity_ref(reviewer["id"], base_url)
+            reviewers.append({**ref, "vote": reviewer.get("vote", 0), "isRequired": reviewer.get("isRequired", False)})
+        return {
+            "pullRequestId": pull_request["pullRequestId"],
+            "repository": self.repository_json(repository, base_url),
+            "title": pull_request["title"],
+            "description": pull_request.get("description", ""),
+            "status": pull_request["status"],
+            "createdBy": self.identity_ref(pull_request["createdBy"], base_url),
+            "creationDate": pull_request["creationDate"],
+            "sourceRefName": pull_request["sourceRefName"],
+            "targetRefName": pull_request["targetRefName"],
+            "mergeStatus": pull_request.get("mergeStatus", "succeeded"),
+            "isDraft": pull_request.get("isDraft", False),
+            "reviewers": reviewers,
+            "url": f"{base_url}/_apis/git/repositories/{repository['id']}/pullRequests/{pull_request['pullRequestId']}",
+        }
+
+    def thread_json(self, thread: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        return {
+            "id": thread["id"],
+            "status": thread.get("status", "active"),
+            "publishedDate": thread.get("publishedDate"),
+            "threadContext": thread.get("threadContext"),
+            "comments": [self.thread_comment_json(comment, base_url) for comment in thread.get("comments", [])],
+        }
+
+    def thread_comment_json(self, comment: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        return {
+            "id": comment["id"],
+            "parentCommentId": comment.get("parentCommentId", 0),
+            "content": comment.get("content", ""),
+            "commentType": comment.get("commentType", "text"),
+            "author": self.identity_ref(comment.get("author"), base_url),
+            "publishedDate": comment.get("publishedDate"),
+        }
+
+    @staticmethod
+    def thread_status(value: Any) -> str:
+        if isinstance(value, int) and 0 <= value < len(THREAD_STATUSES):
+            return THREAD_STATUSES[value]
+        return str(value) if value else "active"
+
+    # ---- Build ----
+
+    def get_definition(self, project: Dict[str, Any], definition_id: int) -> Dict[str, Any]:
+        for definition in self.definitions:
+            if definition["id"] == int(definition_id) and definition["project"].lower() == project["name"].lower():
+                return definition
+        raise FakeAzdoError(404, f"The requested build definition {definition_id} could not be found.", "DefinitionNotFoundException")
+
+    def definition_json(self, definition: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        project = self.get_project(definition["project"])
+        return {
+            "id": definition["id"],
+            "name": definition["name"],
+            "path": definition.get("path", "\\"),
+            "revision": definition.get("revision", 1),
+            "queueStatus": definition.get("queueStatus", "enabled"),
+            "type": "build",
+            "project": self.project_json(project, base_url),
+            "url": f"{base_url}/{project['id']}/_apis/build/Definitions/{definition['id']}",
+        }
+
+    def get_build(self, project: Dict[str, Any], build_id: int) -> Dict[str, Any]:
+        for build in self.builds:
+            if build["id"] == int(build_id) and build["project"].lower() == project["name"].lower():
+                return build
+        raise FakeAzdoError(404, f"The requested build {build_id} could not be found.", "BuildNotFoundException")
+
+    def build_json(self, build: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        project = self.get_project(build["project"])
+        definition = self.get_definition(project, build["definitionId"])
+        return {
+            "id": build["id"],
+            "buildNumber": build["buildNumber"],
+            "status": build["status"],
+            "result": build.get("result"),
+            "definition": {"id": definition["id"], "name": definition["name"]},
+            "project": self.project_json(project, base_url),
+            "requestedFor": self.identity_ref(build.get("requestedFor"), base_url),
+            "queueTime": build.get("queueTime"),
+            "startTime": build.get("startTime"),
+            "finishTime": build.get("finishTime"),
+            "sourceBranch": build.get("sourceBranch"),
+            "sourceVersion": build.get("sourceVersion"),
+            "url": f"{base_url}/{project['id']}/_apis/build/Builds/{build['id']}",
+        }
+
+    def timeline_json(self, build: Dict[str, Any]) -> Dict[str, Any]:
+        records = []
+        stage_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{build['id']}/stage"))
+        records.append({"id": stage_id, "parentId": None, "type": "Stage", "name": "Build", "state": "completed",
+                        "result": build.get("result"), "startTime": build.get("startTime"), "finishTime": build.get("finishTime"),
+                        "order": 1, "issues": []})
+        for index, lines in enumerate(build.get("logs", []), 1):
+            failed = any(line.startswith("##[error]") for line in lines)
+            records.append({
+                "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{build['id']}/task/{index}")),
+                "parentId": stage_id, "type": "Task", "name": lines[0].replace("Starting: ", ""),
+                "state": "completed", "result": "failed" if failed else "succeeded",
+                "startTime": build.get("startTime"), "finishTime": build.get("finishTime"), "order": index,
+                "log": {"id": index, "type": "Container"},
+                "issues": [{"type": "error", "message": line[len("##[error]"):]} for line in lines if line.startswith("##[error]")],
+            })
+        return {"id": hashlib.sha1(str(build["id"]).encode()).hexdigest(), "changeId": 1, "records": records}
+
+    # ---- Core ----
+
+    def project_json(self, project: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        return {
+            "id": project["id"],
+            "name": project["name"],
+            "description": project.get("description", ""),
+            "url": f"{base_url}/_apis/projects/{project['id']}",
+            "state": project.get("state", "wellFormed"),
+            "visibility": project.get("visibility", "private"),
+            "revision": 1,
+        }
+
+    def team_json(self, project: Dict[str, Any], team: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+        return {
+            "id": team["id"],
+            "name": team["name"],
+            "description": team.get("description", ""),
+            "url": f"{base_url}/_apis/projects/{project['id']}/teams/{team['id']}",
+            "identityUrl": f"{base_url}/_apis/Identities/{team['id']}",
+            "projectName": project["name"],
+            "projectId": project["id"],
+        }
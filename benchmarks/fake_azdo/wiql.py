@@ -0,0 +1,370 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Friendly field names accepted in place of reference names
+FIELD_ALIASES = {
+    "id": "System.Id",
+    "title": "System.Title",
+    "state": "System.State",
+    "assigned to": "System.AssignedTo",
+    "work item type": "System.WorkItemType",
+    "iteration path": "System.IterationPath",
+    "area path": "System.AreaPath",
+    "team project": "System.TeamProject",
+    "tags": "System.Tags",
+    "parent": "System.Parent",
+    "created date": "System.CreatedDate",
+    "changed date": "System.ChangedDate",
+    "priority": "Microsoft.VSTS.Common.Priority",
+    "story points": "Microsoft.VSTS.Scheduling.StoryPoints",
+    "remaining work": "Microsoft.VSTS.Scheduling.RemainingWork",
+}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<field>\[[^\]]+\])
+    | (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")
+    | (?P<macro>@\w+)
+    | (?P<number>\d+(?:\.\d+)?)
+    | (?P<op><>|!=|>=|<=|=|<|>)
+    | (?P<punct>[(),+-])
+    | (?P<word>[A-Za-z_][\w.]*)
+    )""", re.VERBOSE)
+
+
+class WiqlError(ValueError):
+    pass
+
+
+class WiqlContext:
+    """What macros resolve to for one query: the caller, the project/team and 'now'"""
+
+    def __init__(self, me: Dict[str, Any], project: Optional[str], current_iteration: Optional[str],
+                 today: datetime, resolve_identity: Callable[[str], Optional[Dict[str, Any]]]):
+        self.me = me
+        self.project = project
+        self.current_iteration = current_iteration
+        self.today = today
+        self.resolve_identity = resolve_identity
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise WiqlError(f"Unexpected character at position {pos}: {text[pos:pos + 20]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset: int = 0) -> Tuple[str, str]:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else ("eof", "")
+
+    def keyword(self, *words: str) -> bool:
+        """Consume the keyword sequence if it is next"""
+        for offset, word in enumerate(words):
+            kind, value = self.peek(offset)
+            if kind != "word" or value.upper() != word:
+                return False
+        self.pos += len(words)
+        return True
+
+    def expect(self, kind: str, value: Optional[str] = None) -> str:
+        token_kind, token_value = self.peek()
+        if token_kind != kind or (value is not None and token_value.upper() != value):
+            raise WiqlError(f"Expected {value or kind} but found {token_value or 'end of query'!r}")
+        self.pos += 1
+        return token_value
+
+    def field(self) -> str:
+        kind, value = self.peek()
+        if kind == "field":
+            self.pos += 1
+            return normalize_field(value[1:-1])
+        if kind == "word":
+            self.pos += 1
+            return normalize_field(value)
+        raise WiqlError(f"Expected a field but found {value or 'end of query'!r}")
+
+    def parse_query(self) -> Dict[str, Any]:
+        self.expect("word", "SELECT")
+        columns = [self.field()]
+        while self.peek() == ("punct", ","):
+            self.pos += 1
+            columns.append(self.field())
+        self.expect("word", "FROM")
+        source = self.expect("word")
+        if source.lower() != "workitems":
+            raise WiqlError(f"Only 'FROM WorkItems' queries are supported by the fake server, not '{source}'")
+
+        where = None
+        if self.keyword("WHERE"):
+            where = self.parse_or()
+
+        order_by = []
+        if self.keyword("ORDER", "BY"):
+            while True:
+                name = self.field()
+                descending = False
+                if self.keyword("DESC"):
+                    descending = True
+                else:
+                    self.keyword("ASC")
+                order_by.append((name, descending))
+                if self.peek() != ("punct", ","):
+                    break
+                self.pos += 1
+
+        if self.keyword("ASOF"):
+            self.expect("string")
+        if self.keyword("MODE"):
+            self.expect("punct", "(")
+            while self.peek()[0] not in ("eof",) and self.peek() != ("punct", ")"):
+                self.pos += 1
+            self.expect("punct", ")")
+        if self.peek()[0] != "eof":
+            raise WiqlError(f"Unexpected {self.peek()[1]!r} at the end of the query")
+        return {"columns": columns, "where": where, "order_by": order_by}
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.keyword("OR"):
+            node = ("or", node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.keyword("AND"):
+            node = ("and", node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.keyword("NOT"):
+            return ("not", self.parse_not())
+        if self.peek() == ("punct", "("):
+            self.pos += 1
+            node = self.parse_or()
+            self.expect("punct", ")")
+            return node
+        return self.parse_predicate()
+
+    def parse_predicate(self):
+        name = self.field()
+        negate = self.keyword("NOT")
+        if self.keyword("IN"):
+            self.expect("punct", "(")
+            values = [self.value()]
+            while self.peek() == ("punct", ","):
+                self.pos += 1
+                values.append(self.value())
+            self.expect("punct", ")")
+            node = ("in", name, values)
+        elif self.keyword("UNDER"):
+            node = ("under", name, self.value())
+        elif self.keyword("CONTAINS", "WORDS") or self.keyword("CONTAINS"):
+            node = ("contains", name, self.value())
+        elif self.keyword("EVER"):
+            node = ("cmp", name, "=", self.value())
+        elif not negate and self.keyword("IS", "NOT", "EMPTY"):
+            node = ("not", ("empty", name))
+        elif not negate and self.keyword("IS", "EMPTY"):
+            node = ("empty", name)
+        elif not negate:
+            op = self.expect("op")
+            node = ("cmp", name, "<>" if op == "!=" else op, self.value())
+        else:
+            raise WiqlError(f"Unsupported operator after NOT for field [{name}]")
+        return ("not", node) if negate else node
+
+    def value(self):
+        kind, value = self.peek()
+        self.pos += 1
+        if kind == "string":
+            quote = value[0]
+            return ("literal", value[1:-1].replace(quote * 2, quote))
+        if kind == "number":
+            return ("literal", float(value) if "." in value else int(value))
+        if kind == "macro":
+            offset = 0
+            if self.peek() in (("punct", "+"), ("punct", "-")) and self.peek(1)[0] == "number":
+                sign = 1 if self.peek()[1] == "+" else -1
+                offset = sign * int(float(self.peek(1)[1]))
+                self.pos += 2
+            elif self.peek() == ("punct", "("):
+                # @CurrentIteration('[Project]\\Team') style arguments are ignored
+                while self.peek()[0] != "eof" and self.peek() != ("punct", ")"):
+                    self.pos += 1
+                self.expect("punct", ")")
+            return ("macro", value[1:].lower(), offset)
+        if kind == "field":
+            return ("field", normalize_field(value[1:-1]))
+        raise WiqlError(f"Expected a value but found {value or 'end of query'!r}")
+
+
+def normalize_field(name: str) -> str:
+    name = name.strip()
+    return FIELD_ALIASES.get(name.lower(), name)
+
+
+def parse_wiql(query: str) -> Dict[str, Any]:
+    return _Parser(_tokenize(query)).parse_query()
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class WiqlEvaluator:
+    """Evaluates parsed WIQL against work items stored as {"id": ..., "fields": {...}}"""
+
+    def __init__(self, context: WiqlContext):
+        self.context = context
+
+    def field_value(self, item: Dict[str, Any], name: str) -> Any:
+        if name == "System.Id":
+            return item["id"]
+        fields = item["fields"]
+        if name in fields:
+            return fields[name]
+        lowered = name.lower()
+        for key, value in fields.items():
+            if key.lower() == lowered:
+                return value
+        return None
+
+    def resolve(self, item: Dict[str, Any], value) -> Any:
+        kind = value[0]
+        if kind == "literal":
+            return value[1]
+        if kind == "field":
+            return self.field_value(item, value[1])
+        _, macro, offset = value
+        if macro == "me":
+            return self.context.me
+        if macro == "project":
+            if not self.context.project:
+                raise WiqlError("@project requires a project in the request URL")
+            return self.context.project
+        if macro == "today":
+            return (self.context.today + timedelta(days=offset)).replace(hour=0, minute=0, second=0, microsecond=0)
+        if macro == "currentiteration":
+            if not self.context.current_iteration:
+                raise WiqlError("@CurrentIteration requires a team with a current iteration")
+            return self.context.current_iteration
+        raise WiqlError(f"Unsupported macro @{macro}")
+
+    def _identity_matches(self, actual: Any, expected: Any) -> bool:
+        if not isinstance(actual, dict):
+            return False
+        if isinstance(expected, dict):
+            return actual.get("id") == expected.get("id")
+        identity = self.context.resolve_identity(str(expected))
+        if identity:
+            return actual.get("id") == identity["id"]
+        text = str(expected).lower()
+        return text in (str(actual.get("displayName", "")).lower(), str(actual.get("uniqueName", "")).lower())
+
+    def _compare(self, actual: Any, op: str, expected: Any) -> bool:
+        if isinstance(actual, dict) or isinstance(expected, dict):
+            equal = self._identity_matches(actual, expected)
+            if op == "=":
+                return equal
+            if op == "<>":
+                return not equal
+            return False
+        if actual is None:
+            return op == "<>" and expected not in (None, "")
+
+        expected_date = _parse_date(expected) if not isinstance(expected, (int, float)) else None
+        actual_date = _parse_date(actual) if expected_date else None
+        if expected_date and actual_date:
+            left, right = actual_date, expected_date
+            if isinstance(expected, datetime) and expected.hour == 0 and expected.minute == 0:
+                # @Today compares by day
+                left = actual_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        elif isinstance(actual, (int, float)) and not isinstance(actual, bool):
+            try:
+                left, right = actual, float(expected)
+            except (TypeError, ValueError):
+                return op == "<>"
+        else:
+            left, right = str(actual).lower(), str(expected).lower()
+
+        return {
+            "=": left == right,
+            "<>": left != right,
+            ">": left > right,
+            "<": left < right,
+            ">=": left >= right,
+            "<=": left <= right,
+        }[op]
+
+    def matches(self, item: Dict[str, Any], node) -> bool:
+        if node is None:
+            return True
+        kind = node[0]
+        if kind == "and":
+            return self.matches(item, node[1]) and self.matches(item, node[2])
+        if kind == "or":
+            return self.matches(item, node[1]) or self.matches(item, node[2])
+        if kind == "not":
+            return not self.matches(item, node[1])
+        if kind == "empty":
+            return self.field_value(item, node[1]) in (None, "")
+
+        name = node[1]
+        actual = self.field_value(item, name)
+        if kind == "cmp":
+            return self._compare(actual, node[2], self.resolve(item, node[3]))
+        if kind == "in":
+            return any(self._compare(actual, "=", self.resolve(item, value)) for value in node[2])
+        if kind == "under":
+            if actual is None:
+                return False
+            path, parent = str(actual).lower(), str(self.resolve(item, node[2])).lower()
+            return path == parent or path.startswith(parent + "\\")
+        if kind == "contains":
+            expected = str(self.resolve(item, node[2])).lower()
+            if isinstance(actual, dict):
+                actual = f"{actual.get('displayName', '')} <{actual.get('uniqueName', '')}>"
+            return actual is not None and expected in str(actual).lower()
+        raise WiqlError(f"Unsupported expression {kind}")
+
+    def run(self, query: str, items: List[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Returns (columns, matching items in result order)"""
+        parsed = parse_wiql(query)
+        matched = [item for item in items if self.matches(item, parsed["where"])]
+        for name, descending in reversed(parsed["order_by"]):
+            matched.sort(key=lambda item: self._sort_key(self.field_value(item, name)), reverse=descending)
+        return parsed["columns"], matched
+
+    @staticmethod
+    def _sort_key(value: Any):
+        if value is None:
+            return (0, "")
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return (1, value)
+        if isinstance(value, dict):
+            return (2, str(value.get("displayName", "")).lower())
+        return (2, str(value).lower())
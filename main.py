@@ -1,6 +1,30 @@
-from src.agents.agent import rea_agent
+# src.agents.agent (langchain, OpenAI and the Azure DevOps SDK) is imported by each entry point
+# when its run starts, so printing usage or starting the batch queue does not pay for it
+from src.utils.job_queue import JobQueue
+from src.utils.run_registry import run_registry
+from src.utils.rollup_report import write_rollup_report
 import asyncio
+import json
+import re
 import sys
+import time
+
+PRODUCT_OWNER_REQUEST = """
+    Project: aimetlab2
+    Team: aimetlab2 Team
+
+    User Request:
+    1. Get the Feature id 18
+    2. Check what are the existing user stories under this
+    3. Analyse and find whether any other user stories can be created
+    4. Only If additional user stories are required so badly, breakdown the feature into further user stories apart from the existing
+    5. Groom the user stories with proper titles, descriptions , acceptance criteria and story points
+    6. Push everything into the Boards with proper title, description and priority
+    7. Update the user stories with story points based on the complexity
+    8. Check the capacity of the team for the current sprint and see if these user stories can be accomodated
+    9. Assign the user stories to the team members based on their capacity and roles and tag them in this current sprint
+    10. Finally prepare a report named "User_Stories_Report.html" on the created user stories and their assignments
+    """
 
 def product_owner_agent():
     # user_prompt = """
@@ -19,26 +43,25 @@ def product_owner_agent():
     # 9. Finally prepare a report named "User_Stories_Report.html" on the created tasks and their assignments
     # """
 
-    user_prompt = """
+    user_prompt = PRODUCT_OWNER_REQUEST
+
+    from src.agents.agent import rea_agent
+    response = asyncio.run(rea_agent(user_prompt, role="product owner"))
+    return response
+
+SCRUM_LEAD_REQUEST = """
     Project: aimetlab2
     Team: aimetlab2 Team
 
     User Request:
-    1. Get the Feature id 18
-    2. Check what are the existing user stories under this
-    3. Analyse and find whether any other user stories can be created
-    4. Only If additional user stories are required so badly, breakdown the feature into further user stories apart from the existing
-    5. Groom the user stories with proper titles, descriptions , acceptance criteria and story points
-    6. Push everything into the Boards with proper title, description and priority
-    7. Update the user stories with story points based on the complexity
-    8. Check the capacity of the team for the current sprint and see if these user stories can be accomodated
-    9. Assign the user stories to the team members based on their capacity and roles and tag them in this current sprint
-    10. Finally prepare a report named "User_Stories_Report.html" on the created user stories and their assignments
+    1. Does all User Stories in the current sprint have tasks created under them?
+    2. Does all team members have tasks assigned in the current sprint?
+    3. Do all team members provide daily standup updates in the task comments?
+    4. Are team members committing their code regularly?
+    5. Identify any blockers or issues faced by the team members if any specified in the comments
+    6. Finally prepare a report named "Sprint_Report.html" on the sprint progress with all the above details and whether we are on track to meet our sprint goals
     """
 
-    response = asyncio.run(rea_agent(user_prompt, role="product owner"))
-    return response
-
 def scrum_lead_agent():
     # user_prompt = """
     # Project: aimetlab
@@ -54,9 +77,14 @@ def scrum_lead_agent():
     # 7. Finally prepare a report on the sprint progress and whether we are on track to meet our sprint goals
     # """
 
-    user_prompt = """
-    Project: aimetlab2
-    Team: aimetlab2 Team
+    user_prompt = SCRUM_LEAD_REQUEST
+    from src.agents.agent import rea_agent
+    response = asyncio.run(rea_agent(user_prompt, role="scrum lead"))
+    return response
+
+SCRUM_LEAD_BATCH_REQUEST = """
+    Project: {project}
+    Team: {team}
 
     User Request:
     1. Does all User Stories in the current sprint have tasks created under them?
@@ -64,13 +92,41 @@ def scrum_lead_agent():
     3. Do all team members provide daily standup updates in the task comments?
     4. Are team members committing their code regularly?
     5. Identify any blockers or issues faced by the team members if any specified in the comments
-    6. Finally prepare a report named "Sprint_Report.html" on the sprint progress with all the above details and whether we are on track to meet our sprint goals
+    6. Finally prepare a report named "{report_path}" on the sprint progress with all the above details and whether we are on track to meet our sprint goals
     """
-    response = asyncio.run(rea_agent(user_prompt, role="scrum lead"))
-    return response
 
-def peer_reviewer_agent():
-    user_prompt = """
+async def _run_scrum_lead_batch(teams):
+    """Run one scrum lead agent per team concurrently and roll the results up into one report"""
+    # Runs share the toolkit per project, one pooled Azure DevOps connection and one rate limiter
+    queue = JobQueue()
+    started = time.perf_counter()
+    submitted = []
+    for entry in teams:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{entry['project']}_{entry['team']}").strip("_")
+        report_path = f"Sprint_Report_{slug}.html"
+        prompt = SCRUM_LEAD_BATCH_REQUEST.format(project=entry["project"], team=entry["team"], report_path=report_path)
+        record = queue.submit(prompt, role="scrum lead", project=entry["project"])
+        submitted.append((entry, report_path, record["run_id"]))
+    await queue.wait()
+    queue.shutdown()
+
+    runs = []
+    for entry, report_path, run_id in submitted:
+        run = run_registry.get(run_id) or {"run_id": run_id, "status": "failed"}
+        runs.append({**run, "project": entry["project"], "team": entry["team"], "report_path": report_path})
+    return write_rollup_report(runs, wall_seconds=time.perf_counter() - started)
+
+def scrum_lead_batch_agent(teams_file: str = "scrum_teams.json"):
+    # teams_file holds a JSON list of {"project": ..., "team": ...} entries
+    with open(teams_file, "r", encoding="utf-8") as f:
+        teams = json.load(f)
+    rollup = asyncio.run(_run_scrum_lead_batch(teams))
+    totals = rollup["totals"]
+    print(f"Roll-up: {totals['completed']}/{totals['teams']} teams completed in {totals['wall_seconds']}s "
+          f"(Sprint_Rollup_Report.html, Sprint_Rollup_Report.json)")
+    return rollup
+
+PEER_REVIEW_REQUEST = """
     Project: aimetlab
     Team: aimetlab Team
 
@@ -80,9 +136,41 @@ def peer_reviewer_agent():
     3. Check whether the code changes are following the best practices and coding standards
     4. Finally prepare a report on the code review findings and suggest any necessary actions
     """
+
+def peer_reviewer_agent():
+    user_prompt = PEER_REVIEW_REQUEST
+    from src.agents.agent import rea_agent
     response = asyncio.run(rea_agent(user_prompt, role="peer review"))
     return response
 
+# Request each role's scenario sends, for spec_agent runs
+ROLE_REQUESTS = {
+    "product owner": PRODUCT_OWNER_REQUEST,
+    "scrum lead": SCRUM_LEAD_REQUEST,
+    "peer review": PEER_REVIEW_REQUEST,
+}
+
+def spec_agent(spec: str, user_prompt: str = None):
+    # spec is 'file.yaml' or 'file.yaml#agent-name'; the request defaults to the scenario of the spec's role
+    from src.agents.agent import rea_agent
+    from src.agents.spec_loader import agent_spec_loader
+
+    config = agent_spec_loader.get(spec)
+    if config.tool_manifest is not None:
+        from src.toolkits.toolkit import check_tool_manifest
+
+        try:
+            check_tool_manifest(config.tool_manifest)
+        except ValueError as e:
+            print(f"Invalid agent spec '{spec}': {str(e)}")
+            return None
+    user_prompt = user_prompt or ROLE_REQUESTS.get((config.role or "").lower())
+    if not user_prompt:
+        print(f"No request given and no default request for role '{config.role}'")
+        return None
+    response = asyncio.run(rea_agent(user_prompt, spec=spec))
+    return response
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         function_to_call = sys.argv[1]
@@ -90,9 +178,13 @@ if __name__ == "__main__":
             product_owner_agent()
         elif function_to_call == "scrum_lead_agent":
             scrum_lead_agent()
+        elif function_to_call == "scrum_lead_batch_agent":
+            scrum_lead_batch_agent(*sys.argv[2:3])
         elif function_to_call == "peer_reviewer_agent":
             peer_reviewer_agent()
+        elif function_to_call == "spec_agent" and len(sys.argv) > 2:
+            spec_agent(*sys.argv[2:4])
         else:
             print(f"Unknown function: {function_to_call}")
     else:
-        print("Please provide a function to call: product_owner_agent, scrum_lead_agent, or peer_reviewer_agent")
\ No newline at end of file
+        print("Please provide a function to call: product_owner_agent, scrum_lead_agent, scrum_lead_batch_agent [teams.json], peer_reviewer_agent, or spec_agent <spec.yaml[#agent-name]> [request]")
\ No newline at end of file
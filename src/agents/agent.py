@@ -1,48 +1,78 @@
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
 load_dotenv()
 import os
 from langchain_openai import ChatOpenAI
 from prompts.prompts import PRODUCT_OWNER, SCRUM_LEAD, PEER_REVIEWER, ROLE_PROMPT, Role_selection_prompt, json_creation_prompt
+from prompts import prompts as prompt_templates
 import json
-from langchain.agents import AgentExecutor
-from src.toolkits.toolkit import get_azdo_tool_kit, get_local_tool_kit
+import time
+from src.agents.budgeted_executor import BudgetedAgentExecutor, partial_results_output
+from src.toolkits.toolkit import get_role_tool_kit
+from src.agents.spec_loader import agent_spec_loader, AgentConfig, DEFAULT_MODEL, DEFAULT_TEMPERATURE
+from src.tools.local_tools.human_in_loop_tool import get_plan_approval_tool
 from langchain.agents import create_openai_functions_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_community.callbacks import get_openai_callback
 import asyncio
 from src.utils.json_processor import extract_json_from_markdown
 from src.utils.livefile_callbackandler import LiveFileCallbackHandler
+from src.utils.event_bus import event_bus
+from src.utils.run_registry import run_registry
 from langchain_core.callbacks import FileCallbackHandler
 from src.utils.uuid_generator import generate_uuid
+from src.utils.tool_metrics import tool_metrics, current_run_id, instrument_tool
+from src.utils.tracing import tracer
+from src.utils.cost_ledger import cost_ledger
+from src.utils.llm_callbacks import tracing_callback_var, TracingCallbackHandler, cost_ledger_callback_var, CostLedgerCallbackHandler
+from src.utils.llm_callbacks import budget_callback_var, BudgetCallbackHandler
+from src.utils.run_budget import RunBudget
+from src.utils.model_router import model_router, LOCAL_API_KEY
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Initialize the language model
-llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=OPENAI_API_KEY)
 
-def _sync_append_cost(content: str, path: str = "cost_details.txt"):
-    """Synchronous helper to append cost details to a file.
-
-    Separated out so it can be executed via asyncio.to_thread without
-    invoking open() inside an async function (avoids lint warnings).
+@lru_cache(maxsize=None)
+def get_llm(model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE,
+            base_url: str = None, api_key: str = None) -> ChatOpenAI:
+    """
+    Returns the language model, created when the first run needs it and shared by later runs with the same settings.
+    `base_url` points it at another OpenAI-compatible server (e.g. a local model for the router's sub-tasks);
+    the OpenAI key is only ever sent to OpenAI.
     """
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(content)
+    if base_url:
+        api_key = api_key or LOCAL_API_KEY
+    return ChatOpenAI(model=model, temperature=temperature, openai_api_key=api_key or OPENAI_API_KEY, base_url=base_url)
 
-def get_role_based_prompt(user_input: str, role: str = None) -> str:
-    """Returns the system prompt based on the selected role."""
+def select_role(user_input: str, role: str = None, model: str = DEFAULT_MODEL,
+                temperature: float = DEFAULT_TEMPERATURE) -> str:
+    """Returns the given role, or asks the model to pick one for the user input (model: the large model to fall back to)."""
 
     if role:
-        selected_role = role
-    else:
-        role_prompt = Role_selection_prompt + "\n\nUser Input:\n{input}"
-        input_prompt = role_prompt.format(input=user_input)
-        response = llm.invoke(input_prompt)
-        role_json = extract_json_from_markdown(response.content)
+        return role
+    selected_role = ""
+    role_prompt = Role_selection_prompt + "\n\nUser Input:\n{input}"
+    input_prompt = role_prompt.format(input=user_input)
+    # Classification: answered by the router's small model
+    role_json = model_router.invoke("classification", input_prompt, get_llm, parse=extract_json_from_markdown,
+                                    model=model, temperature=temperature)
+
+    if isinstance(role_json, dict) and "Role" in role_json:
+        selected_role = role_json["Role"]
+    print(f"Selected Role: {selected_role}")
+    return selected_role
+
+def summarize_run_log(log_path: str, model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE) -> dict:
+    """Reads a run's log and has the router's small model summarize it into the run's output JSON (model: the large model to fall back to)."""
+    with open(log_path, "r", encoding="utf-8") as log_file:
+        agent_logs = log_file.read()
+    return model_router.invoke("summary", json_creation_prompt.format(agent_logs=agent_logs),
+                               get_llm, parse=extract_json_from_markdown, model=model, temperature=temperature)
+
+def get_role_based_prompt(user_input: str, role: str = None) -> str:
+    """Returns the system prompt based on the selected role."""
 
-        if isinstance(role_json, dict) and "Role" in role_json:
-            selected_role = role_json["Role"]
-        print(f"Selected Role: {selected_role}")
+    selected_role = select_role(user_input, role)
 
     if selected_role.strip().lower() == "product owner":
         role_prompt = PRODUCT_OWNER
@@ -58,61 +88,109 @@ def get_role_based_prompt(user_input: str, role: str = None) -> str:
     
     return role_prompt
 
-async def rea_agent(user_prompt: str, role: str = None):
-    """Sets up and returns an REA agent executor with Azure DevOps and local file operation tools."""
+async def rea_agent(user_prompt: str, role: str = None, run_id: str = None, project: str = None, spec: str = None):
+    """
+    Sets up and returns an REA agent executor with Azure DevOps and local file operation tools.
+    Model, prompt, tools, iteration cap and run budget come from the agent spec: `spec`
+    ('file.yaml' or 'file.yaml#agent-name') or else the selected role's spec. A run that
+    exceeds its budget stops at its next step and returns its partial results.
+    """
     print("Setting up REA agent...")
-    uuid = generate_uuid()
+    uuid = run_id or generate_uuid()
+    # Blocking work (spec files, LLM calls, toolkit and connector setup) runs in worker threads so
+    # concurrent runs on the same event loop, and the API endpoints sharing it, are not held up
+    config = await asyncio.to_thread(agent_spec_loader.get, spec) if spec else None
+    role = role or (config.role if config else None)
+    # Tool calls made from this run (and the threads it starts) are counted against it
+    current_run_id.set(uuid)
+    # Root span of the run's trace; LLM calls, tool calls and their HTTP requests nest under it
+    run_span = tracer.start_span("agent run", attributes={"rea.run_id": uuid, "rea.role": role or "no_role", "rea.project": project})
+    span_token = tracer.activate(run_span)
+    # Everything after the span is started is inside the try, so a failed setup still ends the span,
+    # marks the run failed and publishes run_failed
+    try:
+        if tracer.enabled:
+            tracing_callback_var.set(TracingCallbackHandler(run_span))
+        # One cost ledger row per LLM call of this run
+        cost_ledger_callback_var.set(CostLedgerCallbackHandler(uuid, role=role, project=project))
     
-    # Get tools
-    azdo_tools = get_azdo_tool_kit()
-    local_tools = get_local_tool_kit()
-    all_tools = azdo_tools + local_tools
+        # Get system prompt based on role (selected first, so only the role's tools are built)
+        # The spec's model (known here for spec runs) is the fallback for the role classification
+        selected_role = await asyncio.to_thread(select_role, user_prompt, role,
+                                                config.model if config else DEFAULT_MODEL,
+                                                config.temperature if config else DEFAULT_TEMPERATURE)
+        config = config or await asyncio.to_thread(agent_spec_loader.for_role, selected_role) or AgentConfig("default", role=selected_role)
+        if config.prompt:
+            system_prompt = getattr(prompt_templates, config.prompt)
+            print(f"{config.display_name} Started...")
+        else:
+            system_prompt = get_role_based_prompt(user_prompt, selected_role)
+
+        # Wall time, tokens, cost and calls per tool of the agent loop; the spec's limits override the REA_RUN_MAX_* defaults
+        budget = RunBudget.from_env(max_seconds=config.time_budget_seconds, max_tokens=config.max_tokens,
+                                    max_cost_usd=config.max_cost_usd, max_tool_calls=config.max_tool_calls)
+        budget_callback_var.set(BudgetCallbackHandler(budget))
+
+        # Get tools (Azure DevOps tools are scoped to the project, PROJECT_NAME by default; the spec's
+        # tool manifest decides which tools, and so which function schemas, go with every LLM call)
+        all_tools = await asyncio.to_thread(get_role_tool_kit, project, selected_role, request=user_prompt,
+                                            top_k=config.tool_retrieval_top_k, manifest=config.tool_manifest)
+        all_tools.append(instrument_tool(get_plan_approval_tool(all_tools)))
     
-    print(f"Total tools available: {len(all_tools)}")
-
-    # Get system prompt based on role
-    system_prompt = get_role_based_prompt(user_prompt, role)
-
-    # Additional instructions
-    # additional_instructions = """
-    # **IMPORTANT INSTRUCTIONS**:
-    #     1. **CRITICAL**: Always use the 'human_input' tool to get human inputs/approval/suggestions.  
-    #     2. If you are getting any errors while performing any operations, use the 'human_input' tool to get clarification or more information from the user before proceeding.
-    #     3. Never end the conversation without confirming with the user using the 'human_input' tool.
-    # """
+        print(f"Total tools available: {len(all_tools)}")
+
+        # Additional instructions
+        # additional_instructions = """
+        # **IMPORTANT INSTRUCTIONS**:
+        #     1. **CRITICAL**: Always use the 'human_input' tool to get human inputs/approval/suggestions.  
+        #     2. If you are getting any errors while performing any operations, use the 'human_input' tool to get clarification or more information from the user before proceeding.
+        #     3. Never end the conversation without confirming with the user using the 'human_input' tool.
+        # """
     
-    prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            ("user", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
+        prompt = ChatPromptTemplate.from_messages([
+                ("system", system_prompt),
+                ("user", "{input}"),
+                MessagesPlaceholder(variable_name="agent_scratchpad"),
+            ])
 
-    agent = create_openai_functions_agent(llm, all_tools, prompt)
+        agent = create_openai_functions_agent(get_llm(config.model, config.temperature), all_tools, prompt)
     
-    # Use it with your agent
-    log_path = f"{role or 'no_role'}_agent_log_{uuid}.txt"
-    with open(log_path, "a", encoding="utf-8") as log_file:
-        log_file.write(f"\n\n{'-'*20}\n{role or 'No Role Specified'} Agent started at {datetime.now().isoformat()}\n{'-'*20}\n")
-        log_file.flush()
+        # Use it with your agent
+        log_path = f"{role or 'no_role'}_agent_log_{uuid}.txt"
+        with open(log_path, "a", encoding="utf-8") as log_file:
+            log_file.write(f"\n\n{'-'*20}\n{role or 'No Role Specified'} Agent started at {datetime.now().isoformat()}\n{'-'*20}\n")
+            log_file.flush()
 
-    handler = LiveFileCallbackHandler(log_path)
-    agent_executor = AgentExecutor(
-        agent=agent,
-        tools=all_tools,
-        verbose=True,
-        handle_parsing_errors=True,
-        max_iterations=30,
-        return_intermediate_steps=True,
-        callbacks=[handler]
-    )
+        handler = LiveFileCallbackHandler(log_path, run_id=uuid, event_bus=event_bus)
+        agent_executor = BudgetedAgentExecutor(
+            agent=agent,
+            tools=all_tools,
+            verbose=True,
+            handle_parsing_errors=True,
+            max_iterations=config.max_iterations,
+            max_execution_time=budget.max_seconds,
+            return_intermediate_steps=True,
+            callbacks=[handler],
+            budget=budget
+        )
 
 
 
 
-    try:
+        output_path = f"{role or 'no_role'}_agent_output_{uuid}.json"
+        run_registry.register(uuid, role, log_path=log_path, **({"project": project} if project else {}))
+        event_bus.publish(uuid, "run_started", {"role": role, "log_path": log_path})
         cost_details = ""
         with get_openai_callback() as cb:
             result = await agent_executor.ainvoke({"input": user_prompt})
+            # The budget covers the agent loop; the summary below is not counted against it
+            budget_callback_var.set(None)
+            stop_reason = budget.check()
+            if stop_reason:
+                result["stop_reason"] = stop_reason
+                # The tool outputs gathered so far, with why the run stopped
+                result["output"] = partial_results_output(result.get("output", ""), result.get("intermediate_steps") or [],
+                                                          stop_reason, agent_executor.budget_stopped)
 
             # with FileCallbackHandler("agent_output.log", mode='a') as handler:
             #     result = agent_executor.invoke(
@@ -129,30 +207,52 @@ async def rea_agent(user_prompt: str, role: str = None):
             Total Cost (USD): ${cb.total_cost}
             {"-"*20}
             """
-            # Use asyncio.to_thread for file I/O inside async function
-            import asyncio as _asyncio
-            await _asyncio.to_thread(_sync_append_cost, cost_details, "cost_details.txt")
             print("\nResult:", result.get("output", result))
 
-            with open(log_path, "r", encoding="utf-8") as log_file:
-                agent_logs = log_file.read()
-
-            llm_response = llm.invoke(
-                json_creation_prompt.format(agent_logs=agent_logs)
-            )
-            output_json = extract_json_from_markdown(llm_response.content)
+            output_json = await asyncio.to_thread(summarize_run_log, log_path, config.model, config.temperature)
             first_keys = {
                 "Run_ID": uuid,
             }
             output_json = {**first_keys, **output_json}
+            # Per-tool latency, HTTP requests and errors of this run
+            output_json["Tool_Metrics"] = tool_metrics.run_table(uuid)
+            # Tokens, cost and latency of this run's LLM calls, per model (from the cost ledger)
+            output_json["LLM_Costs"] = cost_ledger.aggregate(group_by=("model",), run_id=uuid)
+            # Model chosen for each sub-task of this run, why, and its latency
+            output_json["Model_Routing"] = model_router.run_table(uuid)
+            # Limits and usage of the run budget, and why the run stopped early (if it did)
+            output_json["Budget"] = budget.as_dict()
+            if stop_reason:
+                output_json["Stop_Reason"] = stop_reason
             
-            with open(f"{role or 'no_role'}_agent_output_{uuid}.json", "w", encoding="utf-8") as output_file:
+            with open(output_path, "w", encoding="utf-8") as output_file:
                 json.dump(output_json, output_file, indent=4)
 
             print("\nCost Details:")
             print(cost_details)
+            run_registry.update(
+                uuid,
+                status="completed",
+                finished_at=datetime.now().isoformat(),
+                output_path=output_path,
+                total_tokens=cb.total_tokens,
+                total_cost=cb.total_cost,
+                stop_reason=stop_reason
+            )
+            event_bus.publish(uuid, "run_finished", {"role": role, "total_tokens": cb.total_tokens, "total_cost": cb.total_cost,
+                                                     "stop_reason": stop_reason})
+            run_span.set_attributes({"llm.total_tokens": cb.total_tokens, "llm.prompt_tokens": cb.prompt_tokens,
+                                     "llm.completion_tokens": cb.completion_tokens, "llm.total_cost_usd": cb.total_cost})
             return result
     except Exception as e:
+        run_span.record_exception(e)
+        run_registry.update(uuid, role=role, status="failed", finished_at=datetime.now().isoformat(), error=str(e))
+        event_bus.publish(uuid, "run_failed", {"role": role, "error": str(e)})
         print(f"Error: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+    finally:
+        budget_callback_var.set(None)
+        tracer.deactivate(span_token)
+        # Ending the root span exports the trace (an OTLP POST), so it runs off the event loop like the other blocking work
+        await asyncio.to_thread(run_span.end, time.time_ns())
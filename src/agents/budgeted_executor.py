@@ -0,0 +1,75 @@
+from typing import Any, List, Optional, Tuple
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+from src.utils.run_budget import RunBudget
+
+# Characters of each tool output kept in the output of a run stopped by its budget
+PARTIAL_RESULT_CHARS = 2000
+
+
+class BudgetedAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor that stops gracefully once its run budget is exceeded.
+
+    The budget is checked before every step and before every tool call: a step is not
+    started and a tool is not called once a limit has been crossed (or when the tool has
+    used up its calls), and the executor returns its early-stopping response together
+    with the intermediate steps done so far.
+    """
+
+    budget: Optional[RunBudget] = None
+    # True once the budget ended the agent loop (the output is then the early-stopping text)
+    budget_stopped: bool = False
+
+    def _should_continue(self, iterations: int, time_elapsed: float) -> bool:
+        if self.budget is not None and self.budget.check():
+            self.budget_stopped = True
+            return False
+        return super()._should_continue(iterations, time_elapsed)
+
+    def _budget_stop(self, agent_action) -> Optional[AgentStep]:
+        if self.budget is None:
+            return None
+        reason = self.budget.check()
+        if reason is None and not self.budget.allows_tool(agent_action.tool):
+            reason = self.budget.exceeded
+        if reason is None:
+            return None
+        return AgentStep(action=agent_action, observation=f"Error: {reason}. The tool was not called and the run stops here.")
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None) -> AgentStep:
+        return self._budget_stop(agent_action) or super()._perform_agent_action(
+            name_to_tool_map, color_mapping, agent_action, run_manager)
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None) -> AgentStep:
+        stopped = self._budget_stop(agent_action)
+        if stopped is not None:
+            return stopped
+        return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+
+def partial_results_output(output: str, intermediate_steps: List[Tuple[AgentAction, Any]],
+                           stop_reason: str, loop_stopped: bool) -> str:
+    """
+    Output of a run that exceeded its budget: the stop reason, the agent's answer if it
+    still gave one, and the tool outputs of the steps it completed.
+
+    Args:
+        output: the executor's output
+        intermediate_steps: (action, observation) of every step taken
+        stop_reason: why the budget stopped the run
+        loop_stopped: whether the budget ended the agent loop (output is then only the early-stopping text)
+    """
+    lines = [f"Run stopped, {stop_reason}."]
+    if not loop_stopped and output:
+        lines.append(output)
+    if intermediate_steps:
+        lines.append(f"Partial results ({len(intermediate_steps)} steps):")
+        for number, (action, observation) in enumerate(intermediate_steps, 1):
+            observation = str(observation)
+            if len(observation) > PARTIAL_RESULT_CHARS:
+                observation = observation[:PARTIAL_RESULT_CHARS] + f"... ({len(observation) - PARTIAL_RESULT_CHARS} more characters)"
+            lines.append(f"[{number}] {action.tool}({action.tool_input}):\n{observation}")
+    else:
+        lines.append("No steps were completed.")
+    return "\n".join(lines)
@@ -0,0 +1,173 @@
+import os
+import hashlib
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+import yaml
+from dotenv import load_dotenv
+from src.toolkits.tool_manifests import ToolManifest, tool_retrieval_top_k
+
+load_dotenv()
+
+# Configuration
+# Directory of the agent spec YAMLs (default: the repository root)
+agent_spec_dir = os.getenv('REA_AGENT_SPEC_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+# Spec file describing each role's agent
+ROLE_SPEC_FILES = {
+    "product owner": "product_owner.yaml",
+    "scrum lead": "scrum_lead.yaml",
+    "peer review": "peer_reviewer.yaml",
+}
+
+# Used for whatever a spec leaves out (and for runs without a spec)
+DEFAULT_MODEL = "gpt-4o"
+DEFAULT_TEMPERATURE = 0.0
+DEFAULT_MAX_ITERATIONS = 30
+
+
+class AgentConfig:
+    """
+    Ready-to-run settings compiled from one agent spec: model, temperature, role prompt,
+    tool manifest, iteration cap and run budget. Configs are shared between runs; do
+    not modify them.
+    """
+
+    def __init__(self, name: str, role: Optional[str] = None, display_name: Optional[str] = None,
+                 model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE, prompt: Optional[str] = None,
+                 tools: Optional[Tuple[str, ...]] = None, max_iterations: int = DEFAULT_MAX_ITERATIONS,
+                 time_budget_seconds: Optional[float] = None, max_tokens: Optional[int] = None,
+                 max_cost_usd: Optional[float] = None, max_tool_calls: Union[int, Dict[str, int], None] = None,
+                 tool_retrieval_top_k: int = tool_retrieval_top_k, source: Optional[str] = None, spec_hash: Optional[str] = None):
+        self.name = name
+        self.role = role
+        self.display_name = display_name or name
+        self.model = model
+        self.temperature = temperature
+        # Name of the system prompt in prompts.prompts (None: chosen by role)
+        self.prompt = prompt
+        self.tools = tuple(tools) if tools is not None else None
+        # None when the spec has no tools list: every tool
+        self.tool_manifest = ToolManifest(self.tools) if self.tools is not None else None
+        self.max_iterations = max_iterations
+        self.time_budget_seconds = time_budget_seconds
+        # Run budget (None: the REA_RUN_MAX_* default); time_budget_seconds is its wall time limit
+        self.max_tokens = max_tokens
+        self.max_cost_usd = max_cost_usd
+        self.max_tool_calls = max_tool_calls
+        self.tool_retrieval_top_k = tool_retrieval_top_k
+        self.source = source
+        self.spec_hash = spec_hash
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "role": self.role, "model": self.model, "temperature": self.temperature,
+            "prompt": self.prompt, "tools": list(self.tools) if self.tools is not None else None, "max_iterations": self.max_iterations,
+            "time_budget_seconds": self.time_budget_seconds, "max_tokens": self.max_tokens,
+            "max_cost_usd": self.max_cost_usd, "max_tool_calls": self.max_tool_calls, "tool_retrieval_top_k": self.tool_retrieval_top_k,
+            "source": self.source, "spec_hash": self.spec_hash,
+        }
+
+
+def compile_agent_spec(spec: Dict[str, Any], source: Optional[str] = None, spec_hash: Optional[str] = None) -> AgentConfig:
+    """Compiles one spec entry (a mapping with name, llm_model, tools and runtime keys) into an AgentConfig"""
+    if not isinstance(spec, dict) or not spec.get("name"):
+        raise ValueError(f"Invalid agent spec in {source or 'input'}: every entry needs a name")
+    llm_model = spec.get("llm_model") or {}
+    runtime = spec.get("runtime") or {}
+    time_budget = runtime.get("time_budget_seconds")
+    max_tokens = runtime.get("max_tokens")
+    max_cost_usd = runtime.get("max_cost_usd")
+    max_tool_calls = runtime.get("max_tool_calls")
+    return AgentConfig(
+        name=spec["name"],
+        role=runtime.get("role"),
+        display_name=spec.get("display_name"),
+        model=llm_model.get("model") or DEFAULT_MODEL,
+        temperature=float(llm_model.get("temperature", DEFAULT_TEMPERATURE)),
+        prompt=runtime.get("prompt"),
+        # MCP-style tool entries (mappings) belong to other agent types and are skipped
+        tools=tuple(entry for entry in spec.get("tools") or [] if isinstance(entry, str)) if "tools" in spec else None,
+        max_iterations=int(runtime.get("max_iterations", DEFAULT_MAX_ITERATIONS)),
+        time_budget_seconds=float(time_budget) if time_budget is not None else None,
+        max_tokens=int(max_tokens) if max_tokens is not None else None,
+        max_cost_usd=float(max_cost_usd) if max_cost_usd is not None else None,
+        max_tool_calls=dict(max_tool_calls) if isinstance(max_tool_calls, dict) else (
+            int(max_tool_calls) if max_tool_calls is not None else None),
+        tool_retrieval_top_k=int(runtime.get("tool_retrieval_top_k", tool_retrieval_top_k)),
+        source=source,
+        spec_hash=spec_hash,
+    )
+
+
+class AgentSpecLoader:
+    """
+    Loads agent spec YAMLs and compiles every entry into an AgentConfig.
+
+    Compiled files are cached by the SHA-256 of their content, so loading the same spec
+    again (or an identical copy under another name) only costs reading the file, and an
+    edited spec is recompiled on its next load.
+    """
+
+    def __init__(self, spec_dir: str = agent_spec_dir):
+        self.spec_dir = spec_dir
+        # content hash -> {agent name: config}
+        self._compiled: Dict[str, Dict[str, AgentConfig]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, spec_file: str) -> str:
+        """Path of a spec file; only .yaml/.yml files inside spec_dir are accepted (specs can come from API clients)"""
+        if not spec_file.lower().endswith((".yaml", ".yml")):
+            raise ValueError(f"Agent spec '{spec_file}' is not a .yaml file")
+        spec_dir = os.path.realpath(self.spec_dir)
+        path = os.path.realpath(os.path.join(spec_dir, spec_file))
+        if os.path.commonpath([spec_dir, path]) != spec_dir:
+            raise ValueError(f"Agent spec '{spec_file}' is outside the spec directory (REA_AGENT_SPEC_DIR)")
+        return path
+
+    def load(self, spec_file: str) -> Dict[str, AgentConfig]:
+        """Agent name -> config for every agent in a spec file"""
+        path = self.path(spec_file)
+        with open(path, "rb") as f:
+            content = f.read()
+        spec_hash = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            compiled = self._compiled.get(spec_hash)
+        if compiled is not None:
+            return compiled
+        specs = yaml.safe_load(content) or []
+        if isinstance(specs, dict):
+            specs = [specs]
+        compiled = {}
+        for spec in specs:
+            config = compile_agent_spec(spec, source=path, spec_hash=spec_hash)
+            compiled[config.name] = config
+        with self._lock:
+            self._compiled[spec_hash] = compiled
+        return compiled
+
+    def get(self, spec: str) -> AgentConfig:
+        """Config for 'file.yaml' (its first agent) or 'file.yaml#agent-name'"""
+        spec_file, _, name = spec.partition("#")
+        configs = self.load(spec_file)
+        if not configs:
+            raise ValueError(f"No agents in spec '{spec_file}'")
+        if not name:
+            return next(iter(configs.values()))
+        if name not in configs:
+            raise ValueError(f"No agent '{name}' in spec '{spec_file}' (found: {', '.join(configs)})")
+        return configs[name]
+
+    def for_role(self, role: Optional[str]) -> Optional[AgentConfig]:
+        """Config of the role's spec file, or None for roles without one"""
+        spec_file = ROLE_SPEC_FILES.get((role or "").strip().lower())
+        if not spec_file or not os.path.exists(self.path(spec_file)):
+            return None
+        return self.get(spec_file)
+
+    def clear(self):
+        with self._lock:
+            self._compiled.clear()
+
+
+# Shared loader; runs of the same spec reuse its compiled config
+agent_spec_loader = AgentSpecLoader()
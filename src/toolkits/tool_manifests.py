@@ -0,0 +1,164 @@
+import os
+import re
+import math
+import fnmatch
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+# Keep only this many Azure DevOps tools per run, the ones most relevant to the request (0 = keep the whole manifest)
+tool_retrieval_top_k = int(os.getenv('REA_TOOL_RETRIEVAL_TOP_K', '0'))
+
+# Azure DevOps tool groups: name -> (module, factory). A group's module is imported and
+# its connector created only when a run first needs the group.
+AZDO_TOOL_GROUPS = {
+    "work_items": ("src.tools.azure_devops.workitemtools", "create_azdo_work_items_tools"),
+    "repositories": ("src.tools.azure_devops.repositrytools", "create_azdo_repositories_tools"),
+    # "pipelines": ("src.tools.azure_devops.pipelinetools", "create_azdo_pipelines_tools"),
+    "additional_services": ("src.tools.azure_devops.misctools", "create_azdo_additional_services_tools"),
+    "team_capacity": ("src.tools.azure_devops.capacitytools", "create_team_capacity_tools"),
+}
+
+# Spec tool names for the local tools
+LOCAL_TOOL_ALIASES = {
+    "local-write-file": ("write_create_file", "patch_file", "write_files_batch"),
+    "local-read-file": ("read_file",),
+    "local-list-files": ("list_files", "search_files"),
+    "human-input": ("human_input",),
+}
+
+# Spec tool entries for Azure DevOps: "azure-devops" (every group), "azure-devops/<group>" or
+# "azure-devops/<group>/<tool name or pattern>"
+AZDO_SELECTOR = "azure-devops"
+
+# Group of the tools that are not Azure DevOps tools
+LOCAL_GROUP = "local"
+
+
+class ToolManifest:
+    """
+    The tools one role exposes, from the `tools` list of its agent spec.
+
+    Entries select Azure DevOps tool groups or tools in a group (which decides the
+    groups that get built), local tools by their spec alias, or any tool by name or
+    fnmatch pattern; entries starting with "!" remove tools again.
+    """
+
+    def __init__(self, entries: Sequence[str], known_groups: Iterable[str] = AZDO_TOOL_GROUPS):
+        known_groups = list(known_groups)
+        self.entries = list(entries)
+        self.groups: List[str] = []
+        # (group or None for any group, tool name pattern)
+        self._includes: List[Tuple[Optional[str], str]] = []
+        self._excludes: List[str] = []
+        for entry in self.entries:
+            if not isinstance(entry, str) or not entry.strip():
+                continue
+            entry = entry.strip()
+            if entry.startswith("!"):
+                self._excludes.append(entry[1:].strip())
+            elif entry in LOCAL_TOOL_ALIASES:
+                self._includes.extend((LOCAL_GROUP, name) for name in LOCAL_TOOL_ALIASES[entry])
+            elif entry == AZDO_SELECTOR or entry.startswith(AZDO_SELECTOR + "/"):
+                _, _, rest = entry.partition("/")
+                group, _, pattern = rest.partition("/")
+                groups = [group] if group else known_groups
+                for name in groups:
+                    if name not in known_groups:
+                        raise ValueError(f"Unknown Azure DevOps tool group '{name}' in '{entry}' (known: {', '.join(known_groups)})")
+                    if name not in self.groups:
+                        self.groups.append(name)
+                    self._includes.append((name, pattern or "*"))
+            else:
+                self._includes.append((None, entry))
+
+    def allows(self, tool_name: str, group: str = LOCAL_GROUP) -> bool:
+        if any(fnmatch.fnmatchcase(tool_name, pattern) for pattern in self._excludes):
+            return False
+        return any((included is None or included == group) and fnmatch.fnmatchcase(tool_name, pattern)
+                   for included, pattern in self._includes)
+
+    def filter(self, tools: list, group: str = LOCAL_GROUP) -> list:
+        return [tool for tool in tools if self.allows(tool.name, group)]
+
+    def check(self, tools_by_group: Dict[str, list]):
+        """Raises ValueError for entries that match none of the tools (group -> built tools)"""
+        unmatched = []
+        for entry in self.entries:
+            if not isinstance(entry, str) or not entry.strip():
+                continue
+            entry = entry.strip()
+            if entry.startswith("!"):
+                patterns = [(None, entry[1:].strip())]
+            elif entry in LOCAL_TOOL_ALIASES:
+                patterns = [(LOCAL_GROUP, name) for name in LOCAL_TOOL_ALIASES[entry]]
+            elif entry == AZDO_SELECTOR or entry.startswith(AZDO_SELECTOR + "/"):
+                _, _, rest = entry.partition("/")
+                group, _, pattern = rest.partition("/")
+                patterns = [(group or None, pattern or "*")]
+            else:
+                patterns = [(None, entry)]
+            if not any(fnmatch.fnmatchcase(tool.name, pattern)
+                       for group, pattern in patterns
+                       for tools_group, tools in tools_by_group.items() if group is None or group == tools_group
+                       for tool in tools):
+                unmatched.append(entry)
+        if unmatched:
+            raise ValueError(f"Tool entries matching no tool: {', '.join(unmatched)}")
+
+
+# Request words and the words tool names and descriptions use for the same thing
+_SYNONYMS = {
+    "sprint": "iteration",
+    "story": "work item",
+    "stories": "work item",
+    "task": "work item",
+    "bug": "work item",
+    "feature": "work item",
+    "epic": "work item",
+    "backlog": "backlog work item",
+    "assign": "assign capacity",
+    "member": "team member",
+    "commit": "commits repository",
+    "committing": "commits repository",
+    "code": "repository commits pull request",
+    "review": "pull request reviewers threads",
+    "standup": "comments",
+}
+
+
+def _tokens(text: str) -> List[str]:
+    words = re.findall(r"[a-z0-9]+", (text or "").lower().replace("_", " "))
+    expanded = []
+    for word in words:
+        expanded.extend(_SYNONYMS.get(word, word).split())
+    return [word[:-1] if len(word) > 3 and word.endswith("s") else word for word in expanded]
+
+
+def retrieve_tools(tools: list, query: str, top_k: int) -> list:
+    """
+    The top_k tools most relevant to the query (BM25 over tool names and descriptions),
+    in their original order. Returns all tools when top_k is 0 or covers them.
+    """
+    if top_k <= 0 or len(tools) <= top_k:
+        return list(tools)
+    documents = [Counter(_tokens(f"{tool.name} {tool.name} {tool.description}")) for tool in tools]
+    average_length = sum(sum(document.values()) for document in documents) / len(documents)
+    frequencies: Dict[str, int] = Counter(term for document in documents for term in document)
+    query_terms = set(_tokens(query))
+
+    def score(document: Counter) -> float:
+        length = sum(document.values())
+        total = 0.0
+        for term in query_terms:
+            count = document.get(term, 0)
+            if count:
+                idf = math.log(1 + (len(documents) - frequencies[term] + 0.5) / (frequencies[term] + 0.5))
+                total += idf * count * 2.2 / (count + 1.2 * (0.25 + 0.75 * length / average_length))
+        return total
+
+    ranked = sorted(range(len(tools)), key=lambda index: (-score(documents[index]), index))[:top_k]
+    return [tools[index] for index in sorted(ranked)]
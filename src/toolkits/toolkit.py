@@ -1,15 +1,16 @@
 import os
+import importlib
+from functools import lru_cache
 from typing import Optional
 from dotenv import load_dotenv
 load_dotenv()
 
-from src.tools.azure_devops.workitemtools import create_azdo_work_items_tools
-from src.tools.azure_devops.repositrytools import create_azdo_repositories_tools
-from src.tools.azure_devops.pipelinetools import create_azdo_pipelines_tools
-from src.tools.azure_devops.misctools import create_azdo_additional_services_tools
-from src.tools.local_tools.editor_tools import get_writer_tool, get_file_lister_tool, get_reader_tool
+from src.tools.local_tools.editor_tools import get_writer_tool, get_file_lister_tool, get_reader_tool, get_patch_tool, get_batch_writer_tool
+from src.tools.local_tools.search_tools import get_search_tool
 from src.tools.local_tools.human_in_loop_tool import get_approval_tool
-from src.tools.azure_devops.capacitytools import create_team_capacity_tools
+from src.utils.tool_metrics import instrument_tools
+from src.toolkits.tool_manifests import AZDO_TOOL_GROUPS, LOCAL_GROUP, ToolManifest, retrieve_tools, tool_retrieval_top_k
+from src.agents.spec_loader import agent_spec_loader
 
 
 # Configuration
@@ -18,18 +19,63 @@ personal_access_token = os.getenv('AZURE_DEVOPS_PERSONAL_ACCESS_TOKEN', 'your-pa
 project_name = os.getenv('PROJECT_NAME', 'YourProject')
 
 
-def get_azdo_tool_kit():
-    """Returns a list of Azure DevOps tools and local file operation tools."""
-    tools = []
 
-    # Add Azure DevOps tools
-    tools.extend(create_azdo_work_items_tools(organization_url, personal_access_token, project_name))
-    tools.extend(create_azdo_repositories_tools(organization_url, personal_access_token, project_name))
-    # tools.extend(create_azdo_pipelines_tools(organization_url, personal_access_token, project_name))
-    tools.extend(create_azdo_additional_services_tools(organization_url, personal_access_token, project_name))
-    tools.extend(create_team_capacity_tools(organization_url, personal_access_token, project_name))
+def get_role_tool_manifest(role: Optional[str] = None) -> Optional[ToolManifest]:
+    """Tool manifest from the role's agent spec, or None (every tool) for roles without one."""
+    config = agent_spec_loader.for_role(role)
+    return config.tool_manifest if config else None
+
+def get_role_tool_groups(role: Optional[str] = None) -> tuple:
+    """Names of the Azure DevOps tool groups a role exposes (from its tool manifest; every group without one)."""
+    manifest = get_role_tool_manifest(role)
+    return tuple(manifest.groups) if manifest else tuple(AZDO_TOOL_GROUPS)
+
+
+@lru_cache(maxsize=None)
+def _build_azdo_tool_group(group: str, project: str) -> tuple:
+    """Builds one Azure DevOps tool group for one project once; concurrent runs share the tools and their connector."""
+    module_name, factory_name = AZDO_TOOL_GROUPS[group]
+    factory = getattr(importlib.import_module(module_name), factory_name)
+    return tuple(instrument_tools(factory(organization_url, personal_access_token, project)))
+
+def get_azdo_tool_kit(project: Optional[str] = None, role: Optional[str] = None, manifest: Optional[ToolManifest] = None):
+    """Returns the Azure DevOps tools in the manifest (default: the role's; all tools without one) for the given project (defaults to PROJECT_NAME)."""
+    manifest = manifest or get_role_tool_manifest(role)
+    tools = []
+    for group in (manifest.groups if manifest else AZDO_TOOL_GROUPS):
+        group_tools = list(_build_azdo_tool_group(group, project or project_name))
+        tools.extend(manifest.filter(group_tools, group) if manifest else group_tools)
     return tools
 
+def get_role_tool_kit(project: Optional[str] = None, role: Optional[str] = None, request: Optional[str] = None,
+                      top_k: int = tool_retrieval_top_k, manifest: Optional[ToolManifest] = None):
+    """
+    Returns the Azure DevOps and local tools in the manifest (default: the role's). With top_k, only
+    the top_k Azure DevOps tools most relevant to the request are kept (local tools always are).
+    """
+    manifest = manifest or get_role_tool_manifest(role)
+    if manifest is None:
+        azdo_tools = get_azdo_tool_kit(project)
+        if request and top_k:
+            azdo_tools = retrieve_tools(azdo_tools, request, top_k)
+        return azdo_tools + get_local_tool_kit()
+
+    tools_by_group = {group: list(_build_azdo_tool_group(group, project or project_name)) for group in manifest.groups}
+    tools_by_group[LOCAL_GROUP] = get_local_tool_kit()
+    # A misspelt or foreign entry (e.g. an MCP tool name) fails the run instead of silently dropping tools
+    manifest.check(tools_by_group)
+    azdo_tools = [tool for group in manifest.groups for tool in manifest.filter(tools_by_group[group], group)]
+    local_tools = manifest.filter(tools_by_group[LOCAL_GROUP])
+    if not azdo_tools and not local_tools:
+        raise ValueError("The tool manifest selects no tools")
+    if request and top_k:
+        azdo_tools = retrieve_tools(azdo_tools, request, top_k)
+    return azdo_tools + local_tools
+
+def check_tool_manifest(manifest: ToolManifest, project: Optional[str] = None) -> int:
+    """Builds a manifest's tools; raises ValueError if an entry matches no tool or nothing is selected. Returns the tool count."""
+    return len(get_role_tool_kit(project, manifest=manifest))
+
 def get_local_tool_kit(folders_to_omit: Optional[list] = None):
     """Returns a list of local file operation tools."""
     
@@ -37,8 +83,11 @@ def get_local_tool_kit(folders_to_omit: Optional[list] = None):
         folders_to_omit = ["node_modules", ".git", "__pycache__", "venv", ".venv", "env", ".env","dump"]
     tools = [
         get_writer_tool(),
+        get_patch_tool(),
+        get_batch_writer_tool(),
         get_reader_tool(),
         get_file_lister_tool(folders_to_omit),
+        get_search_tool(folders_to_omit),
         get_approval_tool()
     ]
-    return tools
\ No newline at end of file
+    return instrument_tools(tools)
\ No newline at end of file
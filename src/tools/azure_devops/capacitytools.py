@@ -1,11 +1,17 @@
 import os
-from typing import List, Dict, Optional, Any
+from datetime import date
+from typing import List, Dict, Optional, Any, Tuple
 from dotenv import load_dotenv
 from langchain.tools import Tool
-from azure.devops.connection import Connection
-from msrest.authentication import BasicAuthentication
+from src.utils.azdo_connection import get_connection
+from src.utils.rate_limiter import azdo_rate_limiter
+from src.utils.iteration_cache import team_iteration_cache
+from src.utils.identity_resolver import identity_resolver
+from src.utils.capacity_planner import CapacityPlan
+from src.utils.assignment_solver import solve_assignment
+from src.utils.wit_batch import update_work_items_batch
 from azure.devops.v7_0.work.models import TeamContext
-import time
+from azure.devops.v7_0.work_item_tracking.models import Wiql
 
 load_dotenv()
 
@@ -14,6 +20,14 @@ organization_url = os.getenv('AZURE_ORG_URL', 'https://dev.azure.com/yourorg')
 personal_access_token = os.getenv('AZURE_DEVOPS_PERSONAL_ACCESS_TOKEN', 'your-pat-token')
 project_name = os.getenv('PROJECT_NAME', 'YourProject')
 
+# Work items in these states no longer count against capacity
+CLOSED_STATES = ('Closed', 'Done', 'Removed')
+# Fields read for each work item when computing load
+LOAD_FIELDS = ['System.Id', 'System.Title', 'System.WorkItemType', 'System.State', 'System.AssignedTo',
+               'System.IterationPath', 'Microsoft.VSTS.Scheduling.RemainingWork',
+               'Microsoft.VSTS.Scheduling.OriginalEstimate', 'Microsoft.VSTS.Common.Activity',
+               'Microsoft.VSTS.Common.Priority']
+
 
 class AzureDevOpsTeamCapacityConnector:
     """Azure DevOps Team Members and Capacity Connector using PAT authentication"""
@@ -21,10 +35,10 @@ class AzureDevOpsTeamCapacityConnector:
     def __init__(self, organization_url: str, personal_access_token: str, project_name: str):
         self.organization_url = organization_url
         self.project_name = project_name
-        credentials = BasicAuthentication('', personal_access_token)
-        self.connection = Connection(base_url=organization_url, creds=credentials)
+        self.connection = get_connection(organization_url, personal_access_token)
         self.work_client = self.connection.clients.get_work_client()
         self.core_client = self.connection.clients.get_core_client()
+        self.wit_client = self.connection.clients.get_work_item_tracking_client()
     
     def get_team_members(self, team_name: str) -> str:
         """
@@ -38,11 +52,12 @@ class AzureDevOpsTeamCapacityConnector:
         """
         try:
             # Get team members
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             team_members = self.core_client.get_team_members_with_extended_properties(
                 project_id=self.project_name,
                 team_id=team_name
             )
+            identity_resolver.warm_from_team_members(self.connection, team_members)
             
             if not team_members:
                 return f"No team members found for team '{team_name}'"
@@ -72,24 +87,14 @@ class AzureDevOpsTeamCapacityConnector:
         
         Args:
             team_name: Name of the team
-            iteration_name: Name of the iteration (e.g., 'Sprint 1')
+            iteration_name: Name or path of the iteration (e.g., 'Sprint 1'), or '@CurrentIteration'
             
         Returns:
             Iteration GUID or None if not found
         """
         try:
-            time.sleep(5)  # To avoid rate limiting
-            team_context = TeamContext(project=self.project_name, team=team_name)
-            
-            # Get all iterations for the team
-            iterations = self.work_client.get_team_iterations(team_context=team_context)
-            
-            # Find the iteration by name
-            for iteration in iterations:
-                if iteration.name == iteration_name:
-                    return iteration.id
-            
-            return None
+            iteration = team_iteration_cache.get(self.work_client, self.project_name, team_name).find(iteration_name)
+            return iteration.id if iteration else None
             
         except Exception as e:
             raise Exception(f"Error retrieving iteration ID: {str(e)}")
@@ -107,30 +112,27 @@ class AzureDevOpsTeamCapacityConnector:
             Formatted string with capacity details for each team member
         """
         try:
-            time.sleep(5)  # To avoid rate limiting
-            # First, get the iteration GUID from the name
-            iteration_id = self.get_iteration_id(team_name, iteration_name)
-            
-            if not iteration_id:
-                # Try to list available iterations to help the user
-                team_context = TeamContext(project=self.project_name, team=team_name)
-                iterations = self.work_client.get_team_iterations(team_context=team_context)
-                available = ', '.join([f"'{it.name}'" for it in iterations])
+            # First, get the iteration GUID from the name (team iterations are cached)
+            iterations = team_iteration_cache.get(self.work_client, self.project_name, team_name)
+            iteration = iterations.find(iteration_name)
+            
+            if not iteration:
+                # List available iterations to help the user
+                available = ', '.join([f"'{name}'" for name in iterations.names()])
                 return (f"Iteration '{iteration_name}' not found for team '{team_name}'. "
                     f"Available iterations: {available}")
             
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             team_context = TeamContext(project=self.project_name, team=team_name)
-            print(iteration_id)
             # Use the GUID to get capacities
             team_capacity = self.work_client.get_capacities_with_identity_ref_and_totals(
                 team_context=team_context,
-                iteration_id=iteration_id
+                iteration_id=iteration.id
             )
-            print(team_capacity)
             if not team_capacity or not team_capacity.team_members:
-                return f"No capacity information found for team '{team_name}' in iteration '{iteration_name}'"
+                return f"No capacity information found for team '{team_name}' in iteration '{iteration.name}'"
             
-            result = f"Team Capacity for '{team_name}' - Iteration '{iteration_name}':\n\n"
+            result = f"Team Capacity for '{team_name}' - Iteration '{iteration.name}':\n\n"
             
             for capacity in team_capacity.team_members:
                 team_member = capacity.team_member
@@ -168,6 +170,229 @@ class AzureDevOpsTeamCapacityConnector:
         except Exception as e:
             return f"Error retrieving team capacity: {str(e)}"
 
+    @staticmethod
+    def _identity_keys(identity: Any) -> List[str]:
+        """Keys an identity can be matched by (id, unique name, display name), from an IdentityRef or a field dict"""
+        if isinstance(identity, dict):
+            values = [identity.get('id'), identity.get('uniqueName'), identity.get('displayName')]
+        elif isinstance(identity, str):
+            values = [identity]
+        else:
+            values = [getattr(identity, 'id', None), getattr(identity, 'unique_name', None), getattr(identity, 'display_name', None)]
+        return [str(value).lower() for value in values if value]
+
+    def get_iteration_work_items(self, iteration_path: str, fields: List[str] = LOAD_FIELDS) -> List[Any]:
+        """Open work items under an iteration path, read in batches of 200"""
+        azdo_rate_limiter.acquire()  # To avoid rate limiting
+        closed = ', '.join(f"'{state}'" for state in CLOSED_STATES)
+        wiql = Wiql(query=(
+            "SELECT [System.Id] FROM WorkItems "
+            f"WHERE [System.TeamProject] = '{self.project_name}' "
+            f"AND [System.IterationPath] UNDER '{iteration_path}' "
+            f"AND [System.State] NOT IN ({closed})"
+        ))
+        ids = [item.id for item in self.wit_client.query_by_wiql(wiql).work_items or []]
+        work_items = []
+        for offset in range(0, len(ids), 200):
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
+            work_items.extend(self.wit_client.get_work_items(ids=ids[offset:offset + 200], fields=fields, error_policy='omit'))
+        return [item for item in work_items if item is not None]
+
+    def build_capacity_plan(self, team_name: str, iteration_name: str,
+                            today: Optional[date] = None) -> Tuple[CapacityPlan, Any, List[Any], List[Any]]:
+        """
+        Capacity arrays for a team's iteration, from the capacity, team days off and team
+        settings APIs, with the open work items' RemainingWork loaded against them.
+
+        Returns:
+            (plan, iteration, team members' IdentityRefs in plan row order, open work items)
+        """
+        iterations = team_iteration_cache.get(self.work_client, self.project_name, team_name)
+        iteration = iterations.find(iteration_name)
+        if not iteration:
+            available = ', '.join([f"'{name}'" for name in iterations.names()])
+            raise ValueError(f"Iteration '{iteration_name}' not found for team '{team_name}'. Available iterations: {available}")
+        attributes = iteration.attributes
+        if not attributes or not attributes.start_date or not attributes.finish_date:
+            raise ValueError(f"Iteration '{iteration.name}' has no start and finish dates")
+
+        team_context = TeamContext(project=self.project_name, team=team_name)
+        azdo_rate_limiter.acquire()  # To avoid rate limiting
+        team_capacity = self.work_client.get_capacities_with_identity_ref_and_totals(
+            team_context=team_context, iteration_id=iteration.id)
+        azdo_rate_limiter.acquire()  # To avoid rate limiting
+        team_days_off = self.work_client.get_team_days_off(team_context=team_context, iteration_id=iteration.id)
+        azdo_rate_limiter.acquire()  # To avoid rate limiting
+        settings = self.work_client.get_team_settings(team_context=team_context)
+
+        capacities = (team_capacity.team_members if team_capacity else None) or []
+        members = [capacity.team_member for capacity in capacities]
+        identity_resolver.remember(self.connection, members)
+        activities = sorted({activity.name or '' for capacity in capacities for activity in capacity.activities or []}) or ['']
+        activity_index = {name.lower(): index for index, name in enumerate(activities)}
+        capacity_per_day = [[0.0] * len(activities) for _ in members]
+        member_days_off = []
+        for row, capacity in enumerate(capacities):
+            for activity in capacity.activities or []:
+                capacity_per_day[row][activity_index[(activity.name or '').lower()]] += activity.capacity_per_day or 0
+            for day_off in capacity.days_off or []:
+                member_days_off.append((row, day_off.start.date(), day_off.end.date()))
+
+        team_days_off = (team_days_off.days_off if team_days_off else None) or []
+        plan = CapacityPlan(
+            members=[member.display_name for member in members],
+            activities=activities,
+            capacity_per_day=capacity_per_day,
+            start=attributes.start_date.date(),
+            finish=attributes.finish_date.date(),
+            # Team settings list the working days; Monday to Friday when not set
+            **({"working_days": [str(day) for day in settings.working_days]} if settings and settings.working_days else {}),
+            team_days_off=[(day_off.start.date(), day_off.end.date()) for day_off in team_days_off],
+            member_days_off=member_days_off,
+            from_date=today or date.today(),
+        )
+
+        work_items = self.get_iteration_work_items(iteration.path)
+        rows, columns = self._plan_positions(plan, members, work_items)
+        plan.add_load(rows, columns, [(item.fields or {}).get('Microsoft.VSTS.Scheduling.RemainingWork') or 0 for item in work_items])
+        return plan, iteration, members, work_items
+
+    def _plan_positions(self, plan: CapacityPlan, members: List[Any], work_items: List[Any]) -> Tuple[List[int], List[int]]:
+        """Plan row of each item's assignee and column of its activity (-1 when unassigned, unknown or not set)"""
+        member_index = {}
+        for row, member in enumerate(members):
+            for key in self._identity_keys(member):
+                member_index.setdefault(key, row)
+        activity_index = {name.lower(): index for index, name in enumerate(plan.activities)}
+        rows, columns = [], []
+        for item in work_items:
+            fields = item.fields or {}
+            assigned_to = fields.get('System.AssignedTo')
+            rows.append(next((member_index[key] for key in self._identity_keys(assigned_to) if key in member_index), -1)
+                        if assigned_to else -1)
+            columns.append(activity_index.get(str(fields.get('Microsoft.VSTS.Common.Activity') or '').lower(), -1))
+        return rows, columns
+
+    def get_team_capacity_vs_load(self, team_name: str, iteration_name: str) -> str:
+        """
+        Compare each member's remaining capacity in an iteration with the remaining work assigned to them
+        
+        Args:
+            team_name: Name of the team
+            iteration_name: Name or path of the iteration (e.g., 'Sprint 1'), or '@CurrentIteration'
+            
+        Returns:
+            Table of available days, capacity, assigned work, utilization and overload per member
+        """
+        try:
+            plan, iteration, _, work_items = self.build_capacity_plan(team_name, iteration_name)
+            return plan.table(f"Capacity vs. load for '{team_name}' - Iteration '{iteration.name}' "
+                              f"({len(work_items)} open work items):")
+        except ValueError as e:
+            return str(e)
+        except Exception as e:
+            return f"Error computing team capacity vs. load: {str(e)}"
+
+    def assign_work_items_by_capacity(self, team_name: str, iteration_name: str,
+                                      work_items: Optional[List[Any]] = None, dry_run: bool = False,
+                                      allow_overload: bool = False) -> str:
+        """
+        Assign work items to team members by capacity and apply all assignments in one batch update
+        
+        Args:
+            team_name: Name of the team
+            iteration_name: Name or path of the iteration (e.g., 'Sprint 1'), or '@CurrentIteration'
+            work_items: Work item ids, or dicts {'id', 'estimate' (hours), 'activity'} overriding the item's fields;
+                        default: the iteration's open unassigned items
+            dry_run: Only return the proposed assignment
+            allow_overload: Assign items that fit nobody's free capacity to the least utilized member anyway
+            
+        Returns:
+            Assignment per item, items left unassigned and the team's capacity after the assignment
+        """
+        try:
+            plan, iteration, members, open_items = self.build_capacity_plan(team_name, iteration_name)
+            if not members:
+                return f"No capacity information found for team '{team_name}' in iteration '{iteration.name}'"
+
+            overrides, not_found = {}, []
+            if work_items is None:
+                items = [item for item in open_items if not (item.fields or {}).get('System.AssignedTo')]
+            else:
+                for entry in work_items:
+                    entry = entry if isinstance(entry, dict) else {'id': entry}
+                    overrides[int(entry['id'])] = entry
+                open_by_id = {item.id: item for item in open_items}
+                missing = [work_item_id for work_item_id in overrides if work_item_id not in open_by_id]
+                fetched = []
+                for offset in range(0, len(missing), 200):
+                    azdo_rate_limiter.acquire()  # To avoid rate limiting
+                    fetched.extend(self.wit_client.get_work_items(ids=missing[offset:offset + 200], fields=LOAD_FIELDS, error_policy='omit'))
+                by_id = {**open_by_id, **{item.id: item for item in fetched if item is not None}}
+                items = [by_id[work_item_id] for work_item_id in overrides if work_item_id in by_id]
+                not_found = [work_item_id for work_item_id in overrides if work_item_id not in by_id]
+                # Items being reassigned no longer count against their current assignee
+                current = [item for item in items if item.id in open_by_id]
+                rows, columns = self._plan_positions(plan, members, current)
+                plan.add_load(rows, columns, [-((item.fields or {}).get('Microsoft.VSTS.Scheduling.RemainingWork') or 0) for item in current])
+            if not items:
+                return f"No work items to assign in iteration '{iteration.name}' for team '{team_name}'"
+
+            activity_index = {name.lower(): index for index, name in enumerate(plan.activities)}
+            estimates, activities, priorities, skipped = [], [], [], []
+            for item in items:
+                fields = item.fields or {}
+                override = overrides.get(item.id, {})
+                estimate = override.get('estimate', fields.get('Microsoft.VSTS.Scheduling.RemainingWork')
+                                        or fields.get('Microsoft.VSTS.Scheduling.OriginalEstimate'))
+                activity = override.get('activity', fields.get('Microsoft.VSTS.Common.Activity')) or ''
+                estimates.append(float(estimate or 0))
+                activities.append(activity_index.get(activity.lower(), -1))
+                priorities.append(fields.get('Microsoft.VSTS.Common.Priority') or 4)
+                if not estimate:
+                    skipped.append(item.id)
+            rows = solve_assignment(plan, estimates, activities, priorities, allow_overload=allow_overload)
+            rows[[index for index, item in enumerate(items) if item.id in skipped]] = -1
+
+            documents = {}
+            for item, row in zip(items, rows):
+                if row < 0:
+                    continue
+                member = members[row]
+                document = [{"op": "add", "path": "/fields/System.AssignedTo", "value": member.unique_name or member.display_name}]
+                item_path = str((item.fields or {}).get('System.IterationPath') or '')
+                if not (item_path.lower() + '\\').startswith(iteration.path.lower() + '\\'):
+                    document.append({"op": "add", "path": "/fields/System.IterationPath", "value": iteration.path})
+                documents[item.id] = document
+            results = {} if dry_run or not documents else update_work_items_batch(self.wit_client, documents)
+
+            result = (f"{'Proposed assignment' if dry_run else 'Assignment'} for '{team_name}' - Iteration '{iteration.name}' "
+                      f"({len(documents)} of {len(items)} work items assigned):\n\n")
+            applied_rows, applied_columns, applied_hours = [], [], []
+            for item, row, estimate, activity in zip(items, rows, estimates, activities):
+                fields = item.fields or {}
+                label = f"#{item.id} {fields.get('System.Title', '')} ({estimate:g}h{', ' + plan.activities[activity] if activity >= 0 and plan.activities[activity] else ''})"
+                if item.id in skipped:
+                    result += f"{label} -> not assigned: no estimate (RemainingWork/OriginalEstimate)\n"
+                elif row < 0:
+                    result += f"{label} -> not assigned: does not fit any member's free capacity\n"
+                elif not dry_run and not results[item.id][0]:
+                    result += f"{label} -> {plan.members[row]} FAILED: {results[item.id][1]}\n"
+                else:
+                    result += f"{label} -> {plan.members[row]}\n"
+                    applied_rows.append(row)
+                    applied_columns.append(activity)
+                    applied_hours.append(estimate)
+            for work_item_id in not_found:
+                result += f"#{work_item_id} -> not found\n"
+            plan.add_load(applied_rows, applied_columns, applied_hours)
+            result += "\n" + plan.table("Capacity after assignment:")
+            return result
+
+        except ValueError as e:
+            return str(e)
+        except Exception as e:
+            return f"Error assigning work items by capacity: {str(e)}"
 
 
 
@@ -209,12 +434,46 @@ def create_team_capacity_tools(
                 "Get team member capacities for a specific iteration/sprint. "
                 "CRITICAL: Input must be a dictionary string in this EXACT format: "
                 "{'team_name': '<team_name>', 'iteration_name': '<iteration_name>'} "
-                "Replace <team_name> with the actual team name and <iteration_name> with sprint name. "
+                "Replace <team_name> with the actual team name and <iteration_name> with sprint name, "
+                "iteration path or '@CurrentIteration'. "
                 "CORRECT example: {'team_name': 'aimetlab Team', 'iteration_name': 'Sprint 1'} "
                 "WRONG: Just passing team name without dict structure will fail. "
                 "Returns: capacity hours/day, activities, and days off for all team members."
             )
         ),
+
+        Tool(
+            name="work_get_team_capacity_vs_load",
+            func=lambda input_str: connector.get_team_capacity_vs_load(
+                **eval(input_str)
+            ),
+            description=(
+                "Check whether the team can take on the remaining work of an iteration/sprint. "
+                "Computes, for every team member, the working days left (days off removed), capacity hours, "
+                "assigned remaining work (RemainingWork of open items), utilization and overload, plus totals per activity "
+                "and unassigned work. Use this instead of adding up capacities yourself. "
+                "Input must be a dictionary string: {'team_name': '<team_name>', 'iteration_name': '<iteration_name>'} "
+                "where iteration_name is a sprint name, iteration path or '@CurrentIteration'. "
+                "Example: {'team_name': 'aimetlab Team', 'iteration_name': 'Sprint 1'}"
+            )
+        ),
+
+        Tool(
+            name="work_assign_work_items_by_capacity",
+            func=lambda input_str: connector.assign_work_items_by_capacity(
+                **eval(input_str)
+            ),
+            description=(
+                "Assign many work items to team members in ONE call, balanced by each member's free capacity and activity "
+                "(e.g. Development, Testing), and apply all assignments in a single batch update. Items not yet in the "
+                "iteration are moved into it. Use this instead of updating items one by one. "
+                "Input must be a dictionary string with keys: team_name, iteration_name (sprint name, path or '@CurrentIteration'), "
+                "work_items (optional: list of work item ids, or dicts {'id': <id>, 'estimate': <hours>, 'activity': '<activity>'}; "
+                "default: all open unassigned items of the iteration), dry_run (optional, True to only propose), "
+                "allow_overload (optional, True to assign items that fit nobody's free capacity anyway). "
+                "Example: {'team_name': 'aimetlab Team', 'iteration_name': 'Sprint 1', 'work_items': [101, 102, {'id': 103, 'estimate': 6, 'activity': 'Testing'}]}"
+            )
+        ),
     ]
     
     return tools
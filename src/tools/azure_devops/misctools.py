@@ -1,10 +1,12 @@
-import time
 import os
-from typing import List, Dict, Optional, Any
+import threading
+from typing import List, Dict, Optional, Any, Callable
 from dotenv import load_dotenv
 from langchain.tools import Tool
-from azure.devops.connection import Connection
-from msrest.authentication import BasicAuthentication
+from src.utils.azdo_connection import get_connection
+from src.utils.rate_limiter import azdo_rate_limiter
+from src.utils.iteration_cache import team_iteration_cache
+from src.utils.identity_resolver import identity_resolver
 from azure.devops.v7_0.test.models import (
     TestPlan,
     TestSuite,
@@ -41,22 +43,52 @@ class AzureDevOpsAdditionalServicesConnector:
     def __init__(self, organization_url: str, personal_access_token: str, project_name: str):
         self.organization_url = organization_url
         self.project_name = project_name
-        credentials = BasicAuthentication('', personal_access_token)
-        self.connection = Connection(base_url=organization_url, creds=credentials)
+        self.connection = get_connection(organization_url, personal_access_token)
         
-        # Initialize clients
-        self.test_client = self.connection.clients.get_test_client()
-        self.wiki_client = self.connection.clients.get_wiki_client()
-        self.work_client = self.connection.clients.get_work_client()
-        self.core_client = self.connection.clients.get_core_client()
-        self.wit_client = self.connection.clients.get_work_item_tracking_client()
-        self.build_client = self.connection.clients.get_build_client()
-        
-        # Search client (may need separate handling)
-        try:
-            self.search_client = self.connection.clients_v7_1.get_search_client()
-        except:
-            self.search_client = None
+        # Clients are created on first use: most tools here need one or two of them,
+        # and creating a client can cost a resource area lookup
+        self._clients: Dict[str, Any] = {}
+        self._clients_lock = threading.Lock()
+    
+    def _client(self, name: str, create: Callable[[], Any]) -> Any:
+        with self._clients_lock:
+            if name not in self._clients:
+                self._clients[name] = create()
+            return self._clients[name]
+    
+    @property
+    def test_client(self):
+        return self._client('test', self.connection.clients.get_test_client)
+    
+    @property
+    def wiki_client(self):
+        return self._client('wiki', self.connection.clients.get_wiki_client)
+    
+    @property
+    def work_client(self):
+        return self._client('work', self.connection.clients.get_work_client)
+    
+    @property
+    def core_client(self):
+        return self._client('core', self.connection.clients.get_core_client)
+    
+    @property
+    def wit_client(self):
+        return self._client('wit', self.connection.clients.get_work_item_tracking_client)
+    
+    @property
+    def build_client(self):
+        return self._client('build', self.connection.clients.get_build_client)
+    
+    @property
+    def search_client(self):
+        def create_search_client():
+            # Search client (may need separate handling)
+            try:
+                return self.connection.clients_v7_1.get_search_client()
+            except:
+                return None
+        return self._client('search', create_search_client)
     
     # ========== Advanced Security ==========
     
@@ -582,7 +614,7 @@ class AzureDevOpsAdditionalServicesConnector:
     def list_project_teams(self) -> str:
         """Retrieve a list of teams for the project"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             teams = self.core_client.get_teams(project_id=self.project_name)
             
             if not teams:
@@ -602,7 +634,7 @@ class AzureDevOpsAdditionalServicesConnector:
     def list_projects(self) -> str:
         """Retrieve a list of projects in the organization"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             projects = self.core_client.get_projects()
             
             if not projects:
@@ -625,28 +657,19 @@ class AzureDevOpsAdditionalServicesConnector:
     def get_identity_ids(self, unique_names: List[str]) -> str:
         """Retrieve Azure DevOps identity IDs for a list of unique names"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            identities = identity_resolver.resolve_many(self.connection, unique_names)
             result = f"Identity IDs for {len(unique_names)} users:\n\n"
             
             for name in unique_names:
-                try:
-                    # Search for identity
-                    identities = self.core_client.get_identities(
-                        search_filter='General',
-                        filter_value=name
-                    )
-                    
-                    if identities:
-                        identity = identities[0]
-                        result += f"Name: {name}\n"
-                        result += f"ID: {identity.id}\n"
-                        result += f"Display Name: {identity.display_name}\n"
-                        result += f"Unique Name: {identity.unique_name if hasattr(identity, 'unique_name') else 'N/A'}\n"
-                        result += "---\n"
-                    else:
-                        result += f"Name: {name} - Not found\n---\n"
-                except:
-                    result += f"Name: {name} - Error retrieving\n---\n"
+                identity = identities.get(str(name).strip())
+                if identity:
+                    result += f"Name: {name}\n"
+                    result += f"ID: {identity['id']}\n"
+                    result += f"Display Name: {identity['display_name']}\n"
+                    result += f"Unique Name: {identity['unique_name'] or 'N/A'}\n"
+                    result += "---\n"
+                else:
+                    result += f"Name: {name} - Not found\n---\n"
             
             return result
         except Exception as e:
@@ -657,9 +680,7 @@ class AzureDevOpsAdditionalServicesConnector:
     def list_team_iterations(self, team_name: str) -> str:
         """Retrieve iterations for a team"""
         try:
-            time.sleep(5)  # To avoid rate limiting
-            team_context = TeamContext(project=self.project_name, team=team_name)
-            iterations = self.work_client.get_team_iterations(team_context=team_context)
+            iterations = team_iteration_cache.get(self.work_client, self.project_name, team_name).iterations
             
             if not iterations:
                 return f"No iterations found for team '{team_name}'"
@@ -682,7 +703,7 @@ class AzureDevOpsAdditionalServicesConnector:
                          finish_date: str, path: str = None) -> str:
         """Create new iterations in the project"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Use work item tracking client to create iteration path
             full_path = f"{self.project_name}\\Iteration"
             if path:
@@ -712,7 +733,7 @@ class AzureDevOpsAdditionalServicesConnector:
     def assign_iterations(self, team_name: str, iteration_path: str) -> str:
         """Assign existing iterations to a team"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             team_context = TeamContext(project=self.project_name, team=team_name)
             
             iteration = TeamSettingsIteration()
@@ -722,6 +743,7 @@ class AzureDevOpsAdditionalServicesConnector:
                 iteration=iteration,
                 team_context=team_context
             )
+            team_iteration_cache.invalidate(self.work_client, self.project_name, team_name)
             
             return f"Successfully assigned iteration '{iteration_path}' to team '{team_name}'\n" \
                    f"ID: {assigned.id}\n" \
@@ -2,8 +2,7 @@ import os
 from typing import List, Dict, Optional, Any
 from dotenv import load_dotenv
 from langchain.tools import Tool
-from azure.devops.connection import Connection
-from msrest.authentication import BasicAuthentication
+from src.utils.azdo_connection import get_connection
 from azure.devops.v7_0.build.models import (
     Build,
     BuildDefinitionReference,
@@ -31,8 +30,7 @@ class AzureDevOpsPipelinesConnector:
     def __init__(self, organization_url: str, personal_access_token: str, project_name: str):
         self.organization_url = organization_url
         self.project_name = project_name
-        credentials = BasicAuthentication('', personal_access_token)
-        self.connection = Connection(base_url=organization_url, creds=credentials)
+        self.connection = get_connection(organization_url, personal_access_token)
         self.build_client = self.connection.clients.get_build_client()
         self.pipelines_client = self.connection.clients.get_pipelines_client()
     
@@ -2,8 +2,9 @@ import os
 from typing import List, Dict, Optional, Any
 from dotenv import load_dotenv
 from langchain.tools import Tool
-from azure.devops.connection import Connection
-from msrest.authentication import BasicAuthentication
+from src.utils.azdo_connection import get_connection
+from src.utils.rate_limiter import azdo_rate_limiter
+from src.utils.identity_resolver import identity_resolver
 from azure.devops.v7_0.git.models import (
     GitPullRequest,
     GitPullRequestSearchCriteria,
@@ -17,7 +18,6 @@ from azure.devops.v7_0.git.models import (
     GitRef
 )
 import json
-import time
 
 load_dotenv()
 
@@ -33,14 +33,13 @@ class AzureDevOpsRepositoriesConnector:
     def __init__(self, organization_url: str, personal_access_token: str, project_name: str):
         self.organization_url = organization_url
         self.project_name = project_name
-        credentials = BasicAuthentication('', personal_access_token)
-        self.connection = Connection(base_url=organization_url, creds=credentials)
+        self.connection = get_connection(organization_url, personal_access_token)
         self.git_client = self.connection.clients.get_git_client()
     
     def list_repos_by_project(self) -> str:
         """Retrieve a list of repositories for a given project"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             repos = self.git_client.get_repositories(project=self.project_name)
             
             if not repos:
@@ -64,7 +63,7 @@ class AzureDevOpsRepositoriesConnector:
                                                status: str = "active") -> str:
         """Retrieve a list of pull requests for a given repository or project"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Create search criteria
             search_criteria = GitPullRequestSearchCriteria()
             if status.lower() == "active":
@@ -112,7 +111,7 @@ class AzureDevOpsRepositoriesConnector:
     def list_branches_by_repo(self, repository_id: str) -> str:
         """Retrieve a list of branches for a given repository"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             refs = self.git_client.get_refs(
                 repository_id=repository_id,
                 project=self.project_name,
@@ -137,11 +136,10 @@ class AzureDevOpsRepositoriesConnector:
     def list_my_branches_by_repo(self, repository_id: str) -> str:
         """Retrieve a list of your branches for a given repository"""
         try:
-            time.sleep(5)  # To avoid rate limiting
             # Get current user's identity
-            connection_data = self.connection.get_connection_data()
-            user_id = connection_data.authenticated_user.id
+            user_id = identity_resolver.current_user(self.connection)['id']
             
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             refs = self.git_client.get_refs(
                 repository_id=repository_id,
                 project=self.project_name,
@@ -168,7 +166,7 @@ class AzureDevOpsRepositoriesConnector:
     def list_pull_requests_by_commits(self, repository_id: str, commit_ids: List[str]) -> str:
         """List pull requests associated with commits"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             all_prs = []
             
             for commit_id in commit_ids:
@@ -195,7 +193,7 @@ class AzureDevOpsRepositoriesConnector:
     def list_pull_request_threads(self, repository_id: str, pull_request_id: int) -> str:
         """Retrieve a list of comment threads for a pull request"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             threads = self.git_client.get_threads(
                 repository_id=repository_id,
                 pull_request_id=pull_request_id,
@@ -223,7 +221,7 @@ class AzureDevOpsRepositoriesConnector:
                                           pull_request_id: int, thread_id: int) -> str:
         """Retrieve a list of comments in a pull request thread"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             comments = self.git_client.get_comments(
                 repository_id=repository_id,
                 pull_request_id=pull_request_id,
@@ -250,7 +248,7 @@ class AzureDevOpsRepositoriesConnector:
     def get_repo_by_name_or_id(self, repository_name_or_id: str) -> str:
         """Get the repository by project and repository name or ID"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             repo = self.git_client.get_repository(
                 repository_id=repository_name_or_id,
                 project=self.project_name
@@ -273,7 +271,7 @@ class AzureDevOpsRepositoriesConnector:
     def get_branch_by_name(self, repository_id: str, branch_name: str) -> str:
         """Get a branch by its name"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Ensure branch name has proper prefix
             if not branch_name.startswith("refs/heads/"):
                 branch_name = f"refs/heads/{branch_name}"
@@ -310,7 +308,7 @@ class AzureDevOpsRepositoriesConnector:
     def get_pull_request_by_id(self, repository_id: str, pull_request_id: int) -> str:
         """Get a pull request by its ID"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             pr = self.git_client.get_pull_request(
                 repository_id=repository_id,
                 pull_request_id=pull_request_id,
@@ -345,7 +343,7 @@ class AzureDevOpsRepositoriesConnector:
                            is_draft: bool = False, reviewers: List[str] = None) -> str:
         """Create a new pull request"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Ensure branch names have proper format
             if not source_branch.startswith("refs/heads/"):
                 source_branch = f"refs/heads/{source_branch}"
@@ -363,7 +361,11 @@ class AzureDevOpsRepositoriesConnector:
             
             # Add reviewers if provided
             if reviewers:
-                pr.reviewers = [IdentityRefWithVote(id=reviewer_id) for reviewer_id in reviewers]
+                reviewer_ids = identity_resolver.resolve_ids(self.connection, reviewers)
+                not_found = [reviewer for reviewer, reviewer_id in reviewer_ids.items() if not reviewer_id]
+                if not_found:
+                    return f"Error creating pull request: reviewers not found: {', '.join(not_found)}"
+                pr.reviewers = [IdentityRefWithVote(id=reviewer_id) for reviewer_id in reviewer_ids.values()]
             
             created_pr = self.git_client.create_pull_request(
                 git_pull_request_to_create=pr,
@@ -382,7 +384,7 @@ class AzureDevOpsRepositoriesConnector:
                      base_commit_id: str) -> str:
         """Create a new branch in the repository"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Ensure branch name has proper format
             if not branch_name.startswith("refs/heads/"):
                 branch_name = f"refs/heads/{branch_name}"
@@ -414,7 +416,7 @@ class AzureDevOpsRepositoriesConnector:
                            is_draft: bool = None, target_branch: str = None) -> str:
         """Update various fields of an existing pull request"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Get existing PR
             existing_pr = self.git_client.get_pull_request(
                 repository_id=repository_id,
@@ -455,32 +457,42 @@ class AzureDevOpsRepositoriesConnector:
                                       remove_reviewers: List[str] = None) -> str:
         """Add or remove reviewers for an existing pull request"""
         try:
-            time.sleep(5)  # To avoid rate limiting
             results = []
+            # Resolve emails and names to identity ids in one go
+            reviewer_ids = identity_resolver.resolve_ids(self.connection, (add_reviewers or []) + (remove_reviewers or []))
             
             # Add reviewers
             if add_reviewers:
-                for reviewer_id in add_reviewers:
-                    reviewer = IdentityRefWithVote(id=reviewer_id)
+                for reviewer in add_reviewers:
+                    reviewer_id = reviewer_ids.get(str(reviewer).strip())
+                    if not reviewer_id:
+                        results.append(f"Reviewer not found: {reviewer}")
+                        continue
+                    azdo_rate_limiter.acquire()  # To avoid rate limiting
                     self.git_client.create_pull_request_reviewer(
-                        reviewer=reviewer,
+                        reviewer=IdentityRefWithVote(id=reviewer_id),
                         repository_id=repository_id,
                         pull_request_id=pull_request_id,
                         reviewer_id=reviewer_id,
                         project=self.project_name
                     )
-                    results.append(f"Added reviewer: {reviewer_id}")
+                    results.append(f"Added reviewer: {reviewer}")
             
             # Remove reviewers
             if remove_reviewers:
-                for reviewer_id in remove_reviewers:
+                for reviewer in remove_reviewers:
+                    reviewer_id = reviewer_ids.get(str(reviewer).strip())
+                    if not reviewer_id:
+                        results.append(f"Reviewer not found: {reviewer}")
+                        continue
+                    azdo_rate_limiter.acquire()  # To avoid rate limiting
                     self.git_client.delete_pull_request_reviewer(
                         repository_id=repository_id,
                         pull_request_id=pull_request_id,
                         reviewer_id=reviewer_id,
                         project=self.project_name
                     )
-                    results.append(f"Removed reviewer: {reviewer_id}")
+                    results.append(f"Removed reviewer: {reviewer}")
             
             return f"Successfully updated reviewers for PR #{pull_request_id}:\n" + "\n".join(results)
         except Exception as e:
@@ -490,7 +502,7 @@ class AzureDevOpsRepositoriesConnector:
                         thread_id: int, comment_text: str) -> str:
         """Reply to a specific comment on a pull request"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             comment = Comment(content=comment_text, comment_type=1)
             
             created_comment = self.git_client.create_comment(
@@ -511,7 +523,7 @@ class AzureDevOpsRepositoriesConnector:
                        thread_id: int) -> str:
         """Resolve a specific comment thread on a pull request"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Get the thread
             thread = self.git_client.get_pull_request_thread(
                 repository_id=repository_id,
@@ -540,7 +552,7 @@ class AzureDevOpsRepositoriesConnector:
                       to_date: str = None, max_results: int = 50) -> str:
         """Search for commits"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             search_criteria = GitQueryCommitsCriteria()
             
             if author:
@@ -578,7 +590,7 @@ class AzureDevOpsRepositoriesConnector:
                                    line_number: int = None) -> str:
         """Create a new comment thread on a pull request"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Create comment
             comment = Comment(content=comment_text, comment_type=1)
             
@@ -737,7 +749,7 @@ def create_azdo_repositories_tools(
                 "Create a new pull request. Input should be a Python dict string with keys: "
                 "repository_id (required, string), source_branch (required, string), target_branch (required, string), "
                 "title (required, string), description (optional, string), is_draft (optional, boolean), "
-                "reviewers (optional, list of reviewer IDs). "
+                "reviewers (optional, list of reviewer IDs, emails or display names). "
                 "Example: \"{'repository_id': 'my-repo', 'source_branch': 'feature/new', 'target_branch': 'main', "
                 "'title': 'Add new feature', 'description': 'This PR adds...', 'is_draft': False}\""
             )
@@ -778,7 +790,7 @@ def create_azdo_repositories_tools(
             description=(
                 "Add or remove reviewers for a pull request. Input should be a Python dict string with keys: "
                 "repository_id (required, string), pull_request_id (required, integer), "
-                "add_reviewers (optional, list of reviewer IDs), remove_reviewers (optional, list of reviewer IDs). "
+                "add_reviewers (optional, list of reviewer IDs or emails), remove_reviewers (optional, list of reviewer IDs or emails). "
                 "Example: \"{'repository_id': 'my-repo', 'pull_request_id': 123, "
                 "'add_reviewers': ['user1@contoso.com'], 'remove_reviewers': ['user2@contoso.com']}\""
             )
@@ -2,8 +2,9 @@ import os
 from typing import List, Dict, Optional, Any
 from dotenv import load_dotenv
 from langchain.tools import Tool
-from azure.devops.connection import Connection
-from msrest.authentication import BasicAuthentication
+from src.utils.azdo_connection import get_connection
+from src.utils.rate_limiter import azdo_rate_limiter
+from src.utils.wit_batch import create_work_items_batch, update_work_items_batch
 from azure.devops.v7_0.work_item_tracking.models import (
     Wiql, 
     JsonPatchOperation,
@@ -13,7 +14,6 @@ from azure.devops.v7_0.work_item_tracking.models import (
 )
 from azure.devops.v7_0.work.models import TeamContext
 import json
-import time
 load_dotenv()
 
 # Configuration
@@ -28,15 +28,14 @@ class AzureDevOpsWorkItemsConnector:
     def __init__(self, organization_url: str, personal_access_token: str, project_name: str):
         self.organization_url = organization_url
         self.project_name = project_name
-        credentials = BasicAuthentication('', personal_access_token)
-        self.connection = Connection(base_url=organization_url, creds=credentials)
+        self.connection = get_connection(organization_url, personal_access_token)
         self.wit_client = self.connection.clients.get_work_item_tracking_client()
         self.work_client = self.connection.clients.get_work_client()
     
     def my_work_items(self, max_results: int = 50) -> str:
         """Retrieve work items relevant to the authenticated user"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Query for work items assigned to the current user
             wiql_query = f"""
             SELECT [System.Id], [System.Title], [System.State], 
@@ -73,7 +72,7 @@ class AzureDevOpsWorkItemsConnector:
     def get_work_item(self, work_item_id: int) -> str:
         """Get a single work item by ID"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             work_item = self.wit_client.get_work_item(
                 id=work_item_id,
                 expand='All'
@@ -105,7 +104,7 @@ class AzureDevOpsWorkItemsConnector:
     def get_work_items_batch(self, work_item_ids: List[int]) -> str:
         """Retrieve multiple work items by IDs in batch"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             if not work_item_ids:
                 return "No work item IDs provided."
             
@@ -133,7 +132,7 @@ class AzureDevOpsWorkItemsConnector:
                         tags: str = "", priority: int = 2) -> str:
         """Create a new work item"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             document = []
             
             # Add title
@@ -184,10 +183,52 @@ class AzureDevOpsWorkItemsConnector:
         except Exception as e:
             return f"Error creating work item: {str(e)}"
     
+    def create_work_items_batch(self, work_items: List[Dict[str, Any]]) -> str:
+        """Create multiple work items in batch (one $batch request per 200 items)"""
+        try:
+            documents = []
+            for item in work_items:
+                document = [
+                    {"op": "add", "path": "/fields/System.Title", "value": item['title']},
+                    {"op": "add", "path": "/fields/Microsoft.VSTS.Common.Priority", "value": item.get('priority', 2)},
+                ]
+                
+                optional_fields = {
+                    'description': "/fields/System.Description",
+                    'assigned_to': "/fields/System.AssignedTo",
+                    'tags': "/fields/System.Tags"
+                }
+                for key, field_path in optional_fields.items():
+                    if item.get(key):
+                        document.append({"op": "add", "path": field_path, "value": item[key]})
+                
+                # Link to parent if provided
+                if item.get('parent_id'):
+                    document.append({
+                        "op": "add",
+                        "path": "/relations/-",
+                        "value": {
+                            "rel": "System.LinkTypes.Hierarchy-Reverse",
+                            "url": f"{self.organization_url}/{self.project_name}/_apis/wit/workItems/{item['parent_id']}"
+                        }
+                    })
+                
+                documents.append((item['work_item_type'], document))
+            
+            outcomes = create_work_items_batch(self.wit_client, self.project_name, documents)
+            results = [f"Created {item['work_item_type']} #{work_item_id}: {item['title']}"
+                       for item, (work_item_id, _) in zip(work_items, outcomes) if work_item_id is not None]
+            failures = [f"Failed to create {item['work_item_type']} '{item['title']}': {message}"
+                        for item, (work_item_id, message) in zip(work_items, outcomes) if work_item_id is None]
+            
+            return f"Successfully created {len(results)} work items:\n" + "\n".join(results + failures)
+        except Exception as e:
+            return f"Error creating work items in batch: {str(e)}"
+    
     def update_work_item(self, work_item_id: int, updates: Dict[str, Any]) -> str:
         """Update a work item with specified fields"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             document = []
             
             for field_path, value in updates.items():
@@ -214,7 +255,7 @@ class AzureDevOpsWorkItemsConnector:
     def add_work_item_comment(self, work_item_id: int, comment_text: str) -> str:
         """Add a comment to a work item"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             comment = CommentCreate(text=comment_text)
             result = self.wit_client.add_comment(
                 project=self.project_name,
@@ -229,7 +270,7 @@ class AzureDevOpsWorkItemsConnector:
     def list_work_item_comments(self, work_item_id: int) -> str:
         """Retrieve comments for a work item"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             comments = self.wit_client.get_comments(
                 project=self.project_name,
                 work_item_id=work_item_id
@@ -254,7 +295,7 @@ class AzureDevOpsWorkItemsConnector:
                             titles: List[str]) -> str:
         """Create child work items for a parent work item"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             results = []
             for title in titles:
                 # Create the child work item
@@ -300,7 +341,7 @@ class AzureDevOpsWorkItemsConnector:
                        link_type: str = "System.LinkTypes.Related") -> str:
         """Link two work items together"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             document = [
                 JsonPatchOperation(
                     op="add",
@@ -325,7 +366,7 @@ class AzureDevOpsWorkItemsConnector:
     def get_work_items_for_iteration(self, team_name: str, iteration_path: str) -> str:
         """Retrieve work items for a specific iteration"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             wiql_query = f"""
             SELECT [System.Id], [System.Title], [System.State], 
                    [System.WorkItemType], [System.AssignedTo]
@@ -358,7 +399,7 @@ class AzureDevOpsWorkItemsConnector:
     def list_backlogs(self, team_name: str) -> str:
         """Retrieve backlogs for a team"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             team_context = TeamContext(project=self.project_name, team=team_name)
             backlogs = self.work_client.get_backlogs(team_context)
             
@@ -377,7 +418,7 @@ class AzureDevOpsWorkItemsConnector:
     def get_backlog_work_items(self, team_name: str, backlog_id: str) -> str:
         """Retrieve work items for a specific backlog"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             team_context = TeamContext(project=self.project_name, team=team_name)
             backlog_items = self.work_client.get_backlog_level_work_items(
                 team_context=team_context,
@@ -406,7 +447,7 @@ class AzureDevOpsWorkItemsConnector:
     def query_work_items(self, wiql_query: str) -> str:
         """Execute a WIQL query to retrieve work items"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             wiql = Wiql(query=wiql_query)
             query_results = self.wit_client.query_by_wiql(wiql).work_items
             
@@ -430,7 +471,7 @@ class AzureDevOpsWorkItemsConnector:
                                        repository_id: str) -> str:
         """Link a work item to a pull request"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Construct the PR artifact URL
             pr_url = f"vstfs:///Git/PullRequestId/{self.project_name}%2F{repository_id}%2F{pull_request_id}"
             
@@ -461,7 +502,7 @@ class AzureDevOpsWorkItemsConnector:
     def get_work_item_type(self, work_item_type_name: str) -> str:
         """Get a specific work item type definition"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             work_item_type = self.wit_client.get_work_item_type(
                 project=self.project_name,
                 type=work_item_type_name
@@ -490,7 +531,7 @@ class AzureDevOpsWorkItemsConnector:
     def get_query(self, query_id_or_path: str) -> str:
         """Get a saved query by its ID or path"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Try to get by ID first, then by path
             try:
                 query = self.wit_client.get_query(
@@ -519,7 +560,7 @@ class AzureDevOpsWorkItemsConnector:
     def get_query_results_by_id(self, query_id: str) -> str:
         """Execute a saved query and retrieve results"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Get the query first
             query = self.wit_client.get_query(
                 project=self.project_name,
@@ -548,76 +589,63 @@ class AzureDevOpsWorkItemsConnector:
             return f"Error executing query: {str(e)}"
     
     def update_work_items_batch(self, updates_list: List[Dict[str, Any]]) -> str:
-        """Update multiple work items in batch"""
+        """Update multiple work items in batch (one $batch request per 200 items)"""
         try:
-            time.sleep(5)  # To avoid rate limiting
-            results = []
-            
+            documents = {}
             for update_item in updates_list:
-                work_item_id = update_item['work_item_id']
+                work_item_id = int(update_item['work_item_id'])
                 updates = update_item['updates']
                 
-                document = []
+                document = documents.setdefault(work_item_id, [])
                 for field_path, value in updates.items():
                     if not field_path.startswith("/fields/"):
                         field_path = f"/fields/{field_path}"
                     
-                    document.append(JsonPatchOperation(
-                        op="add",
-                        path=field_path,
-                        value=value
-                    ))
-                
-                work_item = self.wit_client.update_work_item(
-                    document=document,
-                    id=work_item_id,
-                    project=self.project_name
-                )
-                
-                results.append(f"Updated work item #{work_item_id}")
+                    document.append({"op": "add", "path": field_path, "value": value})
             
-            return f"Successfully updated {len(results)} work items:\n" + "\n".join(results)
+            outcomes = update_work_items_batch(self.wit_client, documents)
+            results = [f"Updated work item #{work_item_id}" for work_item_id, (updated, _) in outcomes.items() if updated]
+            failures = [f"Failed to update work item #{work_item_id}: {message}"
+                        for work_item_id, (updated, message) in outcomes.items() if not updated]
+            
+            return f"Successfully updated {len(results)} work items:\n" + "\n".join(results + failures)
         except Exception as e:
             return f"Error updating work items in batch: {str(e)}"
     
     def work_items_link_batch(self, links: List[Dict[str, Any]]) -> str:
-        """Link multiple work items together in batch"""
+        """Link multiple work items together in batch (one $batch request per 200 source items)"""
         try:
-            time.sleep(5)  # To avoid rate limiting
-            results = []
-            
+            documents = {}
             for link in links:
-                source_id = link['source_id']
                 target_id = link['target_id']
                 link_type = link.get('link_type', 'System.LinkTypes.Related')
-                
-                document = [
-                    JsonPatchOperation(
-                        op="add",
-                        path="/relations/-",
-                        value={
-                            "rel": link_type,
-                            "url": f"{self.organization_url}/{self.project_name}/_apis/wit/workItems/{target_id}"
-                        }
-                    )
-                ]
-                
-                self.wit_client.update_work_item(
-                    document=document,
-                    id=source_id,
-                    project=self.project_name
-                )
-                
-                results.append(f"Linked #{source_id} -> #{target_id} ({link_type})")
+                documents.setdefault(int(link['source_id']), []).append({
+                    "op": "add",
+                    "path": "/relations/-",
+                    "value": {
+                        "rel": link_type,
+                        "url": f"{self.organization_url}/{self.project_name}/_apis/wit/workItems/{target_id}"
+                    }
+                })
             
-            return f"Successfully created {len(results)} links:\n" + "\n".join(results)
+            outcomes = update_work_items_batch(self.wit_client, documents)
+            results, failures = [], []
+            for link in links:
+                updated, message = outcomes[int(link['source_id'])]
+                description = f"#{link['source_id']} -> #{link['target_id']} ({link.get('link_type', 'System.LinkTypes.Related')})"
+                if updated:
+                    results.append(f"Linked {description}")
+                else:
+                    failures.append(f"Failed to link {description}: {message}")
+            
+            return f"Successfully created {len(results)} links:\n" + "\n".join(results + failures)
         except Exception as e:
             return f"Error linking work items in batch: {str(e)}"
     
     def work_item_unlink(self, work_item_id: int, link_indices: List[int]) -> str:
         """Unlink one or many links from a work item"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # First get the work item to see its relations
             work_item = self.wit_client.get_work_item(
                 id=work_item_id,
@@ -653,7 +681,7 @@ class AzureDevOpsWorkItemsConnector:
                          artifact_id: str, artifact_name: str = "") -> str:
         """Link to artifacts like branch, pull request, commit, and build"""
         try:
-            time.sleep(5)  # To avoid rate limiting
+            azdo_rate_limiter.acquire()  # To avoid rate limiting
             # Construct artifact URL based on type
             artifact_urls = {
                 "branch": f"vstfs:///Git/Ref/{self.project_name}%2F{artifact_id}",
@@ -745,6 +773,20 @@ def create_azdo_work_items_tools(
             )
         ),
         
+        Tool(
+            name="wit_create_work_items_batch",
+            func=lambda input_str: connector.create_work_items_batch(
+                eval(input_str)
+            ),
+            description=(
+                "Create multiple work items in batch. Input should be a Python list of dicts, each with keys: "
+                "work_item_type (required), title (required), description (optional), assigned_to (optional), "
+                "tags (optional), priority (optional, default 2), parent_id (optional, integer - links as child). "
+                "Example: \"[{'work_item_type': 'User Story', 'title': 'Story 1', 'parent_id': 18}, "
+                "{'work_item_type': 'User Story', 'title': 'Story 2', 'parent_id': 18}]\""
+            )
+        ),
+        
         Tool(
             name="wit_update_work_item",
             func=lambda input_str: connector.update_work_item(
@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import queue
+import time
+import asyncio
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+approval_backend_name = os.getenv('REA_APPROVAL_BACKEND', 'cli')
+approval_timeout = float(os.getenv('REA_APPROVAL_TIMEOUT', '900'))
+approval_dir = os.getenv('REA_APPROVAL_DIR', 'approvals')
+# Auto-approve requests for the tools in READ_ONLY_TOOLS (off by default)
+auto_approve_read_only = os.getenv('REA_AUTO_APPROVE_READ_ONLY', 'false').lower() in ('1', 'true', 'yes')
+auto_approval_response = os.getenv('REA_AUTO_APPROVAL_RESPONSE', 'approved')
+
+# Tools that only read data. Whether a request is read-only is decided from this list,
+# never from the model's own description of the operation.
+READ_ONLY_TOOLS = frozenset({
+    "advsec_get_alert_details", "advsec_get_alerts",
+    "core_get_identity_ids", "core_list_project_teams", "core_list_projects",
+    "list_files", "read_file", "search_files",
+    "pipelines_get_build_changes", "pipelines_get_build_definition_revisions", "pipelines_get_build_definitions",
+    "pipelines_get_build_log", "pipelines_get_build_log_by_id", "pipelines_get_build_status", "pipelines_get_builds",
+    "pipelines_get_run", "pipelines_list_runs",
+    "repo_get_branch_by_name", "repo_get_pull_request_by_id", "repo_get_repo_by_name_or_id",
+    "repo_list_branches_by_repo", "repo_list_my_branches_by_repo", "repo_list_pull_request_thread_comments",
+    "repo_list_pull_request_threads", "repo_list_pull_requests_by_commits", "repo_list_pull_requests_by_repo_or_project",
+    "repo_list_repos_by_project", "repo_search_commits",
+    "search_code", "search_wiki", "search_workitem",
+    "testplan_list_test_cases", "testplan_list_test_plans", "testplan_show_test_results_from_build_id",
+    "wiki_get_page", "wiki_get_page_content", "wiki_get_wiki", "wiki_list_pages", "wiki_list_wikis",
+    "wit_get_query", "wit_get_query_results_by_id", "wit_get_work_item", "wit_get_work_item_type",
+    "wit_get_work_items_batch_by_ids", "wit_get_work_items_for_iteration", "wit_list_backlog_work_items",
+    "wit_list_backlogs", "wit_list_work_item_comments", "wit_my_work_items", "wit_query_work_items",
+    "work_get_team_capacity_for_iteration", "work_get_team_capacity_vs_load", "work_get_team_members",
+    "work_list_team_iterations",
+})
+
+
+def is_read_only_tool(tool_name: Optional[str]) -> bool:
+    return (tool_name or "").strip() in READ_ONLY_TOOLS
+
+
+class ApprovalBackend:
+    """
+    Channel through which an agent asks a human for approval/input.
+
+    request() waits asynchronously, so many agent runs can wait on humans at the
+    same time; it raises asyncio.TimeoutError when nobody answers in time.
+    """
+
+    async def request(self, request_id: str, payload: Dict[str, Any], timeout: float) -> Any:
+        raise NotImplementedError
+
+
+class CliApprovalBackend(ApprovalBackend):
+    """
+    Asks on the terminal. One daemon thread reads stdin lines into a queue; a request
+    prints its question and takes the next line typed after it. Lines typed while no
+    question is open (e.g. after a request timed out) are dropped, so they never answer
+    a later question.
+    """
+
+    # One question at a time, otherwise concurrent runs interleave on the terminal
+    _terminal_lock = threading.Lock()
+    _answers: "queue.Queue[str]" = queue.Queue()
+    _reader: Optional[threading.Thread] = None
+    _reader_lock = threading.Lock()
+    poll_interval = 0.1
+
+    @classmethod
+    def _read_lines(cls):
+        while True:
+            line = sys.stdin.readline()
+            if not line:
+                return
+            cls._answers.put(line.strip())
+
+    @classmethod
+    def _start_reader(cls):
+        with cls._reader_lock:
+            if cls._reader is None:
+                cls._reader = threading.Thread(target=cls._read_lines, name="rea-cli-approvals", daemon=True)
+                cls._reader.start()
+
+    @classmethod
+    def _drop_stale_answers(cls):
+        while True:
+            try:
+                cls._answers.get_nowait()
+            except queue.Empty:
+                return
+
+    async def request(self, request_id: str, payload: Dict[str, Any], timeout: float) -> Any:
+        self._start_reader()
+        deadline = time.monotonic() + timeout
+        # Wait for the terminal without blocking a thread, so a timeout never leaves a lock held
+        while not self._terminal_lock.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(self.poll_interval)
+        try:
+            self._drop_stale_answers()
+            print("\n" + "="*70)
+            print("🤖 AGENT QUESTION")
+            print("="*70)
+            print(f"\n{payload.get('operation_details', '')}\n")
+            print("="*70)
+            print("Your Input: ", end="", flush=True)
+            while True:
+                try:
+                    return self._answers.get_nowait()
+                except queue.Empty:
+                    pass
+                if time.monotonic() >= deadline:
+                    print("\n(No answer in time, the question was withdrawn)")
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self._terminal_lock.release()
+
+
+class HttpApprovalBackend(ApprovalBackend):
+    """
+    Keeps pending requests in memory for the FastAPI app in add_ons_api.py:
+    GET /approvals lists them and POST /approvals/{request_id} answers one.
+    Only works when the agent runs inside the API process.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    async def request(self, request_id: str, payload: Dict[str, Any], timeout: float) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._pending[request_id] = {
+                "request": {"id": request_id, "created_at": datetime.now().isoformat(), **payload},
+                "loop": loop,
+                "future": future,
+            }
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def list_pending(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [entry["request"] for entry in self._pending.values()]
+
+    def respond(self, request_id: str, response: Any) -> bool:
+        """Answer a pending request from any thread. Returns False if it is unknown or already answered."""
+        with self._lock:
+            entry = self._pending.get(request_id)
+        if entry is None or entry["future"].done():
+            return False
+
+        def _resolve():
+            if not entry["future"].done():
+                entry["future"].set_result(response)
+
+        entry["loop"].call_soon_threadsafe(_resolve)
+        return True
+
+
+class FileApprovalBackend(ApprovalBackend):
+    """
+    Drops <id>.request.json into a directory and waits for <id>.response.json
+    ({"response": ...}) to appear. Works across processes and machines sharing the folder.
+    """
+
+    def __init__(self, directory: str = approval_dir, poll_interval: float = 1.0):
+        self.directory = directory
+        self.poll_interval = poll_interval
+
+    def _write_request(self, request_id: str, payload: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{request_id}.request.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"id": request_id, "created_at": datetime.now().isoformat(), **payload}, f, indent=4)
+
+    def _read_response(self, request_id: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, f"{request_id}.response.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _cleanup(self, request_id: str):
+        for suffix in ("request", "response"):
+            try:
+                os.remove(os.path.join(self.directory, f"{request_id}.{suffix}.json"))
+            except FileNotFoundError:
+                pass
+
+    async def request(self, request_id: str, payload: Dict[str, Any], timeout: float) -> Any:
+        await asyncio.to_thread(self._write_request, request_id, payload)
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                response = await asyncio.to_thread(self._read_response, request_id)
+                if response is not None:
+                    return response.get("response", "")
+                if time.monotonic() >= deadline:
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            await asyncio.to_thread(self._cleanup, request_id)
+
+
+class AutoApprovalBackend(ApprovalBackend):
+    """Answers every request with a fixed response, for unattended runs such as benchmarks"""
+
+    def __init__(self, response: str = auto_approval_response):
+        self.response = response
+
+    async def request(self, request_id: str, payload: Dict[str, Any], timeout: float) -> Any:
+        return self.response
+
+
+# Shared instance so add_ons_api.py sees the requests of in-process agent runs
+http_approval_backend = HttpApprovalBackend()
+
+
+def get_approval_backend(name: Optional[str] = None) -> ApprovalBackend:
+    """Returns the approval backend by name: 'cli', 'http', 'file' or 'auto' (default from REA_APPROVAL_BACKEND)"""
+    name = (name or approval_backend_name).strip().lower()
+    if name == "http":
+        return http_approval_backend
+    if name == "file":
+        return FileApprovalBackend()
+    if name == "cli":
+        return CliApprovalBackend()
+    if name == "auto":
+        return AutoApprovalBackend()
+    raise ValueError(f"Unknown approval backend '{name}'. Use 'cli', 'http', 'file' or 'auto'.")
@@ -1,43 +1,151 @@
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from langchain.tools import StructuredTool
-import time
+from src.utils.file_walker import walk_files, compile_glob
+from src.utils.line_index import LineIndex
+from src.utils.patching import apply_patch, atomic_write, stage_write
+
+# Files above this size are read in line ranges instead of all at once
+MAX_FULL_READ_BYTES = 256 * 1024
+# Lines returned when a large file is read without an explicit range
+DEFAULT_MAX_LINES = 2000
 
 # ------------------------------- Helper Functions -------------------------------
 def write_file(path: str, content: str) -> str:
-    """Writes or creates a file in the local system."""
-    time.sleep(5)  # To avoid rate limiting
-    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    """Writes or creates a file in the local system (atomically, via temp file and rename)."""
+    try:
+        atomic_write(path, content)
+        return f"✅ File written successfully to {path}"
+    except Exception as e:
+        return f"❌ Error writing file {path}: {str(e)}"
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
 
-    return f"✅ File written successfully to {path}"
+def patch_file(path: str, patch: str) -> str:
+    """Edits an existing file by applying SEARCH/REPLACE blocks or a unified diff."""
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            original = f.read()
+        atomic_write(path, apply_patch(original, patch))
+        return f"✅ Patch applied successfully to {path}"
+    except FileNotFoundError:
+        return f"❌ File not found: {path}"
+    except Exception as e:
+        return f"❌ Error patching file {path}: {str(e)}"
 
 
-def read_file(path: str) -> str:
-    """Reads a file from the local system."""
+def write_files_batch(writes: List[Dict[str, str]]) -> str:
+    """Writes or patches several files in one call.
+    Every entry has a 'path' and either 'content' (full write) or 'patch' (SEARCH/REPLACE blocks or unified diff).
+    All new contents are computed and staged first; if any entry fails nothing is written.
+    The staged files are then renamed into place one by one; if a rename fails, the files
+    not yet renamed are dropped and the result lists which paths were written."""
+    staged = []
     try:
-        time.sleep(5)  # To avoid rate limiting
-        with open(path, "r", encoding="utf-8") as f:
-            content = f.read()
-        return content
+        contents = {}
+        for number, entry in enumerate(writes, 1):
+            path = entry.get("path")
+            if not path:
+                raise ValueError(f"Entry {number} has no 'path'")
+            if "patch" in entry:
+                if path in contents:
+                    original = contents[path]
+                else:
+                    with open(path, "r", encoding="utf-8", newline="") as f:
+                        original = f.read()
+                contents[path] = apply_patch(original, entry["patch"])
+            elif "content" in entry:
+                contents[path] = entry["content"]
+            else:
+                raise ValueError(f"Entry {number} ({path}) needs either 'content' or 'patch'")
+
+        for path, content in contents.items():
+            staged.append((stage_write(path, content), path))
+    except Exception as e:
+        for temp_path, _ in staged:
+            os.unlink(temp_path)
+        return f"❌ No files were written: {str(e)}"
+
+    written = []
+    for number, (temp_path, path) in enumerate(staged):
+        try:
+            os.replace(temp_path, path)
+        except Exception as e:
+            for remaining_temp_path, _ in staged[number:]:
+                try:
+                    os.unlink(remaining_temp_path)
+                except OSError:
+                    pass
+            return (f"❌ Error writing file {path}: {str(e)}\n"
+                    f"{len(written)} files were written before the error:\n" + "\n".join(written) +
+                    f"\nNot written:\n" + "\n".join(remaining_path for _, remaining_path in staged[number:]))
+        written.append(path)
+    return f"✅ {len(written)} files written successfully:\n" + "\n".join(written)
+
+
+def read_file(path: str, start_line: Optional[int] = None, end_line: Optional[int] = None,
+              start_byte: Optional[int] = None, end_byte: Optional[int] = None) -> str:
+    """Reads a file (or a line/byte range of it) from the local system.
+    Line numbers are 1-based and inclusive, byte ranges are [start_byte, end_byte).
+    The returned text starts with a header carrying the range, line count and file size; a line
+    range only reads the file up to its end line, so the line count is "at least N" until the
+    whole file has been scanned."""
+    try:
+        index = LineIndex.for_file(path)
+        size = index.size
+
+        if start_byte is not None or end_byte is not None:
+            start_byte = min(max(start_byte or 0, 0), size)
+            end_byte = size if end_byte is None else min(max(end_byte, start_byte), size)
+            content = index.read_bytes(start_byte, end_byte).decode("utf-8", errors="replace")
+            header = f"[{path} | bytes {start_byte}-{end_byte} of {size}]"
+            return f"{header}\n{content}"
+
+        if start_line is None and end_line is None and size <= MAX_FULL_READ_BYTES:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            line_count = content.count("\n") + (1 if content and not content.endswith("\n") else 0)
+            return f"[{path} | {line_count} lines | {size} bytes]\n{content}"
+
+        start_line = max(start_line or 1, 1)
+        if end_line is None:
+            end_line = start_line + DEFAULT_MAX_LINES - 1
+        raw, last_line = index.read_lines(start_line, end_line)
+        line_count, exact = index.known_line_count()
+        total = line_count if exact else f"at least {line_count}"
+        header = f"[{path} | lines {start_line}-{last_line} of {total} | {size} bytes]"
+        if last_line < line_count or not exact:
+            header += f"\n[use start_line/end_line to read beyond line {last_line}]"
+        return f"{header}\n{raw.decode('utf-8', errors='replace')}"
     except FileNotFoundError:
         return f"❌ File not found: {path}"
     except Exception as e:
         return f"❌ Error reading file {path}: {str(e)}"
     
 
-def list_files_in_root(folders_to_omit: list) -> str:
+def list_files_in_root(folders_to_omit: list, path: str = ".", pattern: Optional[str] = None,
+                       max_depth: Optional[int] = None, max_results: Optional[int] = 500) -> str:
     """Lists all files in the root directory and with all the files inside the subdirectories with their paths.
-    Should not include the files in given folders_to_omit.
-    All the paths should have '/' for directory separator."""
-    time.sleep(5)  # To avoid rate limiting
+    Should not include the files in given folders_to_omit or the files ignored by .gitignore.
+    All the paths should have '/' for directory separator.
+    Optionally filters by a glob pattern, limits the depth and caps the number of results."""
+    if not os.path.isdir(path):
+        return f"❌ Directory not found: {path}"
+
+    matcher = compile_glob(pattern) if pattern else None
+    # Returned paths include path, so they can be passed to read_file as they are
+    prefix = os.path.normpath(path).replace(os.sep, "/")
     file_list = []
-    for root, dirs, files in os.walk("."):
-        for file in files:
-            if not any(folder in root for folder in folders_to_omit):
-                file_list.append(os.path.relpath(os.path.join(root, file), ".").replace("\\", "/"))
+    truncated = False
+    for rel_path in walk_files(path, folders_to_omit, max_depth=max_depth):
+        if matcher and not matcher.match(rel_path):
+            continue
+        if max_results and len(file_list) >= max_results:
+            truncated = True
+            break
+        file_list.append(rel_path if prefix == "." else f"{prefix}/{rel_path}")
+
+    if truncated:
+        file_list.append(f"... truncated after {max_results} files, narrow down with pattern/max_depth/path")
     return "\n".join(file_list)
 
 
@@ -54,6 +162,38 @@ def get_writer_tool():
     )
     return writer_tool
 
+
+def get_patch_tool():
+    patch_tool = StructuredTool.from_function(
+        func=patch_file,
+        name="patch_file",
+        description=(
+            "Edits an existing local file by sending only the changed parts instead of the whole file. "
+            "Prefer this over write_create_file when modifying existing files such as HTML reports. "
+            "Args: path (str): file to edit; "
+            "patch (str): either one or more blocks of the form "
+            "'<<<<<<< SEARCH\\n<exact existing text>\\n=======\\n<replacement text>\\n>>>>>>> REPLACE' "
+            "(each SEARCH text must appear exactly once), or a unified diff with '@@ -a,b +c,d @@' hunks."
+        ),
+    )
+    return patch_tool
+
+
+def get_batch_writer_tool():
+    batch_writer_tool = StructuredTool.from_function(
+        func=write_files_batch,
+        name="write_files_batch",
+        description=(
+            "Writes, creates or patches several local files in a single call. If any entry is invalid no file is written; "
+            "if writing fails midway, the result lists the files that were written. "
+            "Args: writes (list of dict): each dict has 'path' and either 'content' (full file content) "
+            "or 'patch' (same format as the patch_file tool). "
+            "Example: [{'path': 'a.html', 'content': '<html>...</html>'}, "
+            "{'path': 'b.html', 'patch': '<<<<<<< SEARCH\\nold\\n=======\\nnew\\n>>>>>>> REPLACE'}]"
+        ),
+    )
+    return batch_writer_tool
+
     
 def get_reader_tool():
     reader_tool = StructuredTool.from_function(
@@ -61,7 +201,10 @@ def get_reader_tool():
         name="read_file",
         description=(
             "Reads a file from the local system. "
-            "Args: path (str): file path to read from."
+            "Large files are returned in ranges; the header shows the line range, total lines ('at least N' while the end of the file has not been read) and size. "
+            "Args: path (str): file path to read from; "
+            "start_line (int, optional) and end_line (int, optional): 1-based inclusive line range; "
+            "start_byte (int, optional) and end_byte (int, optional): byte range, used instead of lines."
         ),
     )
     return reader_tool
@@ -69,14 +212,22 @@ def get_reader_tool():
 def get_file_lister_tool(folders_to_omit: Optional[list] = None):
     if folders_to_omit is None:
         folders_to_omit = ["node_modules", ".git", "__pycache__", "venv", ".venv", "env", ".env","dump"]
+
+    def list_files(path: str = ".", pattern: Optional[str] = None,
+                   max_depth: Optional[int] = None, max_results: Optional[int] = 500) -> str:
+        return list_files_in_root(folders_to_omit, path, pattern, max_depth, max_results)
+
     lister_tool = StructuredTool.from_function(
-        func=lambda: list_files_in_root(folders_to_omit),
+        func=list_files,
         name="list_files",
         description=(
             "Lists all files in the root directory and with all the files inside the subdirectories with their paths. "
-            "Should not include the files in given folders_to_omit. "
+            "Skips the omitted folders and everything ignored by .gitignore. "
             "All the paths should have '/' for directory separator. "
-            "Args: None"
+            "Args: path (str, optional): directory to list, default '.'; "
+            "pattern (str, optional): glob filter relative to path, e.g. '*.html' or 'src/**/*.py'; "
+            "max_depth (int, optional): 0 lists only the files directly in path; "
+            "max_results (int, optional): maximum number of files returned, default 500."
         ),
     )
-    return lister_tool
\ No newline at end of file
+    return lister_tool
@@ -1,45 +1,229 @@
-from langchain.tools import StructuredTool
-import time
+from langchain.tools import StructuredTool, BaseTool
+from typing import Any, Dict, List, Optional
+import ast
+import json
+import uuid
+import asyncio
+from src.tools.local_tools.approval_backends import (
+    ApprovalBackend,
+    get_approval_backend,
+    approval_timeout,
+    auto_approve_read_only,
+    is_read_only_tool
+)
 
-def request_human_approval(operation_details: str) -> str:
+
+async def arequest_human_approval(operation_details: str, tool_name: Optional[str] = None,
+                                  backend: Optional[ApprovalBackend] = None,
+                                  timeout: float = approval_timeout,
+                                  auto_approve: bool = auto_approve_read_only) -> str:
     """
     Request human approval before performing sensitive operations.
-    
+
     The agent MUST call this tool before executing any file operations, data modifications,
     or other sensitive actions. The agent should explain what it wants to do and why.
-    
+
     Args:
         operation_details: A clear explanation of what operation the agent wants to perform,
                           why it's needed, and what the expected outcome is.
-                          Example: "I want to create a file named 'test.txt' with content 
+                          Example: "I want to create a file named 'test.txt' with content
                           'Hello World' because you asked me to create a test file."
-    
+        tool_name: The tool the agent wants to call, if any. Requests for a tool in READ_ONLY_TOOLS
+                   are auto-approved when REA_AUTO_APPROVE_READ_ONLY is on.
+
     Returns:
         str: "APPROVED" if user approves, "REJECTED" if user rejects with reason
     """
-    time.sleep(5)  # To avoid rate limiting
-    print("\n" + "="*70)
-    print("🤖 AGENT QUESTION")
-    print("="*70)
-    print(f"\n{operation_details}\n")
-    print("="*70)
+    if auto_approve and is_read_only_tool(tool_name):
+        return f"approved ({tool_name} only reads data and is auto-approved by policy)"
+
+    backend = backend or get_approval_backend()
+    request_id = uuid.uuid4().hex
+    try:
+        response = await backend.request(
+            request_id,
+            {"kind": "approval", "operation_details": operation_details},
+            timeout
+        )
+    except asyncio.TimeoutError:
+        return (f"No human response within {int(timeout)} seconds. "
+                "Treat this as NOT approved and do not perform the operation.")
+
+    return str(response).strip().lower()
 
-    response = input("Your Input: ").strip().lower()
 
-    return response
+def request_human_approval(operation_details: str, tool_name: Optional[str] = None) -> str:
+    """Synchronous entry point for the approval tool, used when the agent runs without an event loop."""
+    return asyncio.run(arequest_human_approval(operation_details, tool_name))
+
+
+# Single-item tools whose approved calls are merged into one call of their batch counterpart
+BATCH_PATHS = {
+    "wit_create_work_item": "wit_create_work_items_batch",
+    "wit_update_work_item": "wit_update_work_items_batch",
+    "wit_link_work_items": "wit_work_items_link",
+    "write_create_file": "write_files_batch",
+    "patch_file": "write_files_batch",
+}
+
+
+def _parse_tool_input(tool_input: Any) -> Any:
+    """Tool inputs arrive as dicts or as Python/JSON dict strings (the Azure DevOps tools eval their input)"""
+    if isinstance(tool_input, str):
+        try:
+            return ast.literal_eval(tool_input)
+        except (ValueError, SyntaxError):
+            try:
+                return json.loads(tool_input)
+            except json.JSONDecodeError:
+                return tool_input
+    return tool_input
+
+
+def _render_plan(items: List[Dict[str, Any]]) -> str:
+    lines = [f"The agent wants to perform {len(items)} operations:\n"]
+    for number, item in enumerate(items, 1):
+        lines.append(f"[{number}] {item.get('tool', '?')}: {item.get('summary', '')}")
+        lines.append(f"    input: {item.get('input')}")
+    lines.append(
+        "\nReply 'a' to approve all, 'r' to reject all, item numbers to approve only those (e.g. '1,3'), "
+        "or JSON to decide per item, e.g. {\"1\": \"approve\", \"2\": \"reject\", \"3\": {\"input\": <edited input>}}"
+    )
+    return "\n".join(lines)
+
+
+def _parse_plan_decisions(response: Any, count: int) -> Dict[int, Any]:
+    """
+    Turn the human's reply into {item number: "approve" | "reject" | {"input": edited input}}.
+    Items without a decision, or with anything else (e.g. a dict without "input"), are rejected.
+    """
+    decisions = {number: "reject" for number in range(1, count + 1)}
+    if isinstance(response, str):
+        text = response.strip()
+        if text.lower() in ("a", "all", "y", "yes", "approve", "approved", "approve all"):
+            return {number: "approve" for number in decisions}
+        if text.lower() in ("", "r", "n", "no", "none", "reject", "rejected", "reject all"):
+            return decisions
+        if text.startswith("{"):
+            response = _parse_tool_input(text)
+        else:
+            for part in text.replace(" ", ",").split(","):
+                if part.isdigit() and int(part) in decisions:
+                    decisions[int(part)] = "approve"
+            return decisions
+    if isinstance(response, dict):
+        for key, decision in response.items():
+            if str(key).isdigit() and int(key) in decisions:
+                if isinstance(decision, str):
+                    decision = "approve" if decision.strip().lower() in ("a", "y", "yes", "approve", "approved") else "reject"
+                elif isinstance(decision, dict) and "input" in decision:
+                    decision = {"input": decision["input"]}
+                else:
+                    decision = "reject"
+                decisions[int(key)] = decision
+    return decisions
+
+
+async def execute_approved_plan(items: List[Dict[str, Any]], tools: List[BaseTool]) -> List[str]:
+    """Run approved plan items, merging single-item calls into their batch tools where possible"""
+    tools_by_name = {tool.name: tool for tool in tools}
+    batches: Dict[str, List[Any]] = {}
+    singles = []
+    for item in items:
+        batch_name = BATCH_PATHS.get(item["tool"])
+        tool_input = _parse_tool_input(item["input"])
+        if batch_name in tools_by_name and isinstance(tool_input, dict):
+            if item["tool"] == "patch_file":
+                tool_input = {"path": tool_input.get("path"), "patch": tool_input.get("patch")}
+            batches.setdefault(batch_name, []).append(tool_input)
+        else:
+            singles.append(item)
+
+    calls = []
+    for batch_name, inputs in batches.items():
+        batch_input = {"writes": inputs} if batch_name == "write_files_batch" else repr(inputs)
+        calls.append((f"{batch_name} ({len(inputs)} items)", tools_by_name[batch_name], batch_input))
+    for item in singles:
+        tool = tools_by_name.get(item["tool"])
+        tool_input = item["input"]
+        if isinstance(tool, StructuredTool):
+            tool_input = _parse_tool_input(tool_input)
+        elif not isinstance(tool_input, str):
+            tool_input = repr(tool_input)
+        calls.append((item["tool"], tool, tool_input))
+
+    # One call at a time (batches first, then the rest in plan order) so dependent edits do not race
+    results = []
+    for label, tool, tool_input in calls:
+        if tool is None:
+            results.append(f"{label}: unknown tool, skipped")
+            continue
+        try:
+            results.append(f"{label}: {await tool.ainvoke(tool_input)}")
+        except Exception as e:
+            results.append(f"{label}: Error: {str(e)}")
+    return results
+
+
+async def arequest_plan_approval(items: List[Dict[str, Any]], tools: List[BaseTool],
+                                 backend: Optional[ApprovalBackend] = None,
+                                 timeout: float = approval_timeout) -> str:
+    """
+    Ask the human to approve, reject or edit every item of a plan in one interaction,
+    then execute the approved items.
+    """
+    if not items:
+        return "The plan is empty, nothing to approve."
+
+    backend = backend or get_approval_backend()
+    try:
+        response = await backend.request(
+            uuid.uuid4().hex,
+            {"kind": "plan", "operation_details": _render_plan(items), "items": items},
+            timeout
+        )
+    except asyncio.TimeoutError:
+        return (f"No human response within {int(timeout)} seconds. "
+                "Treat the whole plan as NOT approved and do not perform any of the operations.")
+
+    decisions = _parse_plan_decisions(response, len(items))
+    approved, summary = [], []
+    for number, item in enumerate(items, 1):
+        decision = decisions[number]
+        if isinstance(decision, dict):
+            item = {**item, "input": decision["input"]}
+            summary.append(f"[{number}] {item.get('tool')}: edited and approved")
+            approved.append(item)
+        elif decision == "approve":
+            summary.append(f"[{number}] {item.get('tool')}: approved")
+            approved.append(item)
+        else:
+            summary.append(f"[{number}] {item.get('tool')}: rejected")
+
+    result = "Plan decisions:\n" + "\n".join(summary)
+    if approved:
+        result += "\n\nExecution results:\n" + "\n".join(await execute_approved_plan(approved, tools))
+    return result
 
 
 # Easy integration function
-def get_approval_tool():
+def get_approval_tool(backend: Optional[ApprovalBackend] = None):
+    async def human_input(operation_details: str, tool_name: Optional[str] = None) -> str:
+        return await arequest_human_approval(operation_details, tool_name, backend=backend)
+
+    def human_input_sync(operation_details: str, tool_name: Optional[str] = None) -> str:
+        return asyncio.run(human_input(operation_details, tool_name))
+
     approval_tool = StructuredTool.from_function(
-        func=request_human_approval,
+        func=human_input_sync,
+        coroutine=human_input,
         name="human_input",
         description=(
             """
             Request human approval/inputs or when there are so many options available before performing sensitive operations.
             **CRITICAL**:
             The agent MUST call this tool for all of the following scenarios:
-            - Before executing any 
+            - Before executing any
                 - file operations
                 - data modifications
                 - Creating/Updating stories/tasks/epics
@@ -51,17 +235,58 @@ def get_approval_tool():
             - Other sensitive actions.
             - Everytime before ending the conversation.
             The agent should explain what it wants and why.
-            
+            When several creates/updates are pending, use 'human_approve_plan' once instead of asking for each one.
+
             Args:
                 operation_details: A clear explanation of what operation the agent wants to perform,
                                 why it's needed, and what the expected outcome is.
                 Example 1: "I want to create a file named 'test.txt' with content 'Hello World' because you asked me to create a test file."
                 Example 2: "These are multiple user stories available, which one should I prioritize?"
                 Example 3: "I want to update the task 'Implement feature X' with new details because the requirements have changed."
-            
+                tool_name (optional): name of the tool you want to call, if the request is about a tool call.
+
             Returns:
                 str: Approval or rejection from the human user.
             """
         ),
     )
-    return approval_tool
\ No newline at end of file
+    return approval_tool
+
+
+def get_plan_approval_tool(tools: List[BaseTool], backend: Optional[ApprovalBackend] = None):
+    async def human_approve_plan(items: List[Dict[str, Any]]) -> str:
+        return await arequest_plan_approval(items, tools, backend=backend)
+
+    def human_approve_plan_sync(items: List[Dict[str, Any]]) -> str:
+        return asyncio.run(human_approve_plan(items))
+
+    plan_approval_tool = StructuredTool.from_function(
+        func=human_approve_plan_sync,
+        coroutine=human_approve_plan,
+        name="human_approve_plan",
+        description=(
+            """
+            Ask the human to approve a whole plan of pending changes in ONE interaction, then execute
+            the approved ones. Use this instead of calling 'human_input' before every single create/update:
+            collect all planned work item creates/updates/links and file writes first, then send them here.
+            The human can approve, reject or edit each item. Approved creates, updates, links and file
+            writes are executed together through the batch tools.
+
+            Args:
+                items: list of dicts, each with keys:
+                    tool: name of the tool that performs the operation (e.g. 'wit_create_work_item')
+                    input: exactly the input you would pass to that tool
+                    summary: one line explaining what the operation does and why
+                Example: [{"tool": "wit_create_work_item",
+                           "input": "{'work_item_type': 'User Story', 'title': 'Login page'}",
+                           "summary": "Create story for the login page under Feature 18"},
+                          {"tool": "wit_update_work_item",
+                           "input": "{'work_item_id': 42, 'updates': {'Microsoft.VSTS.Scheduling.StoryPoints': 5}}",
+                           "summary": "Estimate story 42 at 5 points"}]
+
+            Returns:
+                str: The decision for every item and the results of the executed operations.
+            """
+        ),
+    )
+    return plan_approval_tool
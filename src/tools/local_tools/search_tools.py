@@ -0,0 +1,319 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from langchain.tools import StructuredTool
+from src.utils.file_walker import walk_files, compile_glob
+from src.utils.tool_metrics import record_cache_hit
+
+INDEX_VERSION = 2
+# Files larger than this, and binary files, are not indexed
+MAX_INDEX_BYTES = 2 * 1024 * 1024
+MAX_LINE_CHARS = 300
+REGEX_META = set(".^$*+?{}[]\\|()")
+QUANTIFIER = re.compile(r"\{(?:\d+(?:,\d*)?|,\d+)\}")
+
+_indexes: Dict[str, "WorkspaceSearchIndex"] = {}
+_indexes_lock = threading.Lock()
+
+
+# ------------------------------- Helper Functions -------------------------------
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _required_literals(pattern: str) -> List[str]:
+    """
+    Literal substrings every match of the regex must contain (best effort).
+    Returns an empty list when nothing can be guaranteed, e.g. for alternations,
+    lookarounds, backreferences and inline flags.
+    """
+    if "|" in pattern:
+        return []
+    literals, run = [], ""
+    # Index into literals where each open group started, so optional groups can be dropped
+    groups = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped.isdigit():
+                # Backreference
+                return []
+            if escaped.isalnum():
+                literals.append(run)
+                run = ""
+            else:
+                run += escaped
+            continue
+        if char == "{":
+            quantifier = QUANTIFIER.match(pattern, i)
+            if quantifier:
+                # The previous character is optional or repeated; the bounds are not text
+                literals.append(run[:-1])
+                run = ""
+                i = quantifier.end()
+                continue
+            # Not a quantifier: Python matches '{' literally
+            run += char
+        elif char in "*?":
+            # The previous character is optional or repeated
+            literals.append(run[:-1])
+            run = ""
+        elif char in REGEX_META:
+            literals.append(run)
+            run = ""
+            if char == "(":
+                groups.append(len(literals))
+                if pattern.startswith("?", i + 1):
+                    # Only plain and named groups are safe to look into
+                    if pattern.startswith("?:", i + 1):
+                        i += 2
+                    elif pattern.startswith("?P<", i + 1) and pattern.find(">", i) != -1:
+                        i = pattern.find(">", i)
+                    else:
+                        return []
+            elif char == ")" and groups:
+                start = groups.pop()
+                if pattern[i + 1:i + 2] in ("*", "?", "{"):
+                    del literals[start:]
+            elif char == "[":
+                end = pattern.find("]", i + 2)
+                i = end if end != -1 else len(pattern)
+        else:
+            run += char
+        i += 1
+    literals.append(run)
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+class WorkspaceSearchIndex:
+    """
+    Trigram index over the text files of a workspace.
+
+    Each search first refreshes the index incrementally (only files whose mtime or
+    size changed are re-read), narrows the candidate files down with the query's
+    trigrams and then scans only those files for matching lines. The index is
+    saved as JSON to index_path so a new process starts warm; it lives in a folder
+    the agent can write to, so it holds data only (never pickle) and is checked on load.
+    """
+
+    def __init__(self, root: str = ".", folders_to_omit: Optional[List[str]] = None,
+                 index_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.folders_to_omit = folders_to_omit or []
+        self.index_path = index_path or os.path.join(self.root, ".rea_search_index.json")
+        self.files: Dict[str, Tuple[int, int]] = {}
+        self.file_trigrams: Dict[str, Set[str]] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+                return
+            files, file_trigrams = {}, {}
+            for rel_path, entry in data["files"].items():
+                mtime, size, trigrams = entry
+                if not all(isinstance(trigram, str) and len(trigram) == 3 for trigram in trigrams):
+                    raise ValueError(f"Invalid trigrams for {rel_path}")
+                files[rel_path] = (int(mtime), int(size))
+                file_trigrams[rel_path] = set(trigrams)
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            # Missing or invalid index: rebuilt on the next refresh
+            return
+        postings: Dict[str, Set[str]] = {}
+        for rel_path, trigrams in file_trigrams.items():
+            for trigram in trigrams:
+                postings.setdefault(trigram, set()).add(rel_path)
+        self.files, self.file_trigrams, self.postings = files, file_trigrams, postings
+
+    def _save(self):
+        # Postings are rebuilt from the per-file trigrams on load
+        data = {
+            "version": INDEX_VERSION,
+            "root": self.root,
+            "files": {rel_path: [stamp[0], stamp[1], sorted(self.file_trigrams.get(rel_path, ()))]
+                      for rel_path, stamp in self.files.items()},
+        }
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def _remove(self, rel_path: str):
+        for trigram in self.file_trigrams.pop(rel_path, ()):
+            paths = self.postings.get(trigram)
+            if paths:
+                paths.discard(rel_path)
+                if not paths:
+                    del self.postings[trigram]
+        self.files.pop(rel_path, None)
+
+    def _add(self, rel_path: str, stamp: Tuple[int, int]):
+        text = self._read_text(rel_path)
+        self.files[rel_path] = stamp
+        if text is None:
+            # Remember the stamp so unchanged binary/oversized files are not re-read
+            self.file_trigrams[rel_path] = set()
+            return
+        trigrams = _trigrams(text.lower())
+        self.file_trigrams[rel_path] = trigrams
+        for trigram in trigrams:
+            self.postings.setdefault(trigram, set()).add(rel_path)
+
+    def _read_text(self, rel_path: str) -> Optional[str]:
+        path = os.path.join(self.root, rel_path)
+        try:
+            if os.path.getsize(path) > MAX_INDEX_BYTES:
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if b"\0" in data[:8192]:
+            return None
+        return data.decode("utf-8", errors="replace")
+
+    def refresh(self) -> int:
+        """Bring the index up to date with the workspace. Returns the number of files re-indexed."""
+        with self._lock:
+            seen = set()
+            changed = 0
+            for rel_path in walk_files(self.root, self.folders_to_omit):
+                if rel_path == os.path.basename(self.index_path):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                seen.add(rel_path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                if self.files.get(rel_path) != stamp:
+                    self._remove(rel_path)
+                    self._add(rel_path, stamp)
+                    changed += 1
+            for rel_path in [path for path in self.files if path not in seen]:
+                self._remove(rel_path)
+                changed += 1
+            if changed:
+                self._save()
+            return changed
+
+    def candidates(self, literals: List[str]) -> List[str]:
+        """Files containing every trigram of every literal (all indexed text files if none)"""
+        with self._lock:
+            result: Optional[Set[str]] = None
+            for literal in literals:
+                for trigram in _trigrams(literal.lower()):
+                    paths = self.postings.get(trigram, set())
+                    result = set(paths) if result is None else result & paths
+                    if not result:
+                        return []
+            if result is None:
+                result = {path for path, trigrams in self.file_trigrams.items() if trigrams}
+            return sorted(result)
+
+    def search(self, query: str, regex: bool = False, case_sensitive: bool = False,
+               pattern: Optional[str] = None, context_lines: int = 2,
+               max_results: int = 50) -> str:
+        if self.refresh() == 0:
+            # Nothing changed since the last search: answered entirely from the index
+            record_cache_hit()
+        flags = 0 if case_sensitive else re.IGNORECASE
+        try:
+            matcher = re.compile(query if regex else re.escape(query), flags)
+        except re.error as e:
+            return f"❌ Invalid regex '{query}': {str(e)}"
+        literals = _required_literals(query) if regex else [query]
+        path_filter = compile_glob(pattern) if pattern else None
+
+        blocks = []
+        match_count = 0
+        for rel_path in self.candidates(literals):
+            if path_filter and not path_filter.match(rel_path):
+                continue
+            text = self._read_text(rel_path)
+            if text is None:
+                continue
+            lines = text.splitlines()
+            hits = [i for i, line in enumerate(lines) if matcher.search(line)]
+            if not hits:
+                continue
+
+            # Merge overlapping context windows into one block per region
+            windows = []
+            for i in hits[:max_results - match_count]:
+                start, end = max(i - context_lines, 0), min(i + context_lines, len(lines) - 1)
+                if windows and start <= windows[-1][1] + 1:
+                    windows[-1][1] = end
+                else:
+                    windows.append([start, end])
+            hit_set = set(hits)
+            for start, end in windows:
+                block = []
+                for i in range(start, end + 1):
+                    separator = ":" if i in hit_set else "-"
+                    block.append(f"{rel_path}{separator}{i + 1}{separator} {lines[i][:MAX_LINE_CHARS]}")
+                blocks.append("\n".join(block))
+
+            match_count += len(hits)
+            if match_count >= max_results:
+                break
+
+        if not blocks:
+            return f"No matches found for '{query}'"
+        result = "\n--\n".join(blocks)
+        if match_count >= max_results:
+            result += f"\n... stopped after {max_results} matches, narrow down with pattern or a more specific query"
+        return result
+
+
+def get_workspace_index(root: str = ".", folders_to_omit: Optional[List[str]] = None) -> WorkspaceSearchIndex:
+    """Returns the shared search index for root, creating it on first use"""
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = WorkspaceSearchIndex(root, folders_to_omit)
+        return _indexes[key]
+
+
+#------------------------------- Tools -------------------------------
+def get_search_tool(folders_to_omit: Optional[list] = None):
+    if folders_to_omit is None:
+        folders_to_omit = ["node_modules", ".git", "__pycache__", "venv", ".venv", "env", ".env","dump"]
+
+    def search_files(query: str, regex: bool = False, case_sensitive: bool = False,
+                     pattern: Optional[str] = None, context_lines: int = 2,
+                     max_results: int = 50) -> str:
+        try:
+            index = get_workspace_index(".", folders_to_omit)
+            return index.search(query, regex, case_sensitive, pattern, context_lines, max_results)
+        except Exception as e:
+            return f"❌ Error searching files for '{query}': {str(e)}"
+
+    search_tool = StructuredTool.from_function(
+        func=search_files,
+        name="search_files",
+        description=(
+            "Searches the content of all local files (like grep) and returns matching lines with context "
+            "as 'path:line: text' (context lines use '-'). Use it to find where something is used "
+            "instead of reading files one by one. "
+            "Args: query (str): text to search for; "
+            "regex (bool, optional): treat query as a regular expression, default False; "
+            "case_sensitive (bool, optional): default False; "
+            "pattern (str, optional): glob filter on file paths, e.g. '*.py' or 'src/**/*.html'; "
+            "context_lines (int, optional): lines of context around each match, default 2; "
+            "max_results (int, optional): maximum number of matching lines, default 50."
+        ),
+    )
+    return search_tool
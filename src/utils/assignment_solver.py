@@ -0,0 +1,59 @@
+from typing import Optional, Sequence
+import numpy as np
+from src.utils.capacity_planner import CapacityPlan
+
+
+def solve_assignment(plan: CapacityPlan, estimates: Sequence[float], activity_index: Sequence[int],
+                     priorities: Optional[Sequence[float]] = None, allow_overload: bool = False) -> np.ndarray:
+    """
+    Balanced, deterministic assignment of work items to team members.
+
+    Items are placed in priority order (then largest estimate first, then input order),
+    each on the member who can do its activity and ends up least utilized afterwards,
+    counting the work already assigned in the plan. A member only qualifies while the
+    item fits in their free hours for that activity (any activity when the item has
+    none); with allow_overload, an item that fits nowhere goes to the least utilized
+    eligible member instead of staying unassigned.
+
+    Args:
+        plan: capacity plan with the existing load added
+        estimates: hours per item
+        activity_index: column of plan.activities per item, -1 for no activity
+        priorities: lower is placed first (default: all equal)
+        allow_overload: assign items that fit nowhere anyway
+
+    Returns:
+        Row of plan.members per item, -1 where the item was left unassigned
+    """
+    estimates = np.nan_to_num(np.asarray(estimates, dtype=float))
+    activity_index = np.asarray(activity_index, dtype=int)
+    priorities = np.zeros(len(estimates)) if priorities is None else np.nan_to_num(np.asarray(priorities, dtype=float), nan=np.inf)
+    order = np.lexsort((np.arange(len(estimates)), -estimates, priorities))
+
+    capacity = plan.member_capacity
+    load = plan.member_load.copy()
+    free = plan.capacity - plan.load
+    can_work = plan.capacity_per_day > 0
+    # Utilization after adding an item is (load + estimate) / capacity; members without capacity never qualify
+    divisor = np.where(capacity > 0, capacity, 1)
+    rows = np.full(len(estimates), -1, dtype=int)
+
+    for item in order:
+        estimate, activity = estimates[item], activity_index[item]
+        if activity >= 0:
+            eligible = can_work[:, activity] & (capacity > 0)
+            room = free[:, activity]
+        else:
+            eligible = capacity > 0
+            room = capacity - load
+        candidates = eligible & (room >= estimate - 1e-9)
+        if not candidates.any():
+            if not (allow_overload and eligible.any()):
+                continue
+            candidates = eligible
+        member = int(np.argmin(np.where(candidates, (load + estimate) / divisor, np.inf)))
+        rows[item] = member
+        load[member] += estimate
+        column = activity if activity >= 0 else int(np.argmax(free[member]))
+        free[member, column] -= estimate
+    return rows
@@ -0,0 +1,30 @@
+import threading
+from typing import Dict, Tuple
+from azure.devops.connection import Connection
+from msrest.authentication import BasicAuthentication
+from src.utils.tool_metrics import instrument_connection, record_http_response
+from src.utils.tracing import trace_http_response
+
+_connections: Dict[Tuple[str, str], Connection] = {}
+_lock = threading.Lock()
+
+
+def get_connection(organization_url: str, personal_access_token: str) -> Connection:
+    """
+    Returns the shared Connection for an organization and PAT.
+
+    The Connection caches its clients, and each client keeps one HTTP session,
+    so every connector and concurrent agent run reuses the same pooled sockets
+    and resource-area lookups instead of opening new ones per toolkit.
+    """
+    key = (organization_url.rstrip('/'), personal_access_token)
+    with _lock:
+        connection = _connections.get(key)
+        if connection is None:
+            credentials = BasicAuthentication('', personal_access_token)
+            connection = Connection(base_url=organization_url, creds=credentials)
+            # Counts each client's HTTP requests and bytes against the tool call making them,
+            # and records each request as a span under it when tracing is on
+            instrument_connection(connection, (record_http_response, trace_http_response))
+            _connections[key] = connection
+        return connection
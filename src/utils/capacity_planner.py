@@ -0,0 +1,150 @@
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Date range as (start, end), both inclusive
+DateRange = Tuple[date, date]
+
+
+def _day(value: date) -> np.datetime64:
+    return np.datetime64(value.isoformat()[:10], "D")
+
+
+def _off_mask(days: np.ndarray, ranges: Sequence[DateRange]) -> np.ndarray:
+    """(len(ranges), len(days)) mask of the days each range covers"""
+    if not ranges:
+        return np.zeros((0, len(days)), dtype=bool)
+    starts = np.array([_day(start) for start, _ in ranges])
+    ends = np.array([_day(end) for _, end in ranges])
+    return (days[None, :] >= starts[:, None]) & (days[None, :] <= ends[:, None])
+
+
+class CapacityPlan:
+    """
+    Sprint capacity against assigned remaining work, as NumPy arrays.
+
+    Members are rows and activities are columns. Available days per member are the
+    team's working days in [from_date, finish] minus team and personal days off,
+    capacity is available days x hours per day per activity, and load is the
+    remaining work of the items assigned to each member (-1 = unassigned).
+    Everything is computed with array operations, so hundreds of members and
+    thousands of work items take milliseconds.
+    """
+
+    def __init__(self, members: List[str], activities: List[str], capacity_per_day: np.ndarray,
+                 start: date, finish: date, working_days: Sequence[str] = WEEKDAYS[:5],
+                 team_days_off: Sequence[DateRange] = (), member_days_off: Sequence[Tuple[int, date, date]] = (),
+                 from_date: Optional[date] = None):
+        self.members = list(members)
+        self.activities = list(activities)
+        self.capacity_per_day = np.asarray(capacity_per_day, dtype=float).reshape(len(self.members), len(self.activities))
+        self.start = start
+        self.finish = finish
+        self.from_date = max(start, from_date) if from_date else start
+
+        days = np.arange(_day(self.from_date), _day(finish) + np.timedelta64(1, "D"))
+        weekmask = "".join("1" if day in {name.lower() for name in working_days} else "0" for day in WEEKDAYS)
+        working = np.is_busday(days, weekmask=weekmask) if "1" in weekmask else np.zeros(len(days), dtype=bool)
+        working &= ~_off_mask(days, list(team_days_off)).any(axis=0)
+
+        member_off = np.zeros((len(self.members), len(days)), dtype=bool)
+        if member_days_off:
+            owners = np.array([owner for owner, _, _ in member_days_off], dtype=int)
+            np.logical_or.at(member_off, owners, _off_mask(days, [(start, end) for _, start, end in member_days_off]))
+
+        self.days = days
+        self.team_working_days = int(working.sum())
+        self.available_days = (working[None, :] & ~member_off).sum(axis=1)
+        self.capacity = self.capacity_per_day * self.available_days[:, None]
+        self.load = np.zeros_like(self.capacity)
+        self.unassigned = np.zeros(len(self.activities))
+        # Unassigned work without an activity
+        self.unassigned_other = 0.0
+        self.item_counts = np.zeros(len(self.members), dtype=int)
+
+    def add_load(self, member_index: Sequence[int], activity_index: Sequence[int], remaining: Sequence[float]):
+        """Adds remaining work per item; member_index -1 is unassigned, activity_index -1 has no activity"""
+        member_index = np.asarray(member_index, dtype=int)
+        activity_index = np.asarray(activity_index, dtype=int)
+        remaining = np.nan_to_num(np.asarray(remaining, dtype=float))
+        # Items without an activity (or one the member has no capacity for) count against the member's
+        # first activity column with capacity, so the member total stays right
+        fallback = np.where(self.capacity_per_day > 0, np.arange(len(self.activities))[None, :], len(self.activities)).min(axis=1)
+        fallback = np.where(fallback == len(self.activities), 0, fallback)
+        assigned = member_index >= 0
+        rows = member_index[assigned]
+        columns = activity_index[assigned]
+        has_capacity = (columns >= 0) & (self.capacity_per_day[rows, np.maximum(columns, 0)] > 0)
+        columns = np.where(has_capacity, columns, fallback[rows])
+        if len(self.activities):
+            np.add.at(self.load, (rows, columns), remaining[assigned])
+            unassigned = ~assigned & (activity_index >= 0)
+            np.add.at(self.unassigned, activity_index[unassigned], remaining[unassigned])
+        self.unassigned_other += float(remaining[~assigned & (activity_index < 0)].sum())
+        self.item_counts += np.bincount(rows, minlength=len(self.members))
+
+    @property
+    def member_capacity(self) -> np.ndarray:
+        return self.capacity.sum(axis=1)
+
+    @property
+    def member_load(self) -> np.ndarray:
+        return self.load.sum(axis=1)
+
+    @property
+    def utilization(self) -> np.ndarray:
+        """Load / capacity per member (inf with load but no capacity, 0 with neither)"""
+        capacity, load = self.member_capacity, self.member_load
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(capacity > 0, load / np.where(capacity > 0, capacity, 1), np.where(load > 0, np.inf, 0.0))
+
+    @property
+    def overload(self) -> np.ndarray:
+        return np.maximum(self.member_load - self.member_capacity, 0)
+
+    @property
+    def free(self) -> np.ndarray:
+        return np.maximum(self.member_capacity - self.member_load, 0)
+
+    def table(self, title: str = "") -> str:
+        """Compact text report: one row per member (most utilized first), per-activity totals and a verdict"""
+        def hours(value: float) -> str:
+            return f"{round(float(value), 1):g}"
+
+        def percent(value: float) -> str:
+            return "n/a" if np.isinf(value) else f"{value * 100:.0f}%"
+
+        hours_per_day = self.capacity_per_day.sum(axis=1)
+        utilization = self.utilization
+        order = np.lexsort((np.array(self.members, dtype=object).astype(str), -np.nan_to_num(utilization, posinf=1e9)))
+        lines = [title] if title else []
+        lines.append(f"Period: {self.from_date.isoformat()} to {self.finish.isoformat()} ({self.team_working_days} team working days)")
+        lines.append("Member | Days | Hours/day | Capacity h | Assigned h | Items | Utilization | Over h")
+        for index in order:
+            lines.append(
+                f"{self.members[index]} | {self.available_days[index]} | {hours(hours_per_day[index])} | "
+                f"{hours(self.member_capacity[index])} | {hours(self.member_load[index])} | {self.item_counts[index]} | "
+                f"{percent(utilization[index])} | {hours(self.overload[index])}"
+            )
+
+        lines.append("")
+        lines.append("Activity | Capacity h | Assigned h | Unassigned h | Free h")
+        activity_capacity = self.capacity.sum(axis=0)
+        activity_load = self.load.sum(axis=0)
+        for index, activity in enumerate(self.activities):
+            lines.append(
+                f"{activity or '(any)'} | {hours(activity_capacity[index])} | {hours(activity_load[index])} | "
+                f"{hours(self.unassigned[index])} | {hours(max(activity_capacity[index] - activity_load[index] - self.unassigned[index], 0))}"
+            )
+
+        total_capacity = float(self.member_capacity.sum())
+        unassigned = float(self.unassigned.sum() + self.unassigned_other)
+        total_work = float(self.member_load.sum()) + unassigned
+        overloaded = [self.members[index] for index in np.flatnonzero(self.overload > 0)]
+        lines.append("")
+        lines.append(f"Total capacity: {hours(total_capacity)} h | Remaining work: {hours(total_work)} h "
+                     f"({hours(unassigned)} h unassigned) | Free: {hours(max(total_capacity - total_work, 0))} h")
+        lines.append(f"Overloaded: {', '.join(overloaded)}" if overloaded else "Overloaded: none")
+        return "\n".join(lines)
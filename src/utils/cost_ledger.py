@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+cost_ledger_path = os.getenv('REA_COST_LEDGER', 'cost_ledger.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    run_id TEXT,
+    role TEXT,
+    project TEXT,
+    model TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS llm_calls_ts ON llm_calls (ts);
+CREATE INDEX IF NOT EXISTS llm_calls_run_id ON llm_calls (run_id);
+CREATE TRIGGER IF NOT EXISTS llm_calls_no_update BEFORE UPDATE ON llm_calls
+BEGIN SELECT RAISE(ABORT, 'cost ledger is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS llm_calls_no_delete BEFORE DELETE ON llm_calls
+BEGIN SELECT RAISE(ABORT, 'cost ledger is append-only'); END;
+"""
+
+# Columns aggregates can be grouped by ("day" is the date part of the timestamp)
+GROUP_COLUMNS = {
+    "run_id": "run_id",
+    "role": "role",
+    "project": "project",
+    "model": "model",
+    "day": "substr(ts, 1, 10)",
+}
+
+
+def llm_call_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """USD cost of one call at OpenAI list prices (0 for models without a known price)"""
+    # Deferred: the price table pulls in langchain, which the API and CLI do not need otherwise
+    from langchain_community.callbacks.openai_info import (
+        MODEL_COST_PER_1K_TOKENS, TokenType, get_openai_token_cost_for_model, standardize_model_name,
+    )
+    model = standardize_model_name(model or "")
+    if model not in MODEL_COST_PER_1K_TOKENS:
+        return 0.0
+    cost = get_openai_token_cost_for_model(model, prompt_tokens - cached_tokens, token_type=TokenType.PROMPT)
+    if cached_tokens:
+        try:
+            cost += get_openai_token_cost_for_model(model, cached_tokens, token_type=TokenType.PROMPT_CACHED)
+        except ValueError:
+            # No cached price for this model: billed as regular prompt tokens
+            cost += get_openai_token_cost_for_model(model, cached_tokens, token_type=TokenType.PROMPT)
+    return cost + get_openai_token_cost_for_model(model, completion_tokens, token_type=TokenType.COMPLETION)
+
+
+class CostLedger:
+    """
+    Append-only SQLite ledger with one row per LLM call.
+
+    Replaces the free-form cost_details.txt: rows carry the run id, role and project,
+    so cost, tokens and latency can be aggregated per run, role, project, model or day
+    with one indexed query. Rows cannot be updated or deleted (enforced by triggers).
+    Every process working in the same folder appends to the same file.
+    """
+
+    def __init__(self, path: str = cost_ledger_path):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connection for this process, created on first use (caller holds the lock)"""
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def append(self, run_id: Optional[str], model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+               cached_tokens: int = 0, latency_ms: Optional[float] = None, role: Optional[str] = None,
+               project: Optional[str] = None, cost_usd: Optional[float] = None, ts: Optional[str] = None):
+        if cost_usd is None:
+            cost_usd = llm_call_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+        row = (ts or datetime.now().isoformat(), run_id, role, project, model, prompt_tokens, completion_tokens,
+               cached_tokens, prompt_tokens + completion_tokens, cost_usd, latency_ms)
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT INTO llm_calls (ts, run_id, role, project, model, prompt_tokens, completion_tokens, "
+                    "cached_tokens, total_tokens, cost_usd, latency_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def aggregate(self, group_by: Sequence[str] = (), since: Optional[str] = None, until: Optional[str] = None,
+                  run_id: Optional[str] = None, role: Optional[str] = None, project: Optional[str] = None,
+                  model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Calls, tokens, cost and latency summed per group (one row overall without group_by).
+        since/until are ISO timestamps or dates, until is exclusive.
+        """
+        unknown = [column for column in group_by if column not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Cannot group by {unknown}. Use any of {list(GROUP_COLUMNS)}.")
+        filters, params = [], []
+        for column, value in (("run_id", run_id), ("role", role), ("project", project), ("model", model)):
+            if value is not None:
+                filters.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            filters.append("ts >= ?")
+            params.append(since)
+        if until:
+            filters.append("ts < ?")
+            params.append(until)
+        groups = [f"{GROUP_COLUMNS[column]} AS {column}" for column in group_by]
+        query = (
+            f"SELECT {''.join(group + ', ' for group in groups)}"
+            "COUNT(*) AS calls, COUNT(DISTINCT run_id) AS runs, "
+            "SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens, "
+            "SUM(cached_tokens) AS cached_tokens, SUM(total_tokens) AS total_tokens, "
+            "ROUND(SUM(cost_usd), 6) AS cost_usd, ROUND(AVG(latency_ms), 1) AS avg_latency_ms, "
+            "ROUND(MAX(latency_ms), 1) AS max_latency_ms, MIN(ts) AS first_call, MAX(ts) AS last_call "
+            "FROM llm_calls"
+            + (" WHERE " + " AND ".join(filters) if filters else "")
+            + (" GROUP BY " + ", ".join(GROUP_COLUMNS[column] for column in group_by)
+               + " ORDER BY " + ", ".join(GROUP_COLUMNS[column] for column in group_by) if group_by else "")
+        )
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        return [dict(row) for row in rows if row["calls"]]
+
+    def calls(self, run_id: str) -> List[Dict[str, Any]]:
+        """The ledger rows of one run, in call order"""
+        with self._lock:
+            rows = self._connect().execute("SELECT * FROM llm_calls WHERE run_id = ? ORDER BY id", (run_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+# Shared ledger for all agent runs in the process
+cost_ledger = CostLedger()
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Aggregate the LLM cost ledger")
+    parser.add_argument("--group-by", nargs="*", default=["day"], choices=list(GROUP_COLUMNS))
+    parser.add_argument("--since", help="ISO date or timestamp (inclusive)")
+    parser.add_argument("--until", help="ISO date or timestamp (exclusive)")
+    parser.add_argument("--run-id")
+    parser.add_argument("--role")
+    parser.add_argument("--project")
+    parser.add_argument("--model")
+    args = parser.parse_args()
+    print(json.dumps(cost_ledger.aggregate(args.group_by, since=args.since, until=args.until, run_id=args.run_id,
+                                           role=args.role, project=args.project, model=args.model), indent=2))
@@ -0,0 +1,50 @@
+import os
+import json
+import threading
+from email.utils import formatdate
+from typing import Any, Dict, Optional, Tuple
+
+
+class DocumentCache:
+    """
+    Parsed JSON documents cached by path and invalidated by (mtime, size).
+
+    A cache hit costs one os.stat(). Each entry carries a validator pair
+    (ETag, Last-Modified) derived from the file stamp for conditional GETs.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        # path -> ((mtime_ns, size), data, etag, last_modified)
+        self._entries: Dict[str, Tuple[Tuple[int, int], Any, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def stamp(self, path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path: str) -> Optional[Tuple[Any, str, str]]:
+        """Returns (data, etag, last_modified) for the JSON file at path, or None if it does not exist"""
+        stamp = self.stamp(path)
+        if stamp is None:
+            with self._lock:
+                self._entries.pop(path, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry[0] == stamp:
+            return entry[1], entry[2], entry[3]
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        etag = f'W/"{stamp[0]:x}-{stamp[1]:x}"'
+        last_modified = formatdate(stamp[0] / 1e9, usegmt=True)
+        with self._lock:
+            if len(self._entries) >= self.max_entries and path not in self._entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[path] = (stamp, data, etag, last_modified)
+        return data, etag, last_modified
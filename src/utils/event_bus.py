@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+
+class RunEventBus:
+    """
+    In-memory pub/sub of agent run events.
+
+    Every event gets a bus-wide increasing id and is kept in a bounded replay
+    buffer, so a subscriber that reconnects with the last id it saw receives
+    exactly the events it missed. Publishing is thread-safe and never blocks:
+    events are handed to each subscriber's event loop.
+    """
+
+    def __init__(self, max_events: int = 10000):
+        self._events: deque = deque(maxlen=max_events)
+        self._next_id = 1
+        # (run_id filter or None for all runs, subscriber loop, subscriber queue)
+        self._subscribers: List[Tuple[Optional[str], asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._lock = threading.Lock()
+
+    def publish(self, run_id: str, event_type: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            event = {
+                "id": self._next_id,
+                "run_id": run_id,
+                "type": event_type,
+                "time": datetime.now().isoformat(),
+                "data": data or {},
+            }
+            self._next_id += 1
+            self._events.append(event)
+            subscribers = list(self._subscribers)
+
+        for run_filter, loop, queue in subscribers:
+            if run_filter is not None and run_filter != run_id:
+                continue
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's loop is closed
+                self._unsubscribe(queue)
+        return event
+
+    def _unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = [entry for entry in self._subscribers if entry[2] is not queue]
+
+    def history(self, run_id: Optional[str] = None, after_id: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [event for event in self._events
+                    if event["id"] > after_id and (run_id is None or event["run_id"] == run_id)]
+
+    async def subscribe(self, run_id: Optional[str] = None, last_event_id: int = 0,
+                        heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield buffered events after last_event_id, then live events as they are published.
+        Yields None every `heartbeat` seconds without events so callers can keep connections alive.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            replay = [event for event in self._events
+                      if event["id"] > last_event_id and (run_id is None or event["run_id"] == run_id)]
+            self._subscribers.append((run_id, loop, queue))
+        try:
+            for event in replay:
+                yield event
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+        finally:
+            self._unsubscribe(queue)
+
+
+# Shared bus: agent runs publish here, add_ons_api.py streams from here
+event_bus = RunEventBus()
@@ -0,0 +1,232 @@
+import os
+import re
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Directory listings cached by directory mtime: abs_path -> (mtime_ns, dirs, files)
+_dir_cache: Dict[str, Tuple[int, List[str], List[str]]] = {}
+# Parsed .gitignore files cached by file mtime: abs_path -> (mtime_ns, GitIgnore)
+_gitignore_cache: Dict[str, Tuple[int, "GitIgnore"]] = {}
+_cache_lock = threading.Lock()
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translate a gitignore-style glob into a regex for '/'-separated relative paths.
+
+    '*' and '?' never cross a directory separator, '**' matches across directories
+    and '[...]' character classes are passed through ('!' negates the class).
+    """
+    i, n = 0, len(pattern)
+    regex = ""
+    while i < n:
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(pattern[i])
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            regex += f"[{body.replace(chr(92), chr(92) * 2)}]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+def compile_glob(pattern: str) -> "re.Pattern":
+    """
+    Compile a glob filter for relative file paths.
+    Patterns without a '/' match the file name at any depth (e.g. '*.py'),
+    patterns with a '/' match the whole relative path (e.g. 'src/**/*.py').
+    """
+    pattern = pattern.strip().replace("\\", "/").lstrip("/")
+    if "/" not in pattern:
+        return re.compile(f"(?:.*/)?{glob_to_regex(pattern)}$")
+    return re.compile(f"{glob_to_regex(pattern)}$")
+
+
+class GitIgnore:
+    """Rules parsed from a single .gitignore file, matched relative to its directory"""
+
+    def __init__(self, lines: List[str]):
+        # Each rule: (compiled regex, negated, directory only)
+        self.rules: List[Tuple["re.Pattern", bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            if line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            regex = glob_to_regex(line)
+            if not anchored:
+                regex = f"(?:.*/)?{regex}"
+            self.rules.append((re.compile(f"{regex}$"), negated, dir_only))
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional["GitIgnore"]:
+        """Load (and cache by mtime) the .gitignore at path, None if it does not exist"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with _cache_lock:
+            cached = _gitignore_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            gitignore = cls(f.readlines())
+        with _cache_lock:
+            _gitignore_cache[path] = (mtime, gitignore)
+        return gitignore
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Returns True if ignored, False if re-included by a '!' rule, None if no rule matched"""
+        result = None
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negated
+        return result
+
+
+def scan_dir(path: str) -> Tuple[List[str], List[str]]:
+    """
+    List (dirs, files) of a directory, sorted by name.
+    Results are cached until the directory mtime changes, so repeated walks of an
+    unchanged tree cost one stat() per directory.
+    """
+    abs_path = os.path.abspath(path)
+    mtime = os.stat(abs_path).st_mtime_ns
+    with _cache_lock:
+        cached = _dir_cache.get(abs_path)
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    dirs, files = [], []
+    with os.scandir(abs_path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+            except OSError:
+                continue
+    dirs.sort()
+    files.sort()
+    with _cache_lock:
+        _dir_cache[abs_path] = (mtime, dirs, files)
+    return dirs, files
+
+
+def find_repository_root(path: str) -> Optional[str]:
+    """Nearest directory at or above path that contains .git, None outside a repository"""
+    current = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def _parent_gitignores(root: str) -> Tuple[str, List[Tuple[str, "GitIgnore"]]]:
+    """
+    (root relative to its repository root, [(base, GitIgnore)] of the .gitignore files
+    from the repository root down to root's parent), bases relative to the repository root
+    """
+    repository_root = find_repository_root(root)
+    if repository_root is None or repository_root == root:
+        return "", []
+    prefix = os.path.relpath(root, repository_root).replace(os.sep, "/")
+    parts = prefix.split("/")
+    ignores = []
+    for base in ["/".join(parts[:depth]) for depth in range(len(parts))]:
+        gitignore = GitIgnore.from_file(os.path.join(repository_root, base, ".gitignore"))
+        if gitignore:
+            ignores.append((base, gitignore))
+    return prefix, ignores
+
+
+def walk_files(root: str = ".",
+               folders_to_omit: Optional[List[str]] = None,
+               max_depth: Optional[int] = None,
+               use_gitignore: bool = True) -> Iterator[str]:
+    """
+    Walk root and yield file paths relative to it with '/' as separator.
+
+    Directories named in folders_to_omit, and directories ignored by any
+    .gitignore on the way down (or in the parent directories up to the
+    repository root), are pruned before they are descended into.
+    max_depth limits recursion (0 lists only the files directly in root).
+    """
+    omit = set(folders_to_omit or [])
+    root = os.path.abspath(root)
+    # Gitignore rules match paths relative to the repository root; prefix is root's path from there
+    prefix, parent_ignores = _parent_gitignores(root) if use_gitignore else ("", [])
+    # Stack of (dir relative path, depth, applicable [(base path from the repository root, GitIgnore)])
+    stack = [("", 0, parent_ignores)]
+    while stack:
+        rel_dir, depth, ignores = stack.pop()
+        abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+        try:
+            dirs, files = scan_dir(abs_dir)
+        except OSError:
+            continue
+
+        if use_gitignore and ".gitignore" in files:
+            gitignore = GitIgnore.from_file(os.path.join(abs_dir, ".gitignore"))
+            if gitignore:
+                base = "/".join(part for part in (prefix, rel_dir) if part)
+                ignores = ignores + [(base, gitignore)]
+
+        def is_ignored(rel_path: str, is_dir: bool) -> bool:
+            path = f"{prefix}/{rel_path}" if prefix else rel_path
+            ignored = False
+            for base, gitignore in ignores:
+                matched = gitignore.match(path[len(base) + 1:] if base else path, is_dir)
+                if matched is not None:
+                    ignored = matched
+            return ignored
+
+        for name in files:
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if name in omit or (ignores and is_ignored(rel_path, False)):
+                continue
+            yield rel_path
+
+        if max_depth is not None and depth >= max_depth:
+            continue
+        # Push in reverse so directories are visited in sorted order
+        for name in reversed(dirs):
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if name in omit or (ignores and is_ignored(rel_path, True)):
+                continue
+            stack.append((rel_path, depth + 1, ignores))
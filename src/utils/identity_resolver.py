@@ -0,0 +1,257 @@
+import os
+import re
+import json
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from src.utils.rate_limiter import azdo_rate_limiter
+from src.utils.tool_metrics import record_cache_hit
+
+load_dotenv()
+
+# Configuration
+identity_cache_path = os.getenv('REA_IDENTITY_CACHE', '.rea_identity_cache.json')
+identity_cache_ttl = float(os.getenv('REA_IDENTITY_CACHE_TTL', str(7 * 24 * 3600)))
+identity_lookup_workers = int(os.getenv('REA_IDENTITY_LOOKUP_WORKERS', '4'))
+
+# Identity ids per read_identities call (they are sent in the query string)
+ID_BATCH_SIZE = 50
+
+GUID_PATTERN = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+
+
+def is_guid(value: str) -> bool:
+    return bool(GUID_PATTERN.match(value or ""))
+
+
+def _key(value: str) -> str:
+    return (value or "").strip().casefold()
+
+
+def _property(identity: Any, name: str) -> Optional[str]:
+    properties = getattr(identity, 'properties', None) or {}
+    value = properties.get(name)
+    return value.get('$value') if isinstance(value, dict) else value
+
+
+def _entry(identity: Any) -> Optional[Dict[str, Any]]:
+    """Cache entry for an IdentityRef (team members, work item fields), an Identity (identities API) or a dict"""
+    if identity is None:
+        return None
+    if isinstance(identity, dict):
+        identity_id = identity.get('id')
+        display_name = identity.get('displayName') or identity.get('display_name')
+        unique_name = identity.get('uniqueName') or identity.get('unique_name')
+        email = identity.get('mail') or identity.get('email')
+        descriptor = identity.get('descriptor')
+    else:
+        identity_id = getattr(identity, 'id', None)
+        display_name = (getattr(identity, 'display_name', None) or getattr(identity, 'custom_display_name', None)
+                        or getattr(identity, 'provider_display_name', None))
+        unique_name = getattr(identity, 'unique_name', None) or _property(identity, 'Account')
+        email = _property(identity, 'Mail')
+        descriptor = getattr(identity, 'descriptor', None)
+    if not identity_id:
+        return None
+    if not email and unique_name and '@' in unique_name:
+        email = unique_name
+    return {'id': identity_id, 'display_name': display_name, 'unique_name': unique_name, 'email': email,
+            'descriptor': descriptor, 'cached_at': time.time()}
+
+
+def _matches(entry: Dict[str, Any], value: str) -> bool:
+    return _key(value) in {_key(entry.get(field)) for field in ('id', 'unique_name', 'email', 'display_name')}
+
+
+class IdentityResolver:
+    """
+    Resolves users given by id, unique name, email or display name to identities.
+
+    Resolved identities are kept per organization in a JSON file and indexed by every
+    one of those names, so repeated lookups (and lookups in later runs) cost nothing
+    until the TTL runs out. Misses are looked up together: ids in one batched call,
+    the other names concurrently. Team member lists warm the cache for free.
+    """
+
+    def __init__(self, path: str = identity_cache_path, ttl: float = identity_cache_ttl,
+                 max_workers: int = identity_lookup_workers):
+        self.path = path
+        self.ttl = ttl
+        self.max_workers = max(1, max_workers)
+        # organization -> {"identities": {id: entry}, "aliases": {name: id}}
+        self._organizations: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._loaded = False
+        # organization -> entry of the user the connection authenticates as (not persisted)
+        self._current_users: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def organization(connection) -> str:
+        return _key(connection.base_url).rstrip('/')
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for organization, identities in (data.get('organizations') or {}).items():
+            self._index(organization, identities.values(), save=False)
+
+    def _save(self):
+        if not self.path:
+            return
+        data = {'organizations': {organization: cache['identities'] for organization, cache in self._organizations.items()}}
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+
+    def _index(self, organization: str, entries: Iterable[Dict[str, Any]], save: bool = True):
+        cache = self._organizations.setdefault(organization, {'identities': {}, 'aliases': {}})
+        changed = False
+        for entry in entries:
+            if not entry:
+                continue
+            previous = cache['identities'].get(entry['id'])
+            # Entries from the identities API carry the email and descriptor; keep them when a team list refreshes the entry
+            merged = {**previous, **{field: value for field, value in entry.items() if value}} if previous else entry
+            cache['identities'][entry['id']] = merged
+            for field in ('id', 'unique_name', 'email', 'display_name'):
+                if merged.get(field):
+                    cache['aliases'][_key(merged[field])] = entry['id']
+            changed = True
+        if changed and save:
+            self._save()
+
+    def remember(self, connection, identities: Iterable[Any]) -> int:
+        """Caches identities (IdentityRef, Identity or dicts); returns how many were cached"""
+        entries = [entry for entry in (_entry(identity) for identity in identities) if entry]
+        with self._lock:
+            self._load()
+            self._index(self.organization(connection), entries)
+        return len(entries)
+
+    def warm_from_team_members(self, connection, team_members: Iterable[Any]) -> int:
+        """Caches the identities of a get_team_members_with_extended_properties result"""
+        return self.remember(connection, [getattr(member, 'identity', None) for member in team_members or []])
+
+    def lookup(self, connection, value: str) -> Optional[Dict[str, Any]]:
+        """Cached identity for a name, or None when it is not cached or has expired"""
+        with self._lock:
+            self._load()
+            cache = self._organizations.get(self.organization(connection))
+            if not cache:
+                return None
+            identity_id = cache['aliases'].get(_key(value))
+            entry = cache['identities'].get(identity_id) if identity_id else None
+        if entry and time.time() - entry.get('cached_at', 0) < self.ttl:
+            return entry
+        return None
+
+    def _read_ids(self, identity_client, ids: List[str]) -> List[Any]:
+        azdo_rate_limiter.acquire()  # To avoid rate limiting
+        return [identity for identity in identity_client.read_identities(identity_ids=",".join(ids)) or [] if identity]
+
+    def _search(self, identity_client, value: str) -> Optional[Any]:
+        azdo_rate_limiter.acquire()  # To avoid rate limiting
+        identities = [identity for identity in identity_client.read_identities(
+            search_filter='General', filter_value=value) or [] if identity]
+        if not identities:
+            return None
+        # A display name search can return several people; prefer the exact match
+        return next((identity for identity in identities if _matches(_entry(identity) or {}, value)), identities[0])
+
+    def resolve_many(self, connection, values: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Resolve many users at once.
+
+        Args:
+            connection: Azure DevOps connection of the organization
+            values: identity ids, unique names, emails or display names
+
+        Returns:
+            value -> cached identity entry (id, display_name, unique_name, email, descriptor), None if not found
+        """
+        values = [value for value in dict.fromkeys(str(value).strip() for value in values or []) if value]
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        misses = []
+        for value in values:
+            entry = self.lookup(connection, value)
+            if entry:
+                record_cache_hit()
+                results[value] = entry
+            else:
+                misses.append(value)
+        if not misses:
+            return results
+
+        identity_client = connection.clients.get_identity_client()
+        ids = [value for value in misses if is_guid(value)]
+        names = [value for value in misses if not is_guid(value)]
+        found: List[Any] = []
+        # Copy the caller's context into each task so metrics and traces are attributed to the calling tool
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(names), 1))) as executor:
+            searches = {value: executor.submit(contextvars.copy_context().run, self._search, identity_client, value)
+                        for value in names}
+            for offset in range(0, len(ids), ID_BATCH_SIZE):
+                found.extend(self._read_ids(identity_client, ids[offset:offset + ID_BATCH_SIZE]))
+            searched = {value: future.result() for value, future in searches.items()}
+
+        entries = {entry['id'].casefold(): entry for entry in (_entry(identity) for identity in found) if entry}
+        for value in ids:
+            results[value] = entries.get(value.casefold())
+        for value, identity in searched.items():
+            results[value] = _entry(identity)
+        with self._lock:
+            self._load()
+            self._index(self.organization(connection), [entry for entry in results.values() if entry])
+        return results
+
+    def resolve(self, connection, value: str) -> Optional[Dict[str, Any]]:
+        return self.resolve_many(connection, [value]).get(str(value).strip())
+
+    def resolve_ids(self, connection, values: Iterable[str]) -> Dict[str, Optional[str]]:
+        """value -> identity id; values that are already ids are kept even when the lookup finds nothing"""
+        resolved = self.resolve_many(connection, values)
+        return {value: entry['id'] if entry else (value if is_guid(value) else None) for value, entry in resolved.items()}
+
+    def current_user(self, connection) -> Dict[str, Any]:
+        """Identity the connection authenticates as (looked up once per process)"""
+        organization = self.organization(connection)
+        with self._lock:
+            entry = self._current_users.get(organization)
+        if entry:
+            record_cache_hit()
+            return entry
+        azdo_rate_limiter.acquire()  # To avoid rate limiting
+        user = connection.clients.get_location_client().get_connection_data().authenticated_user
+        entry = _entry(user)
+        if entry is None:
+            raise ValueError("Could not determine the authenticated user")
+        self.remember(connection, [user])
+        with self._lock:
+            self._current_users[organization] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._organizations.clear()
+            self._current_users.clear()
+            self._loaded = True
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+identity_resolver = IdentityResolver()
@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from azure.devops.v7_0.work.models import TeamContext
+from src.utils.rate_limiter import azdo_rate_limiter
+from src.utils.tool_metrics import record_cache_hit
+
+load_dotenv()
+
+# Configuration
+iteration_cache_ttl = float(os.getenv('REA_ITERATION_CACHE_TTL', '300'))
+
+# Iteration names that resolve to the iteration whose dates contain today
+CURRENT_ITERATION_ALIASES = ("@currentiteration", "current", "current sprint", "current iteration")
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).date()
+        except ValueError:
+            return None
+    return None
+
+
+def _path_key(path: str) -> str:
+    return path.replace("/", "\\").strip("\\").casefold()
+
+
+class TeamIterations:
+    """One team's iterations, indexed by name, path and date range"""
+
+    def __init__(self, iterations: List[Any]):
+        self.iterations = list(iterations or [])
+        self.by_name: Dict[str, Any] = {}
+        self.by_path: Dict[str, Any] = {}
+        # (start, finish, iteration) for iterations with dates, by start date
+        self.ranges: List[Tuple[date, date, Any]] = []
+        for iteration in self.iterations:
+            self.by_name.setdefault((iteration.name or "").casefold(), iteration)
+            if iteration.path:
+                self.by_path.setdefault(_path_key(iteration.path), iteration)
+            attributes = iteration.attributes
+            start = _as_date(getattr(attributes, "start_date", None)) if attributes else None
+            finish = _as_date(getattr(attributes, "finish_date", None)) if attributes else None
+            if start and finish:
+                self.ranges.append((start, finish, iteration))
+        self.ranges.sort(key=lambda entry: entry[0])
+
+    def current(self, today: Optional[date] = None) -> Optional[Any]:
+        today = today or date.today()
+        for start, finish, iteration in self.ranges:
+            if start <= today <= finish:
+                return iteration
+        # No dates configured: fall back to the time frame Azure DevOps computed
+        for iteration in self.iterations:
+            if iteration.attributes and str(getattr(iteration.attributes, "time_frame", "")).lower() == "current":
+                return iteration
+        return None
+
+    def find(self, iteration: str, today: Optional[date] = None) -> Optional[Any]:
+        """Iteration by name, path (e.g. 'Project\\Sprint 3') or '@CurrentIteration'"""
+        key = (iteration or "").strip()
+        if key.casefold() in CURRENT_ITERATION_ALIASES:
+            return self.current(today)
+        return self.by_name.get(key.casefold()) or self.by_path.get(_path_key(key))
+
+    def names(self) -> List[str]:
+        return [iteration.name for iteration in self.iterations]
+
+
+class TeamIterationCache:
+    """
+    Team iterations per (organization, project, team), shared by all connectors
+    and agent runs in the process. Entries expire after `ttl` seconds; a hit costs
+    no HTTP request and is counted against the tool call in progress.
+    """
+
+    def __init__(self, ttl: float = iteration_cache_ttl):
+        self.ttl = ttl
+        # key -> (fetched_at monotonic, TeamIterations)
+        self._entries: Dict[Tuple[str, str, str], Tuple[float, TeamIterations]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(work_client, project: str, team: str) -> Tuple[str, str, str]:
+        return (str(getattr(work_client, "normalized_url", "")).rstrip("/").lower(), project.lower(), team.lower())
+
+    def get(self, work_client, project: str, team: str) -> TeamIterations:
+        key = self._key(work_client, project, team)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            record_cache_hit()
+            return entry[1]
+        azdo_rate_limiter.acquire()  # To avoid rate limiting
+        iterations = TeamIterations(work_client.get_team_iterations(team_context=TeamContext(project=project, team=team)))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), iterations)
+        return iterations
+
+    def invalidate(self, work_client, project: str, team: str):
+        """Drop a team's entry after its iterations were changed"""
+        with self._lock:
+            self._entries.pop(self._key(work_client, project, team), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared cache for all connectors in the process
+team_iteration_cache = TeamIterationCache()
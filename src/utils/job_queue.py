@@ -0,0 +1,121 @@
+import os
+import asyncio
+import traceback
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from src.utils.run_registry import RunRegistry, run_registry
+from src.utils.uuid_generator import generate_uuid
+
+load_dotenv()
+
+# Configuration
+max_workers = int(os.getenv('REA_MAX_WORKERS', '4'))
+max_runs_per_project = int(os.getenv('REA_MAX_RUNS_PER_PROJECT', '2'))
+job_executor = os.getenv('REA_JOB_EXECUTOR', 'async')
+project_name = os.getenv('PROJECT_NAME', 'YourProject')
+
+# Stored run results are truncated to this many characters
+MAX_RESULT_CHARS = 20000
+
+
+def _run_agent_in_process(user_prompt: str, role: Optional[str], run_id: str, project: Optional[str] = None,
+                          spec: Optional[str] = None) -> Optional[str]:
+    """Entry point for worker processes: runs one agent with its own event loop"""
+    from src.agents.agent import rea_agent
+
+    result = asyncio.run(rea_agent(user_prompt, role=role, run_id=run_id, project=project, spec=spec))
+    return result.get("output") if isinstance(result, dict) else result
+
+
+class JobQueue:
+    """
+    Runs submitted agent jobs concurrently with bounded parallelism.
+
+    At most max_workers runs execute at once, and at most max_per_project of them
+    for the same Azure DevOps project. Jobs run as asyncio tasks in this process
+    (executor='async', so /stream and HTTP approvals see them) or in a process
+    pool (executor='process', isolated but only visible through the registry).
+    Every state change is recorded in the run registry under the run id.
+    """
+
+    def __init__(self, max_workers: int = max_workers, max_per_project: int = max_runs_per_project,
+                 executor: str = job_executor, registry: RunRegistry = run_registry):
+        if executor not in ("async", "process"):
+            raise ValueError(f"Unknown job executor '{executor}'. Use 'async' or 'process'.")
+        self.max_workers = max_workers
+        self.max_per_project = max_per_project
+        self.executor = executor
+        self.registry = registry
+        self._workers = asyncio.Semaphore(max_workers)
+        self._project_slots: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def _project_slot(self, project: str) -> asyncio.Semaphore:
+        if project not in self._project_slots:
+            self._project_slots[project] = asyncio.Semaphore(self.max_per_project)
+        return self._project_slots[project]
+
+    def submit(self, user_prompt: str, role: Optional[str] = None,
+               project: Optional[str] = None, run_id: Optional[str] = None, spec: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue an agent run and return its registry record. Must be called from a running event loop.
+        spec ('file.yaml' or 'file.yaml#agent-name') runs that agent spec instead of the role's.
+        """
+        run_id = run_id or generate_uuid()
+        project = project or project_name
+        record = self.registry.register(
+            run_id, role,
+            status="queued",
+            project=project,
+            prompt=user_prompt,
+            queued_at=datetime.now().isoformat()
+        )
+        task = asyncio.get_running_loop().create_task(self._run(run_id, user_prompt, role, project, spec))
+        self._tasks[run_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(run_id, None))
+        return record
+
+    async def _run(self, run_id: str, user_prompt: str, role: Optional[str], project: str, spec: Optional[str] = None):
+        # Wait for a project slot first so a blocked project does not hold a worker slot
+        async with self._project_slot(project), self._workers:
+            self.registry.update(run_id, status="running", started_at=datetime.now().isoformat())
+            try:
+                if self.executor == "process":
+                    if self._process_pool is None:
+                        self._process_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                    output = await asyncio.get_running_loop().run_in_executor(
+                        self._process_pool, _run_agent_in_process, user_prompt, role, run_id, project, spec
+                    )
+                else:
+                    from src.agents.agent import rea_agent
+
+                    result = await rea_agent(user_prompt, role=role, run_id=run_id, project=project, spec=spec)
+                    output = result.get("output") if isinstance(result, dict) else result
+            except Exception as e:
+                traceback.print_exc()
+                self.registry.update(run_id, status="failed", finished_at=datetime.now().isoformat(), error=str(e))
+                return
+
+        fields = {"result": str(output)[:MAX_RESULT_CHARS] if output is not None else None}
+        run = self.registry.get(run_id) or {}
+        if run.get("status") in ("queued", "running"):
+            # rea_agent reports its own errors and returns None instead of raising
+            fields.update(status="failed", finished_at=datetime.now().isoformat(),
+                          error=run.get("error") or "Agent run ended without a result")
+        self.registry.update(run_id, **fields)
+
+    def active_runs(self) -> int:
+        return len(self._tasks)
+
+    async def wait(self):
+        """Wait until every submitted run has finished"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def shutdown(self):
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
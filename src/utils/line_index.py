@@ -0,0 +1,120 @@
+import mmap
+import os
+import threading
+from array import array
+from typing import Dict, Optional, Tuple
+
+# Chunk size used when counting newlines over the whole file
+_COUNT_CHUNK = 1 << 20
+
+_index_cache: Dict[str, "LineIndex"] = {}
+_cache_lock = threading.Lock()
+
+
+class LineIndex:
+    """
+    Lazily built line-offset index over a memory-mapped file.
+
+    Offsets are only discovered up to the highest line requested so far, so reading
+    lines near the start of a huge file never touches the rest of it. The index is
+    reused for as long as the file's mtime and size stay the same.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        stat = os.stat(path)
+        self.mtime = stat.st_mtime_ns
+        self.size = stat.st_size
+        # offsets[i] is the byte offset where line i (0-based) starts
+        self.offsets = array("Q", [0])
+        self._scanned = 0
+        self._line_count: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_file(cls, path: str) -> "LineIndex":
+        """Returns the cached index for path, rebuilding it if the file changed"""
+        abs_path = os.path.abspath(path)
+        stat = os.stat(abs_path)
+        with _cache_lock:
+            index = _index_cache.get(abs_path)
+            if index is None or index.mtime != stat.st_mtime_ns or index.size != stat.st_size:
+                index = cls(abs_path)
+                _index_cache[abs_path] = index
+        return index
+
+    def _extend_to(self, mm: mmap.mmap, line: int):
+        """Discover line start offsets until line (0-based) is known or EOF is reached"""
+        pos = self._scanned
+        offsets = self.offsets
+        while len(offsets) <= line and pos < self.size:
+            newline = mm.find(b"\n", pos)
+            if newline == -1:
+                pos = self.size
+                break
+            pos = newline + 1
+            if pos < self.size:
+                offsets.append(pos)
+        self._scanned = pos
+        if pos >= self.size:
+            # Every line start is known now
+            self._line_count = len(offsets)
+
+    def known_line_count(self) -> Tuple[int, bool]:
+        """
+        Lines known so far without reading any more of the file.
+
+        Returns:
+            (line count, True) once the whole file has been scanned, else
+            (lines discovered so far, False): the file has at least that many lines
+        """
+        with self._lock:
+            if self.size == 0:
+                return 0, True
+            if self._line_count is not None:
+                return self._line_count, True
+            return len(self.offsets), False
+
+    def line_count(self) -> int:
+        """Total number of lines in the file (a trailing newline does not start a new line); scans the whole file once"""
+        if self._line_count is None:
+            if self.size == 0:
+                self._line_count = 0
+                return 0
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                count = 0
+                for start in range(0, self.size, _COUNT_CHUNK):
+                    count += mm[start:start + _COUNT_CHUNK].count(b"\n")
+                if mm[self.size - 1:self.size] != b"\n":
+                    count += 1
+            self._line_count = count
+        return self._line_count
+
+    def read_lines(self, start_line: int, end_line: int) -> Tuple[bytes, int]:
+        """
+        Read lines start_line..end_line (1-based, inclusive).
+
+        Returns:
+            (raw bytes of those lines, number of the last line actually read)
+        """
+        if self.size == 0 or start_line > end_line:
+            return b"", start_line - 1
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with self._lock:
+                self._extend_to(mm, end_line)
+                offsets = self.offsets
+                if start_line - 1 >= len(offsets):
+                    return b"", start_line - 1
+                start = offsets[start_line - 1]
+                if end_line < len(offsets):
+                    end, last_line = offsets[end_line], end_line
+                else:
+                    end, last_line = self.size, len(offsets)
+            return mm[start:end], last_line
+
+    def read_bytes(self, start_byte: int, end_byte: int) -> bytes:
+        """Read the byte range [start_byte, end_byte)"""
+        if self.size == 0:
+            return b""
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[max(start_byte, 0):min(end_byte, self.size)]
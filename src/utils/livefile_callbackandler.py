@@ -1,32 +1,62 @@
 from langchain.callbacks.base import BaseCallbackHandler
+from typing import Optional
+from src.utils.event_bus import RunEventBus
+
+# Tool outputs and LLM responses are truncated to this many characters in streamed events
+MAX_EVENT_TEXT = 2000
 
 class LiveFileCallbackHandler(BaseCallbackHandler):
-    def __init__(self, filename):
+    def __init__(self, filename, run_id: Optional[str] = None, event_bus: Optional[RunEventBus] = None):
         self.file = open(filename, 'a')
-    
+        self.run_id = run_id
+        self.event_bus = event_bus
+
+    def _publish(self, event_type, **data):
+        """Push the event to live subscribers (e.g. the /stream endpoint) if a bus is attached"""
+        if self.event_bus is not None:
+            self.event_bus.publish(self.run_id, event_type, data)
+
     def on_llm_start(self, serialized, prompts, **kwargs):
         self.file.write(f"LLM started with prompts: {prompts}\n")
         self.file.flush()  # Force write to disk
-    
+        self._publish("llm_start")
+
     def on_llm_end(self, response, **kwargs):
         self.file.write(f"LLM response: {response}\n")
         self.file.flush()
-    
+        text = ""
+        if response.generations and response.generations[0]:
+            text = response.generations[0][0].text
+        self._publish("llm_end", text=text[:MAX_EVENT_TEXT])
+
     def on_agent_action(self, action, **kwargs):
         self.file.write(f"Agent action: {action.log}\n")
         self.file.flush()
-    
+        self._publish("agent_action", tool=action.tool, tool_input=str(action.tool_input)[:MAX_EVENT_TEXT])
+
     def on_tool_start(self, serialized, input_str, **kwargs):
         self.file.write(f"Tool started: {serialized.get('name')} with input: {input_str}\n")
         self.file.flush()
-    
+        self._publish("tool_start", tool=serialized.get('name'), input=str(input_str)[:MAX_EVENT_TEXT])
+
     def on_tool_end(self, output, **kwargs):
         self.file.write(f"Tool output: {output}\n")
         self.file.flush()
-    
+        self._publish("tool_end", output=str(output)[:MAX_EVENT_TEXT])
+
+    def on_tool_error(self, error, **kwargs):
+        self.file.write(f"Tool error: {error}\n")
+        self.file.flush()
+        self._publish("tool_error", error=str(error)[:MAX_EVENT_TEXT])
+
+    def on_agent_finish(self, finish, **kwargs):
+        self.file.write(f"Agent finished: {finish.log}\n")
+        self.file.flush()
+        self._publish("agent_finish", output=str(finish.return_values.get("output", ""))[:MAX_EVENT_TEXT])
+
     def on_text(self, text, **kwargs):
         self.file.write(f"Text: {text}\n")
         self.file.flush()
-    
+
     def __del__(self):
         self.file.close()
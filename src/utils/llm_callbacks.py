@@ -0,0 +1,160 @@
+import time
+import sqlite3
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from src.utils.tracing import Span, tracer
+from src.utils.cost_ledger import CostLedger, cost_ledger, llm_call_cost
+from src.utils.run_budget import RunBudget
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Opens a span per LLM call under the given parent (the agent run span), with model and token counts"""
+
+    run_inline = True
+    ignore_chain = True
+    ignore_agent = True
+    ignore_retriever = True
+
+    def __init__(self, parent):
+        self.parent = parent
+        self._spans: Dict[Any, Span] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, serialized, invocation_params):
+        model = (invocation_params or {}).get("model_name") or (invocation_params or {}).get("model") \
+            or ((serialized or {}).get("kwargs") or {}).get("model_name") or "llm"
+        span = tracer.start_span(f"LLM {model}", parent=self.parent, attributes={"llm.model": model})
+        with self._lock:
+            self._spans[run_id] = span
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, invocation_params=None, **kwargs):
+        self._start(run_id, serialized, invocation_params)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, invocation_params=None, **kwargs):
+        self._start(run_id, serialized, invocation_params)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        try:
+            message = response.generations[0][0].message
+            metadata = getattr(message, "usage_metadata", None) or {}
+            usage = usage or {"prompt_tokens": metadata.get("input_tokens"), "completion_tokens": metadata.get("output_tokens"),
+                              "total_tokens": metadata.get("total_tokens")}
+            model = (message.response_metadata or {}).get("model_name")
+            if model:
+                span.name = f"LLM {model}"
+                span.set_attribute("llm.model", model)
+            function_call = message.additional_kwargs.get("function_call") or {}
+            span.set_attribute("llm.function_call", function_call.get("name"))
+        except (IndexError, AttributeError):
+            pass
+        span.set_attributes({
+            "llm.prompt_tokens": usage.get("prompt_tokens"),
+            "llm.completion_tokens": usage.get("completion_tokens"),
+            "llm.total_tokens": usage.get("total_tokens"),
+        })
+        span.end()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.record_exception(error)
+            span.end()
+
+
+# Set by rea_agent; attaches the LLM span handler to every LLM call made in the run's context
+tracing_callback_var: ContextVar[Optional[TracingCallbackHandler]] = ContextVar("rea_tracing_callback", default=None)
+register_configure_hook(tracing_callback_var, True)
+
+
+def llm_usage(response) -> Tuple[str, int, int, int]:
+    """(model, prompt tokens, completion tokens, cached tokens) of an LLMResult"""
+    llm_output = response.llm_output or {}
+    model = llm_output.get("model_name", "")
+    usage = llm_output.get("token_usage") or {}
+    prompt_tokens = usage.get("prompt_tokens", 0)
+    completion_tokens = usage.get("completion_tokens", 0)
+    cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+    try:
+        message = response.generations[0][0].message
+        model = (message.response_metadata or {}).get("model_name") or model
+        metadata = message.usage_metadata
+        if metadata:
+            prompt_tokens, completion_tokens = metadata["input_tokens"], metadata["output_tokens"]
+            cached_tokens = (metadata.get("input_token_details") or {}).get("cache_read", 0)
+    except (IndexError, AttributeError):
+        pass
+    return model, prompt_tokens or 0, completion_tokens or 0, cached_tokens or 0
+
+
+class CostLedgerCallbackHandler(BaseCallbackHandler):
+    """Appends one ledger row per LLM call made in the run's context"""
+
+    ignore_chain = True
+    ignore_agent = True
+    ignore_retriever = True
+
+    def __init__(self, run_id: str, role: Optional[str] = None, project: Optional[str] = None,
+                 ledger: CostLedger = cost_ledger):
+        self.run_id = run_id
+        self.role = role
+        self.project = project
+        self.ledger = ledger
+        self._started: Dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        latency_ms = (time.perf_counter() - started) * 1000 if started is not None else None
+        model, prompt_tokens, completion_tokens, cached_tokens = llm_usage(response)
+        try:
+            self.ledger.append(self.run_id, model, prompt_tokens, completion_tokens, cached_tokens,
+                               latency_ms, role=self.role, project=self.project)
+        except sqlite3.Error as e:
+            print(f"Error writing cost ledger: {str(e)}")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
+# Set by rea_agent; attaches the ledger handler to every LLM call made in the run's context
+cost_ledger_callback_var: ContextVar[Optional[CostLedgerCallbackHandler]] = ContextVar("rea_cost_ledger_callback", default=None)
+register_configure_hook(cost_ledger_callback_var, True)
+
+
+class BudgetCallbackHandler(BaseCallbackHandler):
+    """Records the tokens, cost and tool calls of every LLM and tool call made in the run's context against its budget"""
+
+    run_inline = True
+    # Tool events are dispatched as agent events, so ignore_agent stays off
+    ignore_chain = True
+    ignore_retriever = True
+
+    def __init__(self, budget: RunBudget):
+        self.budget = budget
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model, prompt_tokens, completion_tokens, cached_tokens = llm_usage(response)
+        self.budget.record_llm_call(prompt_tokens + completion_tokens,
+                                    llm_call_cost(model, prompt_tokens, completion_tokens, cached_tokens))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.budget.record_tool_call((serialized or {}).get("name") or kwargs.get("name") or "tool")
+
+
+# Set by rea_agent; counts every LLM and tool call made in the run's context against the run's budget
+budget_callback_var: ContextVar[Optional[BudgetCallbackHandler]] = ContextVar("rea_budget_callback", default=None)
+register_configure_hook(budget_callback_var, True)
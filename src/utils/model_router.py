@@ -0,0 +1,145 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from src.utils.tool_metrics import current_run_id
+
+load_dotenv()
+
+# Configuration
+# Model for cheap sub-tasks (empty: every call goes to the agent's model)
+router_small_model = os.getenv('REA_ROUTER_SMALL_MODEL', 'gpt-4o-mini')
+# OpenAI-compatible server of the small model, e.g. a local CPU model (Ollama: http://localhost:11434/v1,
+# llama.cpp server: http://localhost:8080/v1); empty: OpenAI
+router_base_url = os.getenv('REA_ROUTER_BASE_URL', '')
+# Key for REA_ROUTER_BASE_URL (the OpenAI key is never sent there)
+router_api_key = os.getenv('REA_ROUTER_API_KEY', '')
+# Sub-tasks sent to the small model
+router_tasks = os.getenv('REA_ROUTER_TASKS', 'classification,summary,json_extraction')
+# Longer prompts go to the large model (0 = no limit; set it to fit a local model's context)
+router_max_prompt_chars = int(os.getenv('REA_ROUTER_MAX_PROMPT_CHARS', '0'))
+# After a failed call the small model is skipped for this many seconds
+router_cooldown_seconds = float(os.getenv('REA_ROUTER_COOLDOWN_SECONDS', '60'))
+
+# Key sent to a custom base_url when REA_ROUTER_API_KEY is empty (OpenAI-compatible local servers ignore it)
+LOCAL_API_KEY = "not-needed"
+
+SMALL = "small"
+LARGE = "large"
+
+
+class ModelRouter:
+    """
+    Picks the model for each LLM sub-task.
+
+    Cheap sub-tasks (classification, summaries, JSON extraction) go to a small model, which
+    can be a local CPU model behind an OpenAI-compatible server; agent reasoning and
+    anything else stays on the agent's model. A sub-task falls back to the large model when
+    the small model fails or its answer cannot be parsed, and a failing small model is
+    skipped for a cooldown. Every decision is recorded per run with its latency.
+    """
+
+    def __init__(self, small_model: str = router_small_model, base_url: str = router_base_url,
+                 api_key: str = router_api_key, tasks: str = router_tasks,
+                 max_prompt_chars: int = router_max_prompt_chars, cooldown_seconds: float = router_cooldown_seconds,
+                 max_runs: int = 200):
+        self.small_model = small_model
+        self.base_url = base_url or None
+        # Never send the OpenAI key to another server: local servers get a placeholder unless a key is configured
+        self.api_key = api_key or (LOCAL_API_KEY if self.base_url else None)
+        self.tasks = {task.strip() for task in tasks.split(",") if task.strip()}
+        self.max_prompt_chars = max_prompt_chars
+        self.cooldown_seconds = cooldown_seconds
+        self.max_runs = max_runs
+        self._unavailable_until = 0.0
+        self._runs: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> str:
+        return self.base_url or "openai"
+
+    def route(self, task: str, prompt: str) -> Tuple[str, str]:
+        """(SMALL or LARGE, reason) for a sub-task"""
+        if not self.small_model:
+            return LARGE, "no small model configured"
+        if task not in self.tasks:
+            return LARGE, f"{task} stays on the large model"
+        if self.max_prompt_chars and len(prompt) > self.max_prompt_chars:
+            return LARGE, f"prompt over {self.max_prompt_chars} chars"
+        with self._lock:
+            if time.monotonic() < self._unavailable_until:
+                return LARGE, "small model failed recently"
+        return SMALL, f"{task} is a cheap sub-task"
+
+    def _record(self, run_id: Optional[str], entry: Dict[str, Any]):
+        if not run_id:
+            return
+        with self._lock:
+            decisions = self._runs.get(run_id)
+            if decisions is None:
+                decisions = self._runs[run_id] = []
+                if len(self._runs) > self.max_runs:
+                    self._runs.popitem(last=False)
+            decisions.append(entry)
+
+    def invoke(self, task: str, prompt: str, llm_factory: Callable[..., Any],
+               parse: Optional[Callable[[str], Any]] = None, run_id: Optional[str] = None,
+               model: Optional[str] = None, temperature: Optional[float] = None) -> Any:
+        """
+        Run one sub-task on the model the router picks.
+
+        Args:
+            task: 'classification', 'summary', 'json_extraction' or anything else (large model)
+            prompt: the prompt
+            llm_factory: the agent's get_llm(model, temperature, base_url, api_key)
+            parse: turns the answer's content into the result; a ValueError from it on the
+                small model's answer escalates the task to the large model
+            run_id: run the decision is recorded for (default: the current run)
+            model, temperature: the large model, i.e. the run's (its spec's) model; the
+                factory's defaults when not given
+
+        Returns:
+            parse(content) when parse is given, else the model's message
+        """
+        run_id = run_id or current_run_id.get()
+        target, reason = self.route(task, prompt)
+        if target == SMALL:
+            started = time.perf_counter()
+            entry = {"task": task, "route": SMALL, "model": self.small_model, "backend": self.backend, "reason": reason}
+            try:
+                response = llm_factory(self.small_model, 0.0, base_url=self.base_url, api_key=self.api_key).invoke(prompt)
+            except Exception as e:
+                with self._lock:
+                    self._unavailable_until = time.monotonic() + self.cooldown_seconds
+                self._record(run_id, {**entry, "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                                      "error": f"Error calling small model: {str(e)}"})
+                reason = "small model failed"
+            else:
+                latency_ms = round((time.perf_counter() - started) * 1000, 1)
+                try:
+                    result = parse(response.content) if parse else response
+                except ValueError as e:
+                    self._record(run_id, {**entry, "latency_ms": latency_ms, "error": f"Unusable answer: {str(e)}"})
+                    reason = "small model answer could not be parsed"
+                else:
+                    self._record(run_id, {**entry, "latency_ms": latency_ms})
+                    return result
+
+        started = time.perf_counter()
+        large_settings = {name: value for name, value in (("model", model), ("temperature", temperature)) if value is not None}
+        llm = llm_factory(**large_settings)
+        response = llm.invoke(prompt)
+        self._record(run_id, {"task": task, "route": LARGE, "model": model or getattr(llm, "model_name", None), "backend": "openai",
+                              "reason": reason, "latency_ms": round((time.perf_counter() - started) * 1000, 1)})
+        return parse(response.content) if parse else response
+
+    def run_table(self, run_id: str) -> List[Dict[str, Any]]:
+        """Routing decisions of a run, in call order"""
+        with self._lock:
+            return list(self._runs.get(run_id, []))
+
+
+model_router = ModelRouter()
@@ -0,0 +1,167 @@
+import os
+import re
+import tempfile
+from typing import List, Optional, Tuple
+
+SEARCH_REPLACE_PATTERN = re.compile(
+    r"<<<<<<< SEARCH\n(.*?)\n?=======\n(.*?)\n?>>>>>>> REPLACE", re.DOTALL
+)
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def atomic_write(path: str, content: str):
+    """Write content to a temp file next to path and rename it over path, so readers never see a half-written file"""
+    os.replace(stage_write(path, content), path)
+
+
+def stage_write(path: str, content: str) -> str:
+    """Write content to a temp file in path's directory and return the temp path (not yet renamed)"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    return temp_path
+
+
+def apply_search_replace(original: str, patch: str) -> str:
+    """
+    Apply SEARCH/REPLACE blocks of the form
+
+        <<<<<<< SEARCH
+        text to find
+        =======
+        replacement text
+        >>>>>>> REPLACE
+
+    Each SEARCH text must occur exactly once in the (progressively edited) file.
+    """
+    blocks = SEARCH_REPLACE_PATTERN.findall(patch.replace("\r\n", "\n"))
+    if not blocks:
+        raise ValueError("No SEARCH/REPLACE blocks found in patch")
+
+    newline = "\r\n" if "\r\n" in original else "\n"
+    content = original.replace("\r\n", "\n")
+    for number, (search, replace) in enumerate(blocks, 1):
+        if not search:
+            if content:
+                raise ValueError(f"Block {number}: empty SEARCH text is only allowed for empty files")
+            content = replace
+            continue
+        count = content.count(search)
+        if count == 0:
+            raise ValueError(f"Block {number}: SEARCH text not found: {search[:200]!r}")
+        if count > 1:
+            raise ValueError(f"Block {number}: SEARCH text found {count} times, add more context to make it unique")
+        content = content.replace(search, replace, 1)
+    return content.replace("\n", newline) if newline != "\n" else content
+
+
+def _parse_hunks(patch: str) -> List[Tuple[int, List[str], List[str]]]:
+    """
+    Parse a unified diff into (old start line, old lines, new lines) hunks.
+
+    Lines inside a hunk (per the line counts of its @@ header) are always content, so a
+    removed '--...' line is not mistaken for a '---' file header; '---'/'+++' headers
+    are only recognized between hunks.
+    """
+    hunks = []
+    current: Optional[Tuple[int, List[str], List[str]]] = None
+    # Old and new lines the current hunk's header still announces
+    old_left = new_left = 0
+    lines = patch.replace("\r\n", "\n").split("\n")
+    for number, line in enumerate(lines):
+        header = HUNK_HEADER_PATTERN.match(line)
+        inside = old_left > 0 or new_left > 0
+        if header:
+            current = (int(header.group(1)), [], [])
+            hunks.append(current)
+            old_left = 1 if header.group(2) is None else int(header.group(2))
+            new_left = 1 if header.group(4) is None else int(header.group(4))
+        elif current is None:
+            continue
+        elif not inside and (line.startswith("diff ") or line.startswith("---")
+                             and number + 1 < len(lines) and lines[number + 1].startswith("+++")):
+            # Next file section: everything up to its first @@ is header
+            current = None
+        elif line.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        elif line.startswith("-"):
+            current[1].append(line[1:])
+            old_left -= 1
+        elif line.startswith("+"):
+            current[2].append(line[1:])
+            new_left -= 1
+        elif line.startswith(" ") or line == "":
+            current[1].append(line[1:])
+            current[2].append(line[1:])
+            old_left -= 1
+            new_left -= 1
+    # A trailing empty line from splitting is not context
+    for _, old, new in hunks:
+        while old and new and old[-1] == "" and new[-1] == "":
+            old.pop()
+            new.pop()
+    return hunks
+
+
+def _find_block(lines: List[str], block: List[str], expected: int, lower: int) -> Optional[int]:
+    """Find block in lines at or after lower, trying positions closest to expected first"""
+    last = len(lines) - len(block)
+    if last < lower:
+        return None
+    expected = min(max(expected, lower), last)
+    for distance in range(0, max(expected - lower, last - expected) + 1):
+        for pos in (expected - distance, expected + distance):
+            if lower <= pos <= last and lines[pos:pos + len(block)] == block:
+                return pos
+    return None
+
+
+def apply_unified_diff(original: str, patch: str) -> str:
+    """
+    Apply a unified diff (as produced by `diff -u` / `git diff`) to original.
+    Hunks are located by their context lines, so line numbers may be off.
+    """
+    hunks = _parse_hunks(patch)
+    if not hunks:
+        raise ValueError("No hunks ('@@ -a,b +c,d @@') found in patch")
+
+    newline = "\r\n" if "\r\n" in original else "\n"
+    trailing_newline = original.endswith("\n") or not original
+    lines = original.replace("\r\n", "\n").split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+
+    offset = 0
+    lower = 0
+    for number, (old_start, old, new) in enumerate(hunks, 1):
+        expected = max(old_start - 1, 0) + offset
+        if old:
+            pos = _find_block(lines, old, expected, lower)
+            if pos is None:
+                raise ValueError(f"Hunk {number} does not apply: context not found near line {old_start}")
+        else:
+            pos = min(max(old_start + offset, lower), len(lines))
+        lines[pos:pos + len(old)] = new
+        offset += len(new) - len(old)
+        lower = pos + len(new)
+
+    content = newline.join(lines)
+    return content + newline if trailing_newline and lines else content
+
+
+def apply_patch(original: str, patch: str) -> str:
+    """Apply either SEARCH/REPLACE blocks or a unified diff, whichever the patch contains"""
+    if "<<<<<<< SEARCH" in patch:
+        return apply_search_replace(original, patch)
+    if re.search(r"^@@ ", patch, re.MULTILINE):
+        return apply_unified_diff(original, patch)
+    raise ValueError("Patch must contain SEARCH/REPLACE blocks or unified diff hunks")
@@ -0,0 +1,47 @@
+import os
+import time
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+azdo_requests_per_second = float(os.getenv('REA_AZDO_REQUESTS_PER_SECOND', '2'))
+azdo_burst = int(os.getenv('REA_AZDO_BURST', '5'))
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every connector in the process.
+
+    Tokens refill at `rate` per second up to `burst`. acquire() takes one token,
+    sleeping only as long as needed for the next one, so concurrent agent runs
+    share one request budget instead of each sleeping a fixed interval per call.
+    A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate: float = azdo_requests_per_second, burst: int = azdo_burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds spent waiting"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now so waiters queue up in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+# Shared limiter for all Azure DevOps REST calls
+azdo_rate_limiter = RateLimiter()
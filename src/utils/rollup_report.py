@@ -0,0 +1,117 @@
+import os
+import json
+import html
+from datetime import datetime
+from typing import Any, Dict, List
+
+# Per-team result text is truncated to this many characters in the HTML report
+MAX_SUMMARY_CHARS = 1500
+
+
+def _load_output(path: str) -> Dict[str, Any]:
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def build_rollup(runs: List[Dict[str, Any]], wall_seconds: float = None) -> Dict[str, Any]:
+    """
+    Combine finished team runs into one roll-up document.
+
+    Each run is a run registry record plus a "team" key; the agent's output JSON
+    (steps summary) is embedded under "output" when the run produced one.
+    """
+    teams = []
+    for run in runs:
+        teams.append({
+            "project": run.get("project"),
+            "team": run.get("team"),
+            "run_id": run.get("run_id"),
+            "status": run.get("status"),
+            "report_path": run.get("report_path"),
+            "output_path": run.get("output_path"),
+            "total_tokens": run.get("total_tokens") or 0,
+            "total_cost": run.get("total_cost") or 0.0,
+            "error": run.get("error"),
+            "result": run.get("result"),
+            "output": _load_output(run.get("output_path")),
+        })
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "totals": {
+            "teams": len(teams),
+            "completed": sum(1 for team in teams if team["status"] == "completed"),
+            "failed": sum(1 for team in teams if team["status"] != "completed"),
+            "total_tokens": sum(team["total_tokens"] for team in teams),
+            "total_cost": round(sum(team["total_cost"] for team in teams), 6),
+            "wall_seconds": round(wall_seconds, 2) if wall_seconds is not None else None,
+        },
+        "teams": teams,
+    }
+
+
+def render_rollup_html(rollup: Dict[str, Any]) -> str:
+    totals = rollup["totals"]
+    rows = []
+    for team in rollup["teams"]:
+        summary = team["result"] or team["error"] or ""
+        if len(summary) > MAX_SUMMARY_CHARS:
+            summary = summary[:MAX_SUMMARY_CHARS] + "..."
+        report = team["report_path"] or ""
+        report_cell = f'<a href="{html.escape(report)}">{html.escape(report)}</a>' if report and os.path.exists(report) else "-"
+        rows.append(
+            "<tr>"
+            f"<td>{html.escape(str(team['project']))}</td>"
+            f"<td>{html.escape(str(team['team']))}</td>"
+            f"<td class=\"{html.escape(str(team['status']))}\">{html.escape(str(team['status']))}</td>"
+            f"<td>{report_cell}</td>"
+            f"<td>{team['total_tokens']}</td>"
+            f"<td>${team['total_cost']:.4f}</td>"
+            f"<td><pre>{html.escape(summary)}</pre></td>"
+            f"<td><code>{html.escape(str(team['run_id']))}</code></td>"
+            "</tr>"
+        )
+
+    wall = f" in {totals['wall_seconds']}s" if totals["wall_seconds"] is not None else ""
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Sprint Roll-up Report</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border: 1px solid #ccc; padding: 6px; vertical-align: top; text-align: left; }}
+th {{ background: #f0f0f0; }}
+pre {{ white-space: pre-wrap; margin: 0; }}
+.completed {{ color: #1a7f37; }}
+.failed {{ color: #cf222e; }}
+</style>
+</head>
+<body>
+<h1>Sprint Roll-up Report</h1>
+<p>Generated {html.escape(rollup['generated_at'])}: {totals['completed']} of {totals['teams']} teams completed{wall},
+{totals['total_tokens']} tokens, ${totals['total_cost']:.4f}.</p>
+<table>
+<tr><th>Project</th><th>Team</th><th>Status</th><th>Team Report</th><th>Tokens</th><th>Cost</th><th>Summary</th><th>Run ID</th></tr>
+{chr(10).join(rows)}
+</table>
+</body>
+</html>
+"""
+
+
+def write_rollup_report(runs: List[Dict[str, Any]], json_path: str = "Sprint_Rollup_Report.json",
+                        html_path: str = "Sprint_Rollup_Report.html", wall_seconds: float = None) -> Dict[str, Any]:
+    """Write the roll-up as JSON and HTML and return it"""
+    rollup = build_rollup(runs, wall_seconds)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(rollup, f, indent=4, default=str)
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(render_rollup_html(rollup))
+    return rollup
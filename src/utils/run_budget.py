@@ -0,0 +1,117 @@
+import os
+import time
+import fnmatch
+import threading
+from typing import Any, Dict, Optional, Union
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration (0 = no limit; an agent spec's runtime block overrides these)
+run_max_seconds = float(os.getenv('REA_RUN_MAX_SECONDS', '0'))
+run_max_tokens = int(os.getenv('REA_RUN_MAX_TOKENS', '0'))
+run_max_cost_usd = float(os.getenv('REA_RUN_MAX_COST_USD', '0'))
+# Calls allowed per tool in one run
+run_max_tool_calls = int(os.getenv('REA_RUN_MAX_TOOL_CALLS', '0'))
+
+
+def tool_call_limits(value: Union[int, Dict[str, int], None]) -> Dict[str, int]:
+    """Per-tool call limits from a number (every tool) or a mapping of tool name or pattern -> calls ('*' for the rest)"""
+    if value is None:
+        return {}
+    if isinstance(value, dict):
+        return {str(name): int(limit) for name, limit in value.items() if limit}
+    return {"*": int(value)} if int(value) else {}
+
+
+class RunBudget:
+    """
+    Wall time, token, cost and per-tool call limits of one agent run.
+
+    Usage is recorded live by the run's BudgetCallbackHandler; the first limit crossed
+    is kept as the run's stop reason, and the agent executor stops at its next step and
+    returns what the run has done so far. A limit of None or 0 means no limit.
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None, max_tokens: Optional[int] = None,
+                 max_cost_usd: Optional[float] = None, max_tool_calls: Union[int, Dict[str, int], None] = None):
+        self.max_seconds = max_seconds or None
+        self.max_tokens = max_tokens or None
+        self.max_cost_usd = max_cost_usd or None
+        self.max_tool_calls = tool_call_limits(max_tool_calls)
+        self.started = time.monotonic()
+        self.tokens = 0
+        self.cost_usd = 0.0
+        self.tool_calls: Dict[str, int] = {}
+        self.exceeded: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **overrides) -> "RunBudget":
+        """Budget with the REA_RUN_MAX_* defaults, overridden by the given limits that are not None"""
+        limits = {"max_seconds": run_max_seconds, "max_tokens": run_max_tokens,
+                  "max_cost_usd": run_max_cost_usd, "max_tool_calls": run_max_tool_calls}
+        limits.update({name: value for name, value in overrides.items() if value is not None})
+        return cls(**limits)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def tool_limit(self, tool_name: str) -> Optional[int]:
+        if tool_name in self.max_tool_calls:
+            return self.max_tool_calls[tool_name]
+        for pattern, limit in self.max_tool_calls.items():
+            if pattern != "*" and fnmatch.fnmatchcase(tool_name, pattern):
+                return limit
+        return self.max_tool_calls.get("*")
+
+    def exceed(self, reason: str) -> str:
+        """Records a stop reason (the first one is kept) and returns the run's reason"""
+        with self._lock:
+            if self.exceeded is None:
+                self.exceeded = reason
+            return self.exceeded
+
+    def record_llm_call(self, tokens: int, cost_usd: float):
+        with self._lock:
+            self.tokens += tokens or 0
+            self.cost_usd += cost_usd or 0.0
+        self.check()
+
+    def record_tool_call(self, tool_name: str) -> int:
+        with self._lock:
+            self.tool_calls[tool_name] = count = self.tool_calls.get(tool_name, 0) + 1
+        return count
+
+    def allows_tool(self, tool_name: str) -> bool:
+        """Whether one more call of the tool fits; marks the budget exceeded when it does not"""
+        limit = self.tool_limit(tool_name)
+        with self._lock:
+            count = self.tool_calls.get(tool_name, 0)
+        if limit is not None and count >= limit:
+            self.exceed(f"tool call budget exceeded: {tool_name} called {count} times (limit {limit})")
+            return False
+        return True
+
+    def check(self) -> Optional[str]:
+        """Stop reason when a limit has been crossed, else None"""
+        if self.exceeded:
+            return self.exceeded
+        elapsed = self.elapsed()
+        if self.max_seconds and elapsed >= self.max_seconds:
+            return self.exceed(f"wall time budget exceeded: {elapsed:.1f}s (limit {self.max_seconds:g}s)")
+        if self.max_tokens and self.tokens >= self.max_tokens:
+            return self.exceed(f"token budget exceeded: {self.tokens} tokens (limit {self.max_tokens})")
+        if self.max_cost_usd and self.cost_usd >= self.max_cost_usd:
+            return self.exceed(f"cost budget exceeded: ${self.cost_usd:.4f} (limit ${self.max_cost_usd:g})")
+        return None
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limits": {"max_seconds": self.max_seconds, "max_tokens": self.max_tokens,
+                           "max_cost_usd": self.max_cost_usd, "max_tool_calls": dict(self.max_tool_calls)},
+                "used": {"seconds": round(self.elapsed(), 3), "tokens": self.tokens,
+                         "cost_usd": round(self.cost_usd, 6), "tool_calls": dict(self.tool_calls)},
+                "exceeded": self.exceeded,
+            }
@@ -0,0 +1,100 @@
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+run_registry_path = os.getenv('REA_RUN_REGISTRY', 'agent_runs.jsonl')
+
+
+class RunRegistry:
+    """
+    Record of agent runs shared by every process working in the same folder.
+
+    Each register/update appends one JSON line ({"run_id": ..., <changed fields>})
+    to an append-only file; readers fold the lines into one dict per run. Only the
+    part of the file appended since the last read is parsed, so polling is cheap.
+    """
+
+    def __init__(self, path: str = run_registry_path):
+        self.path = path
+        self._runs: Dict[str, Dict[str, Any]] = {}
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Fold lines appended by any process since the last read (caller holds the lock)"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            self._runs, self._offset = {}, 0
+            return
+        if size < self._offset:
+            # File was truncated or replaced, start over
+            self._runs, self._offset = {}, 0
+        if size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        # Leave a partially written last line for the next read
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            run_id = entry.get("run_id")
+            if run_id:
+                self._runs.setdefault(run_id, {}).update(entry)
+        self._offset += end
+
+    def _append(self, entry: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+    def register(self, run_id: str, role: Optional[str], **fields) -> Dict[str, Any]:
+        entry = {
+            "run_id": run_id,
+            "role": role,
+            "status": "running",
+            "started_at": datetime.now().isoformat(),
+            **fields,
+        }
+        with self._lock:
+            self._append(entry)
+            self._refresh()
+            return dict(self._runs[run_id])
+
+    def update(self, run_id: str, **fields) -> Dict[str, Any]:
+        with self._lock:
+            self._append({"run_id": run_id, **fields})
+            self._refresh()
+            return dict(self._runs[run_id])
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            run = self._runs.get(run_id)
+            return dict(run) if run else None
+
+    def list(self, role: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Runs, newest first, optionally filtered by role and status"""
+        with self._lock:
+            self._refresh()
+            runs = [dict(run) for run in self._runs.values()
+                    if (role is None or (run.get("role") or "").lower() == role.lower())
+                    and (status is None or run.get("status") == status)]
+        return sorted(runs, key=lambda run: run.get("started_at", ""), reverse=True)
+
+    def latest(self, role: Optional[str] = None, status: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        runs = self.list(role, status)
+        return runs[0] if runs else None
+
+
+# Shared instance for rea_agent and add_ons_api.py
+run_registry = RunRegistry()
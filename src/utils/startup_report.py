@@ -0,0 +1,97 @@
+import os
+import re
+import sys
+import time
+import subprocess
+from collections import defaultdict
+from typing import Any, Dict, List
+
+# Entry points measured by default: the CLI and the API workers
+DEFAULT_TARGETS = ("main", "add_ons_api")
+
+# "import time: <self us> | <cumulative us> | <indent><module>" lines written by python -X importtime
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Rows of -X importtime output as {module, self_us, cumulative_us, depth}"""
+    rows = []
+    for line in output.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            rows.append({"module": match.group(4), "self_us": int(match.group(1)),
+                         "cumulative_us": int(match.group(2)), "depth": len(match.group(3)) // 2})
+    return rows
+
+
+def measure_startup(target: str, top: int = 15) -> Dict[str, Any]:
+    """
+    Imports a module in a fresh interpreter with -X importtime and summarizes where the time went.
+
+    Args:
+        target: module to import (e.g. 'main')
+        top: number of packages and modules to list
+
+    Returns:
+        Dict with the process wall time, the target's import time, the module count, the
+        packages with the most import time (self time summed per top-level package) and
+        the slowest modules by self time
+    """
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                               capture_output=True, text=True, cwd=os.getcwd())
+    wall_ms = (time.perf_counter() - started) * 1000
+    rows = parse_importtime(completed.stderr)
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"exit code {completed.returncode}"
+        return {"target": target, "error": error, "process_ms": round(wall_ms, 1)}
+
+    target_row = next((row for row in reversed(rows) if row["module"] == target and row["depth"] == 0), None)
+    packages: Dict[str, Dict[str, float]] = defaultdict(lambda: {"self_ms": 0.0, "modules": 0})
+    for row in rows:
+        package = packages[row["module"].split(".")[0]]
+        package["self_ms"] += row["self_us"] / 1000
+        package["modules"] += 1
+    by_package = sorted(packages.items(), key=lambda item: -item[1]["self_ms"])[:top]
+    slowest = sorted(rows, key=lambda row: -row["self_us"])[:top]
+    return {
+        "target": target,
+        "process_ms": round(wall_ms, 1),
+        "import_ms": round((target_row or {}).get("cumulative_us", 0) / 1000, 1),
+        "modules": len(rows),
+        "packages": [{"package": name, "self_ms": round(stats["self_ms"], 1), "modules": stats["modules"]}
+                     for name, stats in by_package],
+        "slowest_modules": [{"module": row["module"], "self_ms": round(row["self_us"] / 1000, 1)} for row in slowest],
+    }
+
+
+def render_report(reports: List[Dict[str, Any]]) -> str:
+    lines = []
+    for report in reports:
+        if "error" in report:
+            lines.append(f"{report['target']}: import failed after {report['process_ms']} ms: {report['error']}")
+            lines.append("")
+            continue
+        lines.append(f"{report['target']}: {report['import_ms']} ms import, {report['process_ms']} ms process "
+                     f"({report['modules']} modules)")
+        lines.append("Package | Self ms | Modules")
+        for package in report["packages"]:
+            lines.append(f"{package['package']} | {package['self_ms']} | {package['modules']}")
+        lines.append("Slowest modules (self ms): " + ", ".join(
+            f"{module['module']} {module['self_ms']}" for module in report["slowest_modules"][:5]))
+        lines.append("")
+    return "\n".join(lines).rstrip()
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Startup import time report for the REA entry points")
+    parser.add_argument("targets", nargs="*", default=list(DEFAULT_TARGETS), help="modules to import (default: main add_ons_api)")
+    parser.add_argument("--top", type=int, default=15, help="packages and modules to list per target")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    reports = [measure_startup(target, top=args.top) for target in args.targets]
+    print(json.dumps(reports, indent=4) if args.json else render_report(reports))
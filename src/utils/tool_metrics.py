@@ -0,0 +1,249 @@
+import time
+import functools
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from src.utils.tracing import tracer
+
+if TYPE_CHECKING:
+    # Only for annotations: importing langchain costs the API and CLI about half a second at startup
+    from langchain_core.tools import BaseTool
+
+# Upper bounds (seconds) of the tool duration histogram buckets
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Tool results starting with these are failures the connectors reported as text
+ERROR_PREFIXES = ("Error", "❌")
+
+# Agent run the current task belongs to (set by rea_agent, inherited by tool threads)
+current_run_id: ContextVar[Optional[str]] = ContextVar("rea_current_run_id", default=None)
+# Tool call in progress in this context; HTTP responses and cache hits are added to it
+_current_call: ContextVar[Optional["ToolStats"]] = ContextVar("rea_current_tool_call", default=None)
+
+
+class ToolStats:
+    """Counters for one tool call, or summed over many calls of a tool"""
+
+    FIELDS = ("calls", "errors", "seconds", "http_requests", "http_errors", "bytes_sent", "bytes_received", "cache_hits")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.http_requests = 0
+        self.http_errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.cache_hits = 0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+    def add(self, other: "ToolStats"):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        self.buckets = [mine + theirs for mine, theirs in zip(self.buckets, other.buckets)]
+
+    def as_row(self, tool: str) -> Dict[str, Any]:
+        return {
+            "tool": tool,
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_seconds": round(self.seconds, 3),
+            "avg_seconds": round(self.seconds / self.calls, 3) if self.calls else 0.0,
+            "http_requests": self.http_requests,
+            "http_errors": self.http_errors,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "cache_hits": self.cache_hits,
+        }
+
+
+class ToolMetrics:
+    """
+    Per-tool latency and call counts, for the whole process and per agent run.
+
+    Process totals are exported in Prometheus text format (GET /metrics of add_ons_api.py);
+    per-run tables go into the run's output JSON. Runs executed in a process pool
+    (REA_JOB_EXECUTOR=process) are counted in the worker processes, not in the API's totals.
+    """
+
+    def __init__(self, max_runs: int = 200):
+        self.max_runs = max_runs
+        self._totals: Dict[str, ToolStats] = {}
+        self._runs: "OrderedDict[str, Dict[str, ToolStats]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, tool: str, call: ToolStats, run_id: Optional[str] = None):
+        with self._lock:
+            self._totals.setdefault(tool, ToolStats()).add(call)
+            if run_id:
+                tools = self._runs.get(run_id)
+                if tools is None:
+                    tools = self._runs[run_id] = {}
+                    if len(self._runs) > self.max_runs:
+                        self._runs.popitem(last=False)
+                tools.setdefault(tool, ToolStats()).add(call)
+
+    def run_table(self, run_id: str) -> List[Dict[str, Any]]:
+        """One row per tool used in the run, slowest (total time) first"""
+        with self._lock:
+            tools = dict(self._runs.get(run_id, {}))
+        rows = [stats.as_row(tool) for tool, stats in tools.items()]
+        return sorted(rows, key=lambda row: -row["total_seconds"])
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            totals = {tool: stats for tool, stats in sorted(self._totals.items())}
+            lines = []
+
+            def metric(name: str, kind: str, help_text: str, samples: List[str]):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(samples)
+
+            def label(tool: str) -> str:
+                return 'tool="' + tool.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+            metric("rea_tool_calls_total", "counter", "Agent tool calls.",
+                   [f"rea_tool_calls_total{{{label(t)}}} {s.calls}" for t, s in totals.items()])
+            metric("rea_tool_errors_total", "counter", "Agent tool calls that raised or returned an error.",
+                   [f"rea_tool_errors_total{{{label(t)}}} {s.errors}" for t, s in totals.items()])
+
+            duration = []
+            for tool, stats in totals.items():
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    duration.append(f'rea_tool_duration_seconds_bucket{{{label(tool)},le="{bound}"}} {count}')
+                duration.append(f'rea_tool_duration_seconds_bucket{{{label(tool)},le="+Inf"}} {stats.calls}')
+                duration.append(f"rea_tool_duration_seconds_sum{{{label(tool)}}} {stats.seconds:.6f}")
+                duration.append(f"rea_tool_duration_seconds_count{{{label(tool)}}} {stats.calls}")
+            metric("rea_tool_duration_seconds", "histogram", "Wall time of agent tool calls.", duration)
+
+            metric("rea_tool_http_requests_total", "counter", "Azure DevOps HTTP requests made by agent tools.",
+                   [f"rea_tool_http_requests_total{{{label(t)}}} {s.http_requests}" for t, s in totals.items()])
+            metric("rea_tool_http_errors_total", "counter", "Azure DevOps HTTP responses with status >= 400.",
+                   [f"rea_tool_http_errors_total{{{label(t)}}} {s.http_errors}" for t, s in totals.items()])
+            metric("rea_tool_http_bytes_total", "counter", "HTTP body bytes sent and received by agent tools.",
+                   [f'rea_tool_http_bytes_total{{{label(t)},direction="{direction}"}} {getattr(s, "bytes_" + direction)}'
+                    for t, s in totals.items() for direction in ("sent", "received")])
+            metric("rea_tool_cache_hits_total", "counter", "Lookups agent tools answered from a cache.",
+                   [f"rea_tool_cache_hits_total{{{label(t)}}} {s.cache_hits}" for t, s in totals.items()])
+        return "\n".join(lines) + "\n"
+
+
+# Shared metrics for all agent runs in the process
+tool_metrics = ToolMetrics()
+
+
+def record_cache_hit(count: int = 1):
+    """Count cache hits against the tool call in progress (no-op outside a tool call)"""
+    call = _current_call.get()
+    if call is not None:
+        call.cache_hits += count
+
+
+def record_http_response(response, *args, **kwargs):
+    """requests response hook: counts the request against the tool call in progress"""
+    call = _current_call.get()
+    if call is None:
+        return response
+    call.http_requests += 1
+    if response.status_code >= 400:
+        call.http_errors += 1
+    body = response.request.body if response.request is not None else None
+    if isinstance(body, (str, bytes)):
+        call.bytes_sent += len(body.encode("utf-8") if isinstance(body, str) else body)
+    # JSON bodies are read in full by the SDK anyway; other (streamed) bodies are left untouched
+    if response.headers.get("Content-Type", "").startswith("application/json"):
+        call.bytes_received += len(response.content)
+    else:
+        call.bytes_received += int(response.headers.get("Content-Length") or 0)
+    return response
+
+
+def instrument_connection(connection, hooks=(record_http_response,)):
+    """Adds the requests response hooks to every client the Connection hands out"""
+    get_client = connection.get_client
+
+    @functools.wraps(get_client)
+    def instrumented_get_client(client_type):
+        client = get_client(client_type)
+        for hook in hooks:
+            if hook not in client.config.hooks:
+                client.config.hooks.append(hook)
+        return client
+
+    connection.get_client = instrumented_get_client
+    return connection
+
+
+def _finish(tool: str, call: ToolStats, started: float, result: Any = None, failed: bool = False):
+    call.calls = 1
+    call.seconds = time.perf_counter() - started
+    # Cumulative buckets, as Prometheus histograms expect
+    call.buckets = [int(call.seconds <= bound) for bound in DURATION_BUCKETS]
+    call.errors = int(failed or (isinstance(result, str) and result.lstrip().startswith(ERROR_PREFIXES)))
+    tool_metrics.record(tool, call, current_run_id.get())
+
+
+def _tool_input(args, kwargs) -> Optional[str]:
+    """The tool's input string as the agent passed it (span attribute)"""
+    if args:
+        return str(args[0])
+    return str(kwargs) if kwargs else None
+
+
+def _wrap_sync(tool: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        call, started = ToolStats(), time.perf_counter()
+        token = _current_call.set(call)
+        try:
+            with tracer.span(f"tool {tool}", **{"rea.tool": tool, "rea.tool_input": _tool_input(args, kwargs)}) as span:
+                result = func(*args, **kwargs)
+                if isinstance(result, str) and result.lstrip().startswith(ERROR_PREFIXES):
+                    span.status, span.status_message = "error", result.strip()[:200]
+        except Exception:
+            _finish(tool, call, started, failed=True)
+            raise
+        finally:
+            _current_call.reset(token)
+        _finish(tool, call, started, result)
+        return result
+    return wrapper
+
+
+def _wrap_async(tool: str, coroutine: Callable) -> Callable:
+    @functools.wraps(coroutine)
+    async def wrapper(*args, **kwargs):
+        call, started = ToolStats(), time.perf_counter()
+        token = _current_call.set(call)
+        try:
+            with tracer.span(f"tool {tool}", **{"rea.tool": tool, "rea.tool_input": _tool_input(args, kwargs)}) as span:
+                result = await coroutine(*args, **kwargs)
+                if isinstance(result, str) and result.lstrip().startswith(ERROR_PREFIXES):
+                    span.status, span.status_message = "error", result.strip()[:200]
+        except Exception:
+            _finish(tool, call, started, failed=True)
+            raise
+        finally:
+            _current_call.reset(token)
+        _finish(tool, call, started, result)
+        return result
+    return wrapper
+
+
+def instrument_tool(tool: "BaseTool") -> "BaseTool":
+    """Wraps the tool's function(s) so every call is timed and counted (idempotent)"""
+    metadata = tool.metadata or {}
+    if metadata.get("instrumented"):
+        return tool
+    if getattr(tool, "func", None) is not None:
+        tool.func = _wrap_sync(tool.name, tool.func)
+    if getattr(tool, "coroutine", None) is not None:
+        tool.coroutine = _wrap_async(tool.name, tool.coroutine)
+    tool.metadata = {**metadata, "instrumented": True}
+    return tool
+
+
+def instrument_tools(tools: List["BaseTool"]) -> List["BaseTool"]:
+    return [instrument_tool(tool) for tool in tools]
@@ -0,0 +1,342 @@
+import os
+import re
+import json
+import time
+import threading
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+# Comma-separated: "file" (Chrome trace JSON per run), "otlp" (OTLP/HTTP JSON to a collector), or "none"
+trace_exporters = [name.strip().lower() for name in os.getenv('REA_TRACE_EXPORTER', 'none').split(',') if name.strip()]
+trace_dir = os.getenv('REA_TRACE_DIR', 'traces')
+otlp_endpoint = os.getenv('REA_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+service_name = os.getenv('REA_SERVICE_NAME', 'rea-agent')
+
+# Attribute values longer than this are truncated
+MAX_ATTRIBUTE_CHARS = 500
+_WORK_ITEM_IDS = re.compile(r"/workItems/(\d+)|[?&]ids=([\d,%C]+)", re.IGNORECASE)
+
+
+class Span:
+    """One timed operation of a trace (an agent run, LLM call, tool call or HTTP request)"""
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 kind: str = "internal", attributes: Optional[Dict[str, Any]] = None, start_ns: Optional[int] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = {}
+        self.status = "ok"
+        self.status_message = ""
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.thread = threading.current_thread().name
+        self.set_attributes(attributes or {})
+
+    def set_attribute(self, key: str, value: Any):
+        if value is None:
+            return
+        if isinstance(value, str) and len(value) > MAX_ATTRIBUTE_CHARS:
+            value = value[:MAX_ATTRIBUTE_CHARS] + "..."
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, error: BaseException):
+        self.status = "error"
+        self.status_message = f"{type(error).__name__}: {error}"[:MAX_ATTRIBUTE_CHARS]
+
+    def end(self, end_ns: Optional[int] = None):
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+            self.tracer._on_end(self)
+
+
+class _NoopSpan:
+    """Returned when tracing is off, so call sites need no checks"""
+    span_id = None
+    trace_id = None
+    attributes: Dict[str, Any] = {}
+
+    def set_attribute(self, key, value): pass
+    def set_attributes(self, attributes): pass
+    def record_exception(self, error): pass
+    def end(self, end_ns=None): pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Minimal OpenTelemetry-style tracer.
+
+    The current span lives in a context variable, so spans opened in tool threads
+    (which inherit the run's context) nest under the run. When a trace's root span
+    ends, the whole trace is handed to the exporters.
+    """
+
+    def __init__(self, exporters: Optional[List["TraceExporter"]] = None):
+        self.exporters = exporters or []
+        self._current: ContextVar[Optional[Span]] = ContextVar("rea_current_span", default=None)
+        self._traces: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_span(self, name: str, parent: Optional[Span] = None, kind: str = "internal",
+                   attributes: Optional[Dict[str, Any]] = None, start_ns: Optional[int] = None):
+        """Start a span under parent (default: the current span; none starts a new trace)"""
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = parent if parent is not None else self._current.get()
+        if isinstance(parent, _NoopSpan):
+            parent = None
+        trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        span = Span(self, name, trace_id, parent.span_id if parent else None, kind, attributes, start_ns)
+        with self._lock:
+            self._traces.setdefault(trace_id, []).append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes) -> Iterator[Any]:
+        """Open a span as the current one for the enclosed block"""
+        span = self.start_span(name, kind=kind, attributes=attributes)
+        if span is NOOP_SPAN:
+            yield span
+            return
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            self._current.reset(token)
+            span.end()
+
+    def activate(self, span):
+        """Make span current until deactivate(token); for spans that cannot use a with-block"""
+        return self._current.set(span) if span is not NOOP_SPAN else None
+
+    def deactivate(self, token):
+        if token is not None:
+            self._current.reset(token)
+
+    def _on_end(self, span: Span):
+        if span.parent_id is not None:
+            return
+        with self._lock:
+            spans = self._traces.pop(span.trace_id, [])
+        finished = [s for s in spans if s.end_ns is not None]
+        for exporter in self.exporters:
+            try:
+                exporter.export(finished)
+            except Exception as e:
+                print(f"Trace export to {type(exporter).__name__} failed: {e}")
+
+
+def critical_path(spans: List[Span]) -> List[Span]:
+    """
+    Spans the run was waiting on, in time order (Jaeger's definition): walking back
+    from a span's end, the child that finished last, then the last one to finish
+    before that child started, and so on, recursing into each child found.
+    """
+    children: Dict[Optional[str], List[Span]] = {}
+    for span in spans:
+        children.setdefault(span.parent_id, []).append(span)
+
+    def walk(span: Span) -> List[Span]:
+        path = []
+        cursor = span.end_ns
+        for child in sorted(children.get(span.span_id, []), key=lambda s: s.end_ns, reverse=True):
+            if child.end_ns <= cursor:
+                path = walk(child) + path
+                cursor = child.start_ns
+        return [span] + path
+
+    return [span for root in children.get(None, []) for span in walk(root)]
+
+
+class TraceExporter:
+    def export(self, spans: List[Span]):
+        raise NotImplementedError
+
+
+class ChromeTraceFileExporter(TraceExporter):
+    """
+    Writes each trace to <directory>/<run id or trace id>.trace.json in Chrome trace
+    event format, which Perfetto (ui.perfetto.dev), chrome://tracing and speedscope
+    show as a flame graph. Spans that overlap without nesting go to separate lanes.
+    """
+
+    def __init__(self, directory: str = trace_dir):
+        self.directory = directory
+
+    @staticmethod
+    def _lanes(spans: List[Span]) -> Dict[str, int]:
+        by_id = {span.span_id: span for span in spans}
+
+        def ancestors(span: Span) -> set:
+            result = set()
+            while span.parent_id in by_id:
+                span = by_id[span.parent_id]
+                result.add(span.span_id)
+            return result
+
+        lanes: List[List[Span]] = []
+        assigned: Dict[str, int] = {}
+        for span in sorted(spans, key=lambda s: (s.start_ns, -(s.end_ns - s.start_ns))):
+            own_ancestors = ancestors(span)
+            preferred = [assigned[span.parent_id]] if span.parent_id in assigned else []
+            for lane in preferred + list(range(len(lanes))):
+                if all(other.span_id in own_ancestors or other.end_ns <= span.start_ns or other.start_ns >= span.end_ns
+                       for other in lanes[lane]):
+                    break
+            else:
+                lanes.append([])
+                lane = len(lanes) - 1
+            lanes[lane].append(span)
+            assigned[span.span_id] = lane
+        return assigned
+
+    def export(self, spans: List[Span]):
+        if not spans:
+            return
+        root = next((span for span in spans if span.parent_id is None), spans[0])
+        lanes = self._lanes(spans)
+        events = [{
+            "name": span.name,
+            "cat": span.kind,
+            "ph": "X",
+            "ts": span.start_ns / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": 1,
+            "tid": lanes[span.span_id],
+            "args": {**span.attributes, "span_id": span.span_id, "parent_id": span.parent_id,
+                     "status": span.status, **({"error": span.status_message} if span.status_message else {})},
+        } for span in spans]
+        path = critical_path(spans)
+        document = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "trace_id": root.trace_id,
+                "run_id": root.attributes.get("rea.run_id"),
+                "duration_ms": round((root.end_ns - root.start_ns) / 1e6, 3),
+                "critical_path": [{"name": span.name, "duration_ms": round((span.end_ns - span.start_ns) / 1e6, 3)}
+                                  for span in path],
+            },
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(root.attributes.get("rea.run_id") or root.trace_id))
+        with open(os.path.join(self.directory, f"{name}.trace.json"), "w", encoding="utf-8") as f:
+            json.dump(document, f, default=str)
+
+
+class OtlpHttpExporter(TraceExporter):
+    """Posts traces as OTLP/HTTP JSON to a collector (e.g. Jaeger or the OpenTelemetry Collector on :4318)"""
+
+    KINDS = {"internal": 1, "server": 2, "client": 3}
+
+    def __init__(self, endpoint: str = otlp_endpoint, service: str = service_name, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service = service
+        self.timeout = timeout
+
+    @staticmethod
+    def _value(value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        if isinstance(value, (list, tuple)):
+            return {"arrayValue": {"values": [OtlpHttpExporter._value(item) for item in value]}}
+        return {"stringValue": str(value)}
+
+    def _span(self, span: Span) -> Dict[str, Any]:
+        return {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+            "name": span.name,
+            "kind": self.KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": self._value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.status_message} if span.status == "error" else {"code": 1},
+        }
+
+    def export(self, spans: List[Span]):
+        body = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service}}]},
+            "scopeSpans": [{"scope": {"name": "rea"}, "spans": [self._span(span) for span in spans]}],
+        }]}
+        request = urllib.request.Request(self.endpoint, data=json.dumps(body).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def _build_exporters(names: List[str]) -> List[TraceExporter]:
+    exporters = []
+    for name in names:
+        if name == "file":
+            exporters.append(ChromeTraceFileExporter())
+        elif name == "otlp":
+            exporters.append(OtlpHttpExporter())
+        elif name != "none":
+            raise ValueError(f"Unknown trace exporter '{name}'. Use 'file', 'otlp' or 'none'.")
+    return exporters
+
+
+# Shared tracer for all agent runs in the process
+tracer = Tracer(_build_exporters(trace_exporters))
+
+
+def work_item_ids_from_url(url: str) -> List[int]:
+    ids = []
+    for single, many in _WORK_ITEM_IDS.findall(url or ""):
+        values = [single] if single else many.replace("%2C", ",").replace("%2c", ",").split(",")
+        ids.extend(int(value) for value in values if value.isdigit())
+    return ids
+
+
+def trace_http_response(response, *args, **kwargs):
+    """requests response hook: records the Azure DevOps request as a client span under the current span"""
+    if not tracer.enabled or tracer.current_span() is None:
+        return response
+    end_ns = time.time_ns()
+    request = response.request
+    span = tracer.start_span(
+        f"HTTP {request.method}", kind="client", start_ns=end_ns - int(response.elapsed.total_seconds() * 1e9),
+        attributes={"http.method": request.method, "http.url": request.url, "http.status_code": response.status_code},
+    )
+    ids = work_item_ids_from_url(request.url)
+    if ids:
+        span.set_attribute("azdo.work_item_ids", ids)
+        # Roll the ids up to the tool span so the tool shows which items it touched
+        parent = tracer.current_span()
+        parent.set_attribute("azdo.work_item_ids", sorted(set(parent.attributes.get("azdo.work_item_ids", [])) | set(ids)))
+    if response.status_code >= 400:
+        span.status, span.status_message = "error", f"HTTP {response.status_code}"
+    span.end(end_ns)
+    return response
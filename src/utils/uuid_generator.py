@@ -1,8 +1,9 @@
 from datetime import datetime
+import uuid
 
 def generate_uuid():
-    """Generate a simple UUID based on the current timestamp."""
-    return datetime.now().strftime("%m%d%Y_%H%M%S%f")
+    """Generate a run id from the current timestamp plus a random suffix, so concurrent runs never collide."""
+    return f"{datetime.now().strftime('%m%d%Y_%H%M%S%f')}_{uuid.uuid4().hex[:8]}"
 
 # if __name__ == "__main__":
-#     print(generate_uuid())
\ No newline at end of file
+#     print(generate_uuid())
@@ -0,0 +1,97 @@
+import json
+from urllib.parse import quote
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils.rate_limiter import azdo_rate_limiter
+
+# Work item requests per $batch call (service limit)
+BATCH_SIZE = 200
+# The $batch endpoint is only published for this version; it is accepted by current organizations
+BATCH_API_VERSION = '4.1'
+
+
+def _error_message(entry: Dict[str, Any]) -> str:
+    try:
+        body = json.loads(entry.get("body") or "{}")
+    except ValueError:
+        return str(entry.get("body"))
+    value = body.get("value") if isinstance(body.get("value"), dict) else body
+    return value.get("Message") or value.get("message") or f"status {entry.get('code')}"
+
+
+def _send_batch(wit_client, body: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One $batch request (up to BATCH_SIZE work item requests); returns one entry per request"""
+    azdo_rate_limiter.acquire()  # To avoid rate limiting
+    request = wit_client._client.post(url=wit_client.normalized_url.rstrip('/') + '/_apis/wit/$batch',
+                                      params={'api-version': BATCH_API_VERSION})
+    response = wit_client._send_request(
+        request=request,
+        headers={'Content-Type': 'application/json; charset=utf-8', 'Accept': 'application/json'},
+        content=body,
+        media_type='application/json',
+    )
+    entries = response.json().get("value") or []
+    missing = {"code": 0, "body": json.dumps({"message": "No response"})}
+    return [entries[index] if index < len(entries) else missing for index in range(len(body))]
+
+
+def update_work_items_batch(wit_client, documents: Dict[int, List[Dict[str, Any]]]) -> Dict[int, Tuple[bool, str]]:
+    """
+    Apply JSON patch documents to many work items through the work item $batch API,
+    one HTTP request per 200 work items instead of one per item.
+
+    Args:
+        wit_client: WorkItemTrackingClient (its session, credentials and response hooks are used)
+        documents: work item id -> JSON patch operations ({'op', 'path', 'value'} dicts)
+
+    Returns:
+        work item id -> (updated, error message); each item succeeds or fails on its own
+    """
+    results: Dict[int, Tuple[bool, str]] = {}
+    ids = list(documents)
+    for offset in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[offset:offset + BATCH_SIZE]
+        body = [{
+            "method": "PATCH",
+            "uri": f"/_apis/wit/workitems/{work_item_id}?api-version={BATCH_API_VERSION}",
+            "headers": {"Content-Type": "application/json-patch+json"},
+            "body": documents[work_item_id],
+        } for work_item_id in chunk]
+        for work_item_id, entry in zip(chunk, _send_batch(wit_client, body)):
+            updated = 200 <= int(entry.get("code") or 0) < 300
+            results[work_item_id] = (updated, "" if updated else _error_message(entry))
+    return results
+
+
+def create_work_items_batch(wit_client, project: str,
+                            work_items: List[Tuple[str, List[Dict[str, Any]]]]) -> List[Tuple[Optional[int], str]]:
+    """
+    Create many work items through the work item $batch API, one HTTP request per 200
+    work items instead of one per item.
+
+    Args:
+        wit_client: WorkItemTrackingClient (its session, credentials and response hooks are used)
+        project: project the work items are created in
+        work_items: (work item type, JSON patch operations) per work item to create
+
+    Returns:
+        (new work item id or None, error message) per work item, in input order; each
+        item succeeds or fails on its own
+    """
+    results: List[Tuple[Optional[int], str]] = []
+    for offset in range(0, len(work_items), BATCH_SIZE):
+        chunk = work_items[offset:offset + BATCH_SIZE]
+        body = [{
+            "method": "PATCH",
+            "uri": f"/{quote(project)}/_apis/wit/workitems/${quote(work_item_type)}?api-version={BATCH_API_VERSION}",
+            "headers": {"Content-Type": "application/json-patch+json"},
+            "body": document,
+        } for work_item_type, document in chunk]
+        for entry in _send_batch(wit_client, body):
+            if 200 <= int(entry.get("code") or 0) < 300:
+                try:
+                    results.append((int(json.loads(entry.get("body") or "{}")["id"]), ""))
+                except (ValueError, KeyError, TypeError):
+                    results.append((None, "Created, but the response has no work item id"))
+            else:
+                results.append((None, _error_message(entry)))
+    return results
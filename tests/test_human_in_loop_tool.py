@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+from langchain.tools import Tool
+
+from src.tools.local_tools.approval_backends import ApprovalBackend
+from src.tools.local_tools.human_in_loop_tool import _parse_plan_decisions, arequest_plan_approval
+
+
+class ReplyBackend(ApprovalBackend):
+    def __init__(self, reply):
+        self.reply = reply
+
+    async def request(self, request_id, payload, timeout):
+        return self.reply
+
+
+@pytest.mark.parametrize("decision", [{"decision": "reject"}, {}, {"approve": True}, True, 1, None, ["approve"]])
+def test_plan_decision_without_input_is_rejected(decision):
+    assert _parse_plan_decisions({"1": "approve", "2": decision}, 2) == {1: "approve", 2: "reject"}
+
+
+def test_plan_decision_with_input_is_an_edit():
+    decisions = _parse_plan_decisions('{"1": {"input": "edited", "note": "x"}}', 1)
+    assert decisions == {1: {"input": "edited"}}
+
+
+def test_plan_runs_only_approved_and_edited_items():
+    calls = []
+    tool = Tool(name="echo", func=lambda text: calls.append(text) or "done", description="Echo")
+    items = [{"tool": "echo", "input": "one", "summary": "first"},
+             {"tool": "echo", "input": "two", "summary": "second"},
+             {"tool": "echo", "input": "three", "summary": "third"}]
+    reply = {"1": {"input": "one edited"}, "2": {"decision": "reject"}, "3": {}}
+
+    result = asyncio.run(arequest_plan_approval(items, [tool], backend=ReplyBackend(reply)))
+
+    assert calls == ["one edited"]
+    assert "[1] echo: edited and approved" in result
+    assert "[2] echo: rejected" in result
+    assert "[3] echo: rejected" in result
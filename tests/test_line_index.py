@@ -0,0 +1,37 @@
+from src.tools.local_tools.editor_tools import read_file
+from src.utils.line_index import LineIndex
+
+
+def write_lines(tmp_path, count):
+    path = tmp_path / "big.txt"
+    path.write_text("".join(f"line {number}\n" for number in range(1, count + 1)), encoding="utf-8")
+    return str(path)
+
+
+def test_ranged_read_stops_at_its_end_line(tmp_path):
+    path = write_lines(tmp_path, 100_000)
+
+    result = read_file(path, start_line=50_000, end_line=50_002)
+
+    index = LineIndex.for_file(path)
+    assert index._scanned < index.size // 2
+    assert result.splitlines()[0].startswith(f"[{path} | lines 50000-50002 of at least 50003 |")
+    assert result.splitlines()[2:] == ["line 50000", "line 50001", "line 50002"]
+
+
+def test_line_count_is_exact_once_the_end_is_read(tmp_path):
+    path = write_lines(tmp_path, 10)
+
+    result = read_file(path, start_line=8, end_line=20)
+
+    assert result.splitlines()[0].startswith(f"[{path} | lines 8-10 of 10 |")
+    assert "use start_line/end_line" not in result
+
+
+def test_byte_range_is_clamped_to_the_file_size(tmp_path):
+    path = write_lines(tmp_path, 3)
+    size = LineIndex.for_file(path).size
+
+    result = read_file(path, start_byte=size + 100, end_byte=size + 200)
+
+    assert result == f"[{path} | bytes {size}-{size} of {size}]\n"
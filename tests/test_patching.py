@@ -0,0 +1,32 @@
+from src.utils.patching import _parse_hunks, apply_unified_diff
+
+
+def test_removed_line_starting_with_dashes_is_content():
+    patch = (
+        "--- a/args.txt\n"
+        "+++ b/args.txt\n"
+        "@@ -1,3 +1,3 @@\n"
+        " a\n"
+        "---flag value\n"
+        "+--flag other\n"
+        " b\n"
+    )
+    assert apply_unified_diff("a\n--flag value\nb\nc\n", patch) == "a\n--flag other\nb\nc\n"
+
+
+def test_file_headers_between_hunks_are_skipped():
+    patch = (
+        "diff --git a/x b/x\n"
+        "--- a/x\n"
+        "+++ b/x\n"
+        "@@ -1,2 +1,2 @@\n"
+        "-x1\n"
+        "+x2\n"
+        " y\n"
+        "--- a/z\n"
+        "+++ b/z\n"
+        "@@ -5 +5 @@\n"
+        "-z\n"
+        "+w\n"
+    )
+    assert _parse_hunks(patch) == [(1, ["x1", "y"], ["x2", "y"]), (5, ["z"], ["w"])]
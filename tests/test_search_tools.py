@@ -0,0 +1,49 @@
+import pytest
+
+from src.tools.local_tools.search_tools import WorkspaceSearchIndex, _required_literals
+
+
+@pytest.fixture
+def index(tmp_path):
+    (tmp_path / "notes.txt").write_text("ticket 42 open\nname = foo\n", encoding="utf-8")
+    (tmp_path / "other.txt").write_text("nothing to see here\n", encoding="utf-8")
+    return WorkspaceSearchIndex(str(tmp_path))
+
+
+@pytest.mark.parametrize("pattern, literals", [
+    (r"ticket \d{2,3}", ["ticket "]),
+    (r"foo{1,3}bar", ["bar"]),
+    (r"(?:name) =", ["name"]),
+    (r"(?P<key>name) =", ["name"]),
+    (r"ticket \d+", ["ticket "]),
+])
+def test_required_literals_skip_regex_syntax(pattern, literals):
+    assert _required_literals(pattern) == literals
+
+
+@pytest.mark.parametrize("pattern", [
+    r"(?=ticket)\w+",
+    r"(?!ticket)\w+",
+    r"(?<=ticket) \d+",
+    r"(?<!ticket) \d+",
+    r"(?i)ticket",
+    r"(tic)ket \1",
+    r"(?P<t>tic)ket (?P=t)",
+])
+def test_required_literals_unsure_patterns_scan_every_file(pattern):
+    assert _required_literals(pattern) == []
+
+
+@pytest.mark.parametrize("query", [
+    r"ticket \d{2,3}",
+    r"tick{1,2}et",
+    r"(?:name) =",
+    r"(?P<key>name) =",
+    r"(?<=ticket )\d+",
+    r"(?i)TICKET",
+    r"(o)\1",
+])
+def test_regex_search_finds_matching_file(index, query):
+    result = index.search(query, regex=True)
+    assert "notes.txt:" in result
+    assert "other.txt" not in result